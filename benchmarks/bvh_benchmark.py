@@ -0,0 +1,47 @@
+# Benchmark: BVH point-to-cell lookup against brute-force scan
+# Detector model with grid of pixels (RPP cells) in outer void
+import time
+import numpy as np
+import fitsgeo as fg
+from fitsgeo.bvh import brute_force_query
+
+N_X, N_Y, N_Z = 20, 20, 13  # 5200 pixels
+N_POINTS = 200000
+
+pixel_mat = fg.Material.database("MAT_SI", color="pastelblue")
+
+size = 0.5  # Pixel size
+for i in range(N_X):
+	for j in range(N_Y):
+		for k in range(N_Z):
+			pixel = fg.RPP(
+				[i * size, (i + 1) * size],
+				[j * size, (j + 1) * size],
+				[k * size, (k + 1) * size], material=pixel_mat)
+			fg.Cell([-pixel], name=f"Pixel {i} {j} {k}", material=pixel_mat)
+
+detector = fg.RPP([0, N_X * size], [0, N_Y * size], [0, N_Z * size])
+fg.Cell([+detector], name="Outer void", material=fg.MAT_OUTER)
+
+points = np.random.default_rng(1).uniform(
+	[-1, -1, -1], [N_X * size + 1, N_Y * size + 1, N_Z * size + 1],
+	(N_POINTS, 3))
+
+print(f"Cells: {len(fg.created_cells)}, points: {N_POINTS}")
+
+start = time.perf_counter()
+bvh = fg.BVH()
+print(f"BVH build: {time.perf_counter() - start:.3f} s, depth: {bvh.get_depth}")
+
+start = time.perf_counter()
+result_bvh = bvh.query(points)
+time_bvh = time.perf_counter() - start
+print(f"BVH query: {time_bvh:.3f} s")
+
+start = time.perf_counter()
+result_brute = brute_force_query(points)
+time_brute = time.perf_counter() - start
+print(f"Brute-force scan: {time_brute:.3f} s")
+
+print(f"Speedup: {time_brute / time_bvh:.1f}x")
+print("Results are equal:", bool(np.all(result_bvh == result_brute)))
@@ -0,0 +1,55 @@
+# Benchmark: memory footprint and build time of many small surfaces
+# Particle bed model with spheres, cylinders and boxes, 100k of each,
+# in usual geometry (vectors are lists) and in compact geometry (vectors are
+# shared tuples), with default and with distinct vectors
+import time
+import tracemalloc
+import numpy as np
+import fitsgeo as fg
+
+N_SURFACES = 100000
+
+# Distinct centers of surfaces, lists of coordinates are created in build
+CENTERS = np.random.default_rng(0).uniform(-50, 50, (N_SURFACES, 3))
+
+
+def build(cls, distinct: bool):
+	if not distinct:
+		for i in range(N_SURFACES):
+			cls(material=fg.MAT_WATER)
+	elif cls is fg.RPP:
+		for xyz0 in CENTERS:
+			x, y, z = xyz0.tolist()
+			fg.RPP([x, x + 1], [y, y + 1], [z, z + 1], material=fg.MAT_WATER)
+	else:
+		for xyz0 in CENTERS:
+			cls(xyz0.tolist(), material=fg.MAT_WATER)
+
+
+for cls in (fg.SPH, fg.RCC, fg.RPP, fg.BOX):
+	for distinct in (False, True):
+		for compact in (False, True):
+			# Build time without tracemalloc overhead
+			with fg.Geometry(cls.__name__, compact=compact) as geometry:
+				start = time.perf_counter()
+				build(cls, distinct)
+				time_build = time.perf_counter() - start
+
+				# Colors are resolved from materials on demand
+				start = time.perf_counter()
+				colors = [s.color for s in geometry.surfaces]
+				time_color = time.perf_counter() - start
+			del geometry, colors
+
+			tracemalloc.start()
+			with fg.Geometry(cls.__name__, compact=compact) as geometry:
+				build(cls, distinct)
+			memory = tracemalloc.get_traced_memory()[0]
+			tracemalloc.stop()
+			del geometry
+
+			print(
+				f"{cls.__name__} ({'distinct' if distinct else 'default'}, "
+				f"{'compact' if compact else 'lists'}): {N_SURFACES} surfaces, "
+				f"build: {time_build:.3f} s, colors: {time_color:.3f} s, "
+				f"memory: {memory / N_SURFACES:.0f} bytes per surface")
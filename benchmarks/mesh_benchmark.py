@@ -0,0 +1,36 @@
+# Benchmark: 100k individual surfaces exported to STL and glTF meshes
+# Spheres, cylinders and boxes of two materials, every surface is separate
+import os
+import time
+import numpy as np
+import fitsgeo as fg
+
+N_SURFACES = 100000
+SEGMENTS = 16
+
+rng = np.random.default_rng(0)
+materials = [
+	fg.Material.database("MAT_WATER", color=c) for c in ("red", "blue")]
+
+with fg.Geometry("Mesh") as geometry:
+	start = time.perf_counter()
+	for i, xyz in enumerate(rng.uniform(0, 100, (N_SURFACES, 3))):
+		material = materials[i % len(materials)]
+		kind = i % 3
+		if kind == 0:
+			fg.SPH(xyz, 0.3, material=material)
+		elif kind == 1:
+			fg.RCC(xyz, [0, 0, 1], 0.2, material=material)
+		else:
+			fg.BOX(xyz, [1, 0, 0], [0, 1, 0], [0, 0, 1], material=material)
+	time_build = time.perf_counter() - start
+
+	for file_name in ("mesh_benchmark.stl", "mesh_benchmark.gltf"):
+		start = time.perf_counter()
+		triangles = fg.export_mesh(file_name, segments=SEGMENTS)
+		time_export = time.perf_counter() - start
+		print(
+			f"{file_name}: {triangles} triangles, {time_export:.3f} s, "
+			f"{os.path.getsize(file_name) / 1e6:.1f} MB")
+
+print(f"{len(geometry.surfaces)} surfaces, build: {time_build:.3f} s")
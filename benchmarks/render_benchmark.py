@@ -0,0 +1,34 @@
+# Benchmark: 4k slice of model with 10k cells rendered to PNG
+# Tiles with spheres inside, every tile and sphere is a separate cell
+import time
+import fitsgeo as fg
+
+N_TILES = 71  # Tiles along x and z, 2 cells in every tile
+
+colors = ("red", "green", "blue", "yellow")
+materials = [fg.Material.database("MAT_WATER", color=c) for c in colors]
+
+with fg.Geometry("Tiles") as geometry:
+	start = time.perf_counter()
+	for i in range(N_TILES):
+		for j in range(N_TILES):
+			tile = fg.RPP([i, i + 1], [-1, 1], [j, j + 1])
+			sphere = fg.SPH([i + 0.5, 0, j + 0.5], 0.4)
+			fg.Cell([-sphere], material=materials[(i + j) % len(materials)])
+			fg.Cell([-tile, " ", +sphere], material=fg.MAT_VOID)
+	world = fg.RPP([0, N_TILES], [-1, 1], [0, N_TILES])
+	fg.Cell([+world], material=fg.MAT_OUTER)
+	time_build = time.perf_counter() - start
+
+	start = time.perf_counter()
+	image = fg.render_slice("xz", pixels=(3840, 2160))
+	time_render = time.perf_counter() - start
+
+	start = time.perf_counter()
+	fg.write_png("render_benchmark.png", image)
+	time_png = time.perf_counter() - start
+
+print(
+	f"{len(geometry.cells)} cells, build: {time_build:.3f} s, "
+	f"render {image.shape[1]}x{image.shape[0]}: {time_render:.3f} s, "
+	f"PNG: {time_png:.3f} s")
@@ -0,0 +1,42 @@
+# Benchmark: model with 10k cells voxelized to 512 x 64 x 512 grid,
+# in memory and to .npy files mapped to memory
+# Tiles with spheres inside, every tile and sphere is a separate cell
+import os
+import tempfile
+import time
+import fitsgeo as fg
+
+N_TILES = 71  # Tiles along x and z, 2 cells in every tile
+SHAPE = (512, 64, 512)
+
+colors = ("red", "green", "blue", "yellow")
+materials = [fg.Material.database("MAT_WATER", color=c) for c in colors]
+for i, material in enumerate(materials):
+	material.matn = i + 1
+
+with fg.Geometry("Tiles") as geometry:
+	start = time.perf_counter()
+	for i in range(N_TILES):
+		for j in range(N_TILES):
+			tile = fg.RPP([i, i + 1], [-1, 1], [j, j + 1])
+			sphere = fg.SPH([i + 0.5, 0, j + 0.5], 0.4)
+			fg.Cell([-sphere], material=materials[(i + j) % len(materials)])
+			fg.Cell([-tile, " ", +sphere], material=fg.MAT_VOID)
+	world = fg.RPP([0, N_TILES], [-1, 1], [0, N_TILES])
+	fg.Cell([+world], material=fg.MAT_OUTER)
+	time_build = time.perf_counter() - start
+
+	start = time.perf_counter()
+	matn, density = fg.voxelize(shape=SHAPE)
+	time_memory = time.perf_counter() - start
+
+	with tempfile.TemporaryDirectory() as directory:
+		start = time.perf_counter()
+		fg.voxelize(
+			shape=SHAPE, samples=2, file_name=os.path.join(directory, "tiles"))
+		time_file = time.perf_counter() - start
+
+print(
+	f"{len(geometry.cells)} cells, build: {time_build:.3f} s, "
+	f"{matn.size} voxels: {time_memory:.3f} s, "
+	f"with 8 samples to .npy files: {time_file:.3f} s")
@@ -1,7 +1,20 @@
 from .const import *
-from .export import phits_export
+from .export import phits_export, phits_write
 from .surface import list_all_surfaces, create_scene, P, SPH, \
-	BOX, BOX, RPP, RCC, TRC, T, REC, WED, HEX, ELL, created_surfaces
+	BOX, BOX, RPP, RCC, TRC, T, REC, WED, HEX, ELL, created_surfaces, \
+	SPHArray, RCCArray, RPPArray
 from .material import Material, list_all_materials, created_materials, \
 	MAT_WATER, MAT_OUTER, MAT_VOID
 from .cell import Cell, created_cells
+from .region import parse_cell_def, compile_cell, cells_mask, SenseCache, \
+	cell_bounding_box, cells_bounding_box
+from .analysis import compute_volumes, check_geometry
+from .bvh import BVH
+from .ray import intersect, cast, trace
+from .importer import phits_import, phits_read
+from .geometry import Geometry, current_geometry
+from .sweep import sweep, parameter_grid
+from .render import render_slice, slice_cells, slice_png, write_png
+from .mesh import export_mesh, write_stl, write_obj, write_gltf
+from .scene import draw_all
+from .voxel import voxelize
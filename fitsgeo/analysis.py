@@ -0,0 +1,357 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from .surface import notation
+from .region import SenseCache, compile_cell, cells_bounding_box
+from .cell import top_level_cells
+from .geometry import current_geometry
+
+# Model (surfaces, cells) of current worker process, set by init_worker
+WORKER_MODEL = None
+
+
+def init_worker(surfaces: list, cells: list):
+	"""
+	Initialize worker process with model, model is transferred only once
+
+	:param surfaces: list with all surfaces
+	:param cells: list with all cells
+	"""
+	global WORKER_MODEL
+	WORKER_MODEL = (surfaces, cells)
+
+
+def sample_points(bounds, n: int, rng):
+	"""
+	Sample uniformly distributed points inside bounding box
+
+	:param bounds: [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	:param n: number of points
+	:param rng: numpy.random.Generator
+	:return: numpy.ndarray with (n, 3) shape
+	"""
+	bounds = np.asarray(bounds, dtype=float)
+	return bounds[:, 0] + (bounds[:, 1] - bounds[:, 0]) * rng.random((n, 3))
+
+
+def find_bounds(cells: list, surfaces: list = None):
+	"""
+	Find bounding box containing all cells
+
+	:param cells: list of cells
+	:param surfaces: list of surfaces (surfaces of current geometry by default)
+	:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	"""
+	bounds = cells_bounding_box(cells, surfaces)
+	if not np.all(np.isfinite(bounds)):
+		raise ValueError(
+			"Cells are unbounded, please provide bounds for sampling!")
+	return bounds
+
+
+def count_hits(targets: list, bounds, n: int, seed):
+	"""
+	Count points inside each target cell for one batch, runs in worker process
+
+	:param targets: indexes of cells (in model cells list) to count
+	:param bounds: [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	:param n: number of points in batch
+	:param seed: numpy.random.SeedSequence for this batch
+	:return: numpy.ndarray with number of hits for each target cell
+	"""
+	surfaces, cells = WORKER_MODEL
+	points = sample_points(bounds, n, np.random.default_rng(seed))
+	cache = SenseCache(points, surfaces, cells)
+	return np.array(
+		[np.count_nonzero(compile_cell(cells[i])(cache)) for i in targets])
+
+
+def run_batches(
+		task, args: list, surfaces: list, cells: list, processes: int, stop):
+	"""
+	Run batches in order, in current process or in process pool, until stop
+	condition is met, results of batches are used strictly in order, so result
+	doesn't depend on number of processes
+
+	:param task: function to run for every batch
+	:param args: list with arguments tuples for every batch
+	:param surfaces: list with all surfaces
+	:param cells: list with all cells
+	:param processes: number of worker processes (1 to run in current process)
+	:param stop: function(result) called in order for every batch result,
+		returns True to stop
+	"""
+	global WORKER_MODEL
+	if processes == 1:
+		previous = WORKER_MODEL
+		init_worker(surfaces, cells)
+		try:
+			for a in args:
+				if stop(task(*a)):
+					break
+		finally:
+			WORKER_MODEL = previous
+		return
+
+	with ProcessPoolExecutor(
+			max_workers=processes,
+			initializer=init_worker, initargs=(surfaces, cells)) as pool:
+		# Keep limited number of batches in flight to stop early
+		pending = []
+		args = iter(args)
+		for a in args:
+			pending.append(pool.submit(task, *a))
+			if len(pending) < 2 * processes:
+				continue
+			if stop(pending.pop(0).result()):
+				break
+		else:
+			while pending:
+				if stop(pending.pop(0).result()):
+					break
+		for future in pending:
+			future.cancel()
+
+
+def compute_volumes(
+		bounds=None, cells: list = None, rel_error=0.01,
+		batch_size=100000, max_points=10000000,
+		processes=1, seed=None, set_volume=True, geometry=None):
+	"""
+	Compute cells volumes with Monte Carlo method: points are sampled in
+	batches uniformly inside bounding box and cell membership is evaluated
+	vectorized, sampling stops when relative error of every volume is less
+	than rel_error or when max_points are sampled
+
+	:param bounds: bounding box with all cells inside
+		[[x_min, x_max], [y_min, y_max], [z_min, z_max]], by default found from
+		bounding boxes of cells
+	:param cells: list of cells (all cells of the real world except outer
+		void by default)
+	:param rel_error: target relative error (1 sigma) of volumes
+	:param batch_size: number of points in one batch
+	:param max_points: maximum number of sampled points
+	:param processes: number of worker processes for process pool
+	:param seed: seed for numpy.random.SeedSequence, every batch gets its own
+		child seed, so result is reproducible
+	:param set_volume: if True set volume parameter of cells
+	:param geometry: Geometry object (current geometry by default)
+	:return: dictionary {cn: (volume, error)} with volumes and their
+		statistical errors (1 sigma) in cm^3
+	"""
+	geometry = current_geometry(geometry)
+	if cells is None:
+		cells = [
+			c for c in top_level_cells(geometry.cells) if c.material.matn >= 0]
+	all_cells = list(geometry.cells)
+	index = {id(c): i for i, c in enumerate(all_cells)}
+	for cell in cells:
+		if id(cell) not in index:
+			index[id(cell)] = len(all_cells)
+			all_cells.append(cell)
+	targets = [index[id(c)] for c in cells]
+
+	if bounds is None:
+		bounds = find_bounds(cells, geometry.surfaces)
+	bounds = np.asarray(bounds, dtype=float)
+	box_volume = np.prod(bounds[:, 1] - bounds[:, 0])
+
+	n_batches = -(-max_points // batch_size)  # Ceiling division
+	seeds = np.random.SeedSequence(seed).spawn(n_batches)
+	args = [(targets, bounds, batch_size, s) for s in seeds]
+
+	hits = np.zeros(len(cells))
+	total = 0
+
+	def stop(result):
+		nonlocal hits, total
+		hits += result
+		total += batch_size
+		p = hits / total
+		error = np.sqrt(p * (1 - p) / total)
+		with np.errstate(divide="ignore", invalid="ignore"):
+			return bool(np.all((hits > 0) & (error / p <= rel_error)))
+
+	run_batches(
+		count_hits, args, list(geometry.surfaces), all_cells, processes, stop)
+
+	p = hits / total
+	volumes = {}
+	for i, cell in enumerate(cells):
+		volume = float(box_volume * p[i])
+		error = float(box_volume * np.sqrt(p[i] * (1 - p[i]) / total))
+		volumes[cell.cn] = (volume, error)
+		if set_volume:
+			cell.volume = volume
+	return volumes
+
+
+def find_errors(bounds, n: int, seed, max_examples: int):
+	"""
+	Find points claimed by zero cells (gaps) or by more than one cell
+	(overlaps) for one chunk, runs in worker process
+
+	:param bounds: [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	:param n: number of points in chunk
+	:param seed: numpy.random.SeedSequence for this chunk
+	:param max_examples: maximum number of example points for each group
+	:return: tuple (gaps count, gap examples, {(cn1, cn2): count},
+		{(cn1, cn2): examples})
+	"""
+	surfaces, cells = WORKER_MODEL
+	points = sample_points(bounds, n, np.random.default_rng(seed))
+	cache = SenseCache(points, surfaces, cells)
+
+	claim_points, claim_cells = [], []  # Every (point, cell) claim
+	for i, cell in enumerate(cells):
+		idx = np.flatnonzero(compile_cell(cell)(cache))
+		claim_points.append(idx)
+		claim_cells.append(np.full(len(idx), i))
+	claim_points = np.concatenate(claim_points or [np.empty(0, dtype=int)])
+	claim_cells = np.concatenate(claim_cells or [np.empty(0, dtype=int)])
+	claims = np.bincount(claim_points, minlength=n)
+	gaps = np.flatnonzero(claims == 0)
+
+	# Claims of overlapping points sorted by point and cell, every pair of
+	# cells claiming the same point is found as claims at distance d
+	multiple = claims[claim_points] > 1
+	order = np.lexsort((claim_cells[multiple], claim_points[multiple]))
+	p, c = claim_points[multiple][order], claim_cells[multiple][order]
+	pair_ids, pair_points = [], []
+	for d in range(1, claims.max(initial=0)):
+		same = p[:-d] == p[d:]
+		pair_ids.append(c[:-d][same] * len(cells) + c[d:][same])
+		pair_points.append(p[:-d][same])
+
+	counts, examples = {}, {}
+	if pair_ids:
+		pair_ids = np.concatenate(pair_ids)
+		pair_points = np.concatenate(pair_points)
+		for pair_id, count in zip(*np.unique(pair_ids, return_counts=True)):
+			pair = (
+				cells[pair_id // len(cells)].cn, cells[pair_id % len(cells)].cn)
+			counts[pair] = int(count)
+			idx = pair_points[pair_ids == pair_id][:max_examples]
+			examples[pair] = points[idx]
+	return len(gaps), points[gaps[:max_examples]], counts, examples
+
+
+class GeometryReport:
+
+	def __init__(self, bounds, points: int):
+		"""
+		Result of geometry check: gaps and overlaps of cells
+
+		:param bounds: checked region [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		:param points: number of sampled points
+		"""
+		self.bounds = np.asarray(bounds, dtype=float)
+		self.points = points
+		self.gaps = 0  # Number of points claimed by no cell
+		self.gap_examples = np.empty((0, 3))
+		self.overlaps = {}  # {(cn1, cn2): number of points claimed by both}
+		self.overlap_examples = {}  # {(cn1, cn2): example points}
+
+	@property
+	def ok(self):
+		"""
+		Get geometry state
+
+		:return: True if no gaps and overlaps were found
+		"""
+		return self.gaps == 0 and not self.overlaps
+
+	def get_volume(self, count: int):
+		"""
+		Get estimated volume of region with count sampled points
+
+		:param count: number of points
+		:return: float volume
+		"""
+		volume = np.prod(self.bounds[:, 1] - self.bounds[:, 0])
+		return float(volume * count / self.points)
+
+	def print_report(self):
+		"""
+		Print report about found gaps and overlaps
+
+		:return: string with report
+		"""
+		text = f"Geometry check: {self.points} points sampled\n"
+		if self.ok:
+			text += "No gaps and overlaps found\n"
+		if self.gaps:
+			text += \
+				f"Gaps (no cell): {self.gaps} points, " + \
+				f"volume ~ {self.get_volume(self.gaps):.4g} cm^3\n"
+			for point in self.gap_examples:
+				text += f"\tat ({', '.join(notation(x) for x in point)})\n"
+		for (cn1, cn2), count in sorted(self.overlaps.items()):
+			text += \
+				f"Overlap of cells {cn1} and {cn2}: {count} points, " + \
+				f"volume ~ {self.get_volume(count):.4g} cm^3\n"
+			for point in self.overlap_examples[(cn1, cn2)]:
+				text += f"\tat ({', '.join(notation(x) for x in point)})\n"
+		print(text, end="")
+		return text
+
+
+def check_geometry(
+		bounds=None, n_points=1000000, chunk_size=100000,
+		processes=1, seed=None, max_examples=5, geometry=None):
+	"""
+	Check geometry for lost particles: sample points in streaming chunks
+	inside bounding region and find points claimed by zero cells (gaps) or by
+	more than one cell (overlaps). Memory is bounded by chunk_size, overlaps
+	are grouped by pairs of cells, every pair of cells claiming the point
+	is counted
+
+	:param bounds: region to check [[x_min, x_max], [y_min, y_max], [z_min, z_max]],
+		by default bounding box of all cells except outer void
+	:param n_points: total number of sampled points
+	:param chunk_size: number of points evaluated at once
+	:param processes: number of worker processes for process pool
+	:param seed: seed for numpy.random.SeedSequence, every chunk gets its own
+		child seed, so result is reproducible
+	:param max_examples: maximum number of example points for each group
+	:param geometry: Geometry object (current geometry by default)
+	:return: GeometryReport object
+	"""
+	geometry = current_geometry(geometry)
+	if bounds is None:
+		bounds = find_bounds(
+			[c for c in top_level_cells(geometry.cells) if c.material.matn >= 0],
+			geometry.surfaces)
+	report = GeometryReport(bounds, 0)
+
+	n_chunks = -(-n_points // chunk_size)  # Ceiling division
+	seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+	args = [
+		(report.bounds, min(chunk_size, n_points - i * chunk_size), s, max_examples)
+		for i, s in enumerate(seeds)]
+
+	def collect(result):
+		gaps, gap_examples, counts, examples = result
+		report.gaps += gaps
+		if len(report.gap_examples) < max_examples:
+			report.gap_examples = np.concatenate(
+				[report.gap_examples, gap_examples])[:max_examples]
+		for pair, count in counts.items():
+			report.overlaps[pair] = report.overlaps.get(pair, 0) + count
+			report.overlap_examples[pair] = np.concatenate(
+				[report.overlap_examples.get(pair, np.empty((0, 3))),
+					examples[pair]])[:max_examples]
+		return False
+
+	run_batches(
+		find_errors, args, list(geometry.surfaces),
+		top_level_cells(geometry.cells),
+		processes, collect)
+	report.points = n_points
+	return report
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
@@ -0,0 +1,176 @@
+import numpy as np
+
+from .surface import as_points, SurfaceLookup
+from .region import SenseCache, compile_cell, cell_bounding_box
+from .cell import top_level_cells
+from .geometry import current_geometry
+
+
+class BVH:
+
+	def __init__(
+			self, cells: list = None, surfaces: list = None, leaf_size=4,
+			geometry=None):
+		"""
+		Bounding volume hierarchy over cells for fast point-to-cell lookup:
+		only cells with bounding boxes containing the point are evaluated
+
+		:param cells: list of cells (cells of the real world by default)
+		:param surfaces: list of surfaces (surfaces of geometry by default)
+		:param leaf_size: maximum number of cells in leaf node
+		:param geometry: Geometry object (current geometry by default)
+		"""
+		geometry = current_geometry(geometry)
+		if cells is None:
+			cells = top_level_cells(geometry.cells)
+		if surfaces is None:
+			surfaces = geometry.surfaces
+
+		self.cells = list(cells)
+		self.surfaces = SurfaceLookup(surfaces)
+		self.lookup = {c.cn: c for c in geometry.cells}  # For #cn complements
+		self.lookup.update({c.cn: c for c in self.cells})
+		self.leaf_size = leaf_size
+
+		self.boxes = np.array(
+			[cell_bounding_box(c, self.surfaces) for c in self.cells]
+		).reshape(-1, 3, 2)
+		finite = np.all(np.isfinite(self.boxes), axis=(1, 2))
+		empty = np.any(self.boxes[:, :, 0] > self.boxes[:, :, 1], axis=1)
+		# Unbounded cells (outer void etc.) are tested after the tree
+		self.unbounded = np.flatnonzero(~finite & ~empty)
+
+		# Nodes of tree: box limits, children, cells of leaves and the first
+		# cell (in order of cells) in subtree
+		self.lo, self.hi, self.left, self.right, self.items = [], [], [], [], []
+		self.first = []
+		bounded = np.flatnonzero(finite & ~empty)
+		if len(bounded):
+			self.build(bounded)
+		self.lo = np.array(self.lo).reshape(-1, 3)
+		self.hi = np.array(self.hi).reshape(-1, 3)
+		self.first = np.array(self.first, dtype=int)
+
+	def build(self, items):
+		"""
+		Build node of tree, splitting cells by median of box centers along the
+		longest axis
+
+		:param items: numpy.ndarray with indexes of cells
+		:return: int index of node
+		"""
+		boxes = self.boxes[items]
+		node = len(self.lo)
+		self.lo.append(boxes[:, :, 0].min(axis=0))
+		self.hi.append(boxes[:, :, 1].max(axis=0))
+		self.left.append(-1)
+		self.right.append(-1)
+		self.items.append(None)
+		self.first.append(items.min())
+
+		if len(items) <= self.leaf_size:
+			# Order of cells, point is assigned to the first cell containing it
+			self.items[node] = np.sort(items)
+			return node
+
+		centers = boxes.mean(axis=2)
+		axis = np.argmax(np.ptp(centers, axis=0))
+		order = items[np.argsort(centers[:, axis], kind="stable")]
+		half = len(order) // 2
+		self.left[node] = self.build(order[:half])
+		self.right[node] = self.build(order[half:])
+		return node
+
+	@property
+	def get_depth(self):
+		"""
+		Get depth of tree
+
+		:return: int depth
+		"""
+		def depth(node):
+			if self.left[node] < 0:
+				return 1
+			return 1 + max(depth(self.left[node]), depth(self.right[node]))
+		return depth(0) if len(self.lo) else 0
+
+	def test(self, items, points, idx, best):
+		"""
+		Evaluate cells for points and keep index of the first cell containing
+		every point
+
+		:param items: sorted indexes of cells
+		:param points: numpy.ndarray with all points
+		:param idx: indexes of points to test
+		:param best: numpy.ndarray with index of the first cell found for all
+			points (number of cells if no cell is found)
+		"""
+		cache = SenseCache(points[idx], self.surfaces, self.lookup)
+		for i in items:
+			candidates = best[idx] > i  # Earlier cell found for other points
+			if not candidates.any():
+				break
+			mask = compile_cell(self.cells[i])(cache) & candidates
+			best[idx[mask]] = i
+
+	def query(self, points):
+		"""
+		Find cells containing points, only cells with bounding boxes containing
+		point are evaluated
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray with cell number (cn) for every point,
+			-1 for points outside of all cells, for overlapping cells the first
+			one in list of cells (as in brute_force_query)
+		"""
+		p = as_points(points)
+		best = np.full(len(p), len(self.cells))
+
+		stack = [(0, np.arange(len(p)))] if len(self.lo) else []
+		while stack:
+			node, idx = stack.pop()
+			idx = idx[best[idx] > self.first[node]]  # Skip resolved points
+			q = p[idx]
+			inside = np.all((q >= self.lo[node]) & (q <= self.hi[node]), axis=1)
+			idx = idx[inside]
+			if not len(idx):
+				continue
+			if self.left[node] < 0:
+				self.test(self.items[node], p, idx, best)
+			else:
+				stack.append((self.right[node], idx))
+				stack.append((self.left[node], idx))
+
+		if len(self.unbounded):
+			rest = np.flatnonzero(best > self.unbounded[0])
+			if len(rest):
+				self.test(self.unbounded, p, rest, best)
+		cns = np.array([c.cn for c in self.cells] + [-1])
+		return cns[best]
+
+
+def brute_force_query(points, cells: list = None, surfaces: list = None):
+	"""
+	Find cells containing points by evaluating every cell for every point,
+	reference for BVH.query
+
+	:param points: array-like of points with (N, 3) shape
+	:param cells: list of cells (cells of current geometry by default)
+	:param surfaces: list of surfaces (surfaces of current geometry by default)
+	:return: numpy.ndarray with cell number (cn) for every point,
+		-1 for points outside of all cells
+	"""
+	if cells is None:
+		cells = current_geometry().cells
+	cache = SenseCache(points, surfaces)
+	result = np.full(len(cache.points), -1)
+	for cell in cells:
+		mask = compile_cell(cell)(cache) & (result < 0)
+		result[mask] = cell.cn
+	return result
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
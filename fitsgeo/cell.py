@@ -1,17 +1,44 @@
-import itertools
+import warnings
+
+import numpy as np
+
 from .material import Material, MAT_WATER
+from .geometry import DEFAULT_GEOMETRY, current_geometry
+
+# Counter for objects of default geometry, every new object will have n+1
+# cell number (every Geometry has its own counter)
+cell_counter = DEFAULT_GEOMETRY.cell_counter
+
+# All objects of default geometry after initialisation go here
+created_cells = DEFAULT_GEOMETRY.cells
 
-# Counter for objects, every new object will have n+1 surface number
-cell_counter = itertools.count(100)
 
-created_cells = []  # All objects after initialisation go here
+def top_level_cells(cells: list):
+	"""
+	Get cells of the real world: cells of universes (U=) are placed by FILL=
+	of their container cells, they are not used in analysis of the model,
+	warns if some of cells are filled (results for them are not correct)
+
+	:param cells: list of cells
+	:return: list of cells without universe
+	"""
+	cells = [c for c in cells if c.u is None]
+	filled = [c.cn for c in cells if c.fill is not None]
+	if filled:
+		# Warning points to caller of analysis function
+		warnings.warn(
+			f"Cells {filled} are filled with universes (FILL=), analysis "
+			"evaluates them as one cell with their own material, "
+			"universe contents are ignored!", stacklevel=3)
+	return cells
 
 
 class Cell:  # superclass with common properties/methods for all surfaces
 
 	def __init__(
 			self, cell_def: list, name="Cell",
-			material=MAT_WATER, volume: float = None):
+			material=MAT_WATER, volume: float = None,
+			u: int = None, lat: int = None, fill=None, fill_start=(0, 0, 0)):
 		"""
 		Define cell
 
@@ -22,14 +49,34 @@ class Cell:  # superclass with common properties/methods for all surfaces
 		:param name: name for object
 		:param material: material associated with cell
 		:param volume: cell volume in cm^3
+		:param u: number of universe the cell belongs to (U= parameter),
+			None for cells of the real world
+		:param lat: lattice type (LAT= parameter): 1 for hexahedral and 2 for
+			hexagonal prism lattice, cell_def defines element (0, 0, 0)
+		:param fill: universe filling the cell (FILL= parameter): universe
+			number for all elements or 3D array-like of universe numbers of
+			lattice elements indexed [i, j, k]
+		:param fill_start: lower lattice indexes (i, j, k) of fill array
 		"""
 		self.cell_def = cell_def
 		self.name = name
 		self.material = material
 		self.volume = volume
-
-		self.cn = next(cell_counter)
-		created_cells.append(self)
+		self.u = u
+		self.lat = lat
+		self.fill_start = fill_start
+		self.fill = fill
+		self.compiled = None  # Cache for compiled cell_def (see region module)
+
+		geometry = current_geometry()
+		self.cn = next(geometry.cell_counter)
+		geometry.cells.append(self)
+
+	def __getstate__(self):
+		# Compiled functions can't be pickled, they are recompiled on demand
+		state = self.__dict__.copy()
+		state["compiled"] = None
+		return state
 
 	@property
 	def cell_def(self):
@@ -121,11 +168,127 @@ class Cell:  # superclass with common properties/methods for all surfaces
 		"""
 		self.__volume = volume
 
-	def phits_print(self):
+	@property
+	def u(self):
 		"""
-		Print PHITS cell definition
+		Get number of universe of cell
 
-		:return: string with PHITS cell definition
+		:return: int u or None for cells of the real world
+		"""
+		return self.__u
+
+	@u.setter
+	def u(self, u: int):
+		"""
+		Set number of universe of cell
+
+		:param u: universe number [any number from 1 to 999 999] or None
+		"""
+		if u is not None and u < 1:
+			raise ValueError("Universe number must be positive!")
+		self.__u = u
+
+	@property
+	def lat(self):
+		"""
+		Get lattice type of cell
+
+		:return: int lat (1 or 2) or None for cells without lattice
+		"""
+		return self.__lat
+
+	@lat.setter
+	def lat(self, lat: int):
+		"""
+		Set lattice type of cell
+
+		:param lat: 1 for hexahedral, 2 for hexagonal prism lattice or None
+		"""
+		if lat not in (None, 1, 2):
+			raise ValueError("Lattice type must be 1 or 2!")
+		self.__lat = lat
+
+	@property
+	def fill(self):
+		"""
+		Get universe filling the cell
+
+		:return: int universe number, numpy.ndarray with universe numbers of
+			lattice elements [i, j, k] or None
+		"""
+		return self.__fill
+
+	@fill.setter
+	def fill(self, fill):
+		"""
+		Set universe filling the cell
+
+		:param fill: universe number or 3D array-like of universe numbers of
+			lattice elements [i, j, k] or None
+		"""
+		if fill is not None and not isinstance(fill, (int, np.integer)):
+			fill = np.asarray(fill, dtype=int)
+			if fill.ndim != 3:
+				raise ValueError("Fill array must be 3D [i, j, k]!")
+		self.__fill = fill
+
+	@property
+	def fill_start(self):
+		"""
+		Get lower lattice indexes of fill array
+
+		:return: tuple (i, j, k)
+		"""
+		return self.__fill_start
+
+	@fill_start.setter
+	def fill_start(self, fill_start):
+		"""
+		Set lower lattice indexes of fill array
+
+		:param fill_start: lattice indexes (i, j, k) of fill[0, 0, 0]
+		"""
+		self.__fill_start = tuple(int(i) for i in fill_start)
+
+	@property
+	def get_fill(self):
+		"""
+		Get FILL= parameter of cell as PHITS string, universe numbers of fill
+		array are on continuation lines (20 numbers per line)
+
+		:return: string with FILL= parameter or "" for cell without fill
+		"""
+		if self.fill is None:
+			return ""
+		if isinstance(self.fill, (int, np.integer)):
+			return f"FILL={self.fill}"
+		ranges = " ".join(
+			f"{start}:{start + n - 1}"
+			for start, n in zip(self.fill_start, self.fill.shape))
+		# Index i changes fastest
+		numbers = list(map(str, self.fill.transpose(2, 1, 0).ravel().tolist()))
+		lines = [
+			" " * 10 + " ".join(numbers[i:i + 20])
+			for i in range(0, len(numbers), 20)]
+		return f"FILL={ranges}\n" + "\n".join(lines)
+
+	@property
+	def bounding_box(self):
+		"""
+		Get axis-aligned bounding box of cell, propagated through cell_def from
+		cached bounding boxes of surfaces (see region module)
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		from .region import cell_bounding_box  # region module imports cell
+		return cell_bounding_box(self)
+
+	@property
+	def get_cell_def(self):
+		"""
+		Get cell definition as PHITS string, every region in parentheses
+
+		:return: string with cell definition
 		"""
 		# ⊔(blank)(AND), :(OR), and #(NOT) must be used to treat the regions.
 		cell_def = ""
@@ -136,11 +299,27 @@ class Cell:  # superclass with common properties/methods for all surfaces
 				cell_def += f"({regions[:-1]})"
 			else:
 				raise ValueError("cell_def incorrect!")
+		return cell_def
 
-		if self.volume is None:
-			volume = ""
-		else:
-			volume = f"VOL={self.volume}"
+	def phits_print(self):
+		"""
+		Print PHITS cell definition
+
+		:return: string with PHITS cell definition
+		"""
+		cell_def = self.get_cell_def
+
+		parameters = []
+		if self.volume is not None:
+			parameters.append(f"VOL={self.volume}")
+		if self.u is not None:
+			parameters.append(f"U={self.u}")
+		if self.lat is not None:
+			parameters.append(f"LAT={self.lat}")
+		# Fill array goes on continuation lines after name comment
+		fill, _, fill_lines = self.get_fill.partition("\n")
+		if fill:
+			parameters.append(fill)
 
 		if self.material.matn < 1:  # For void and outer
 			density = ""
@@ -149,6 +328,8 @@ class Cell:  # superclass with common properties/methods for all surfaces
 
 		txt = \
 			f"    {self.cn} {self.material.matn}  " + \
-			f"{density}  {cell_def}  {volume}" + \
+			f"{density}  {cell_def}  {' '.join(parameters)}" + \
 			f" $ name: '{self.name}' "
+		if fill_lines:
+			txt += "\n" + fill_lines
 		return txt
@@ -1,5 +1,25 @@
+import os
 import numpy as np
-import vpython
+
+# Headless mode: colors are RGB tuples and vpython is imported only for drawing
+HEADLESS = os.environ.get("FITSGEO_HEADLESS", "").lower() in ("1", "true", "yes")
+
+if not HEADLESS:
+	import vpython
+
+
+def make_color(r: float, g: float, b: float):
+	"""
+	Make color from fractions of red, green and blue
+
+	:param r: red value 0-1
+	:param g: green value 0-1
+	:param b: blue value 0-1
+	:return: vpython.vector with color (tuple (r, g, b) in headless mode)
+	"""
+	if HEADLESS:
+		return r, g, b
+	return vpython.vector(r, g, b)
 
 
 def rgb_to_vector(r: float, g: float, b: float):
@@ -9,26 +29,52 @@ def rgb_to_vector(r: float, g: float, b: float):
 	:param r: red value 0-255
 	:param g: green value 0-255
 	:param b: blue value 0-255
+	:return: vpython.vector with color (tuple (r, g, b) in headless mode)
+	"""
+	return make_color(r/255, g/255, b/255)
+
+
+def as_vector(color):
+	"""
+	Convert color to vpython.vector, vpython is imported here on first
+	drawing in headless mode
+
+	:param color: vpython.vector or tuple (r, g, b)
 	:return: vpython.vector with color
 	"""
-	return vpython.vector(r/255, g/255, b/255)
+	if isinstance(color, tuple):
+		import vpython
+		return vpython.vector(*color)
+	return color
+
+
+def as_rgb(color):
+	"""
+	Convert color to tuple of fractions of red, green and blue
+
+	:param color: vpython.vector or tuple (r, g, b)
+	:return: tuple (r, g, b) with values 0-1
+	"""
+	if isinstance(color, tuple):
+		return color
+	return color.x, color.y, color.z
 
 
 # Math constants
 PI = np.pi
 
-# Define basic colors as constants
-RED = vpython.color.red
-LIME = vpython.color.green
-BLUE = vpython.color.blue
+# Define basic colors as constants (same as vpython.color)
+RED = make_color(1, 0, 0)
+LIME = make_color(0, 1, 0)
+BLUE = make_color(0, 0, 1)
 
-BLACK = vpython.color.black
-WHITE = vpython.color.white
+BLACK = make_color(0, 0, 0)
+WHITE = make_color(1, 1, 1)
 
-CYAN = vpython.color.cyan
-YELLOW = vpython.color.yellow
-MAGENTA = vpython.color.magenta
-ORANGE = vpython.color.orange
+CYAN = make_color(0, 1, 1)
+YELLOW = make_color(1, 1, 0)
+MAGENTA = make_color(1, 0, 1)
+ORANGE = make_color(1, 0.6, 0)
 
 GAINSBORO = rgb_to_vector(220, 220, 220)
 LIGHTGRAY = rgb_to_vector(211, 211, 211)
@@ -1,17 +1,106 @@
-from .surface import created_surfaces
-from .material import created_materials
-from .cell import created_cells
+from .material import phits_print_materials
+from .surface import phits_print_surfaces
+from .geometry import current_geometry
 import sys
 
+CHUNK_SIZE = 10000  # Surfaces formatted in one batch
+
+
+def title_lines(add_comment=""):
+	"""
+	Generate lines of [ Title ] section
+
+	:param add_comment: additional commentaries in title section
+	:return: generator of strings
+	"""
+	yield "[ Title ]\n"
+	yield f"\t{sys.argv[0][:-3]} PHITS input file\n"
+	yield f"\tgeometry generated with FitsGeo\n"
+	yield f"\t{add_comment}\n"
+
+
+def material_lines(materials: list):
+	"""
+	Generate lines of [ Material ] and [ Mat Name Color ] sections
+
+	:param materials: list of materials
+	:return: generator of strings
+	"""
+	yield "\n[ Material ]\n"
+	for text in phits_print_materials(materials):
+		if text != "":
+			yield text + "\n"
+	# For colors
+	yield "\n[ Mat Name Color ]\n\tmat\tname\tsize\tcolor\n"
+	for mat in materials:
+		if mat.matn > 0:  # To avoid outer and void
+			mat_name = "{"+mat.name.replace('_', '\\_')+"}"
+			mat_name = mat_name.replace("(", "\\(").replace(")", "\\)")
+			yield f"\t{mat.matn}\t{mat_name}\t1.00\t{mat.color}\n"
+
+
+def surface_lines(surfaces: list, precision: int = None):
+	"""
+	Generate lines of [ Surface ] section, surfaces are formatted in batches
+
+	:param surfaces: list of surfaces
+	:param precision: number of significant digits for surface parameters,
+		None to write parameters as they are printed by Python
+	:return: generator of strings
+	"""
+	yield "\n[ Surface ]\n"
+	for i in range(0, len(surfaces), CHUNK_SIZE):
+		for text in phits_print_surfaces(surfaces[i:i + CHUNK_SIZE], precision):
+			yield text + "\n"
+
+
+def cell_lines(cells: list):
+	"""
+	Generate lines of [ Cell ] section
+
+	:param cells: list of cells
+	:return: generator of strings
+	"""
+	yield "\n[ Cell ]\n"
+	for c in cells:
+		yield c.phits_print() + "\n"
+
+
+def phits_write(
+		stream, export_surfaces=True, export_materials=True, export_cells=True,
+		add_comment="", precision=None, geometry=None):
+	"""
+	Write defined sections in PHITS format to text stream line by line,
+	without building the whole input in memory, uses surfaces, materials and
+	cells lists of geometry. Empty sections are skipped
+
+	:param stream: text stream (file object, sys.stdout, io.StringIO etc.)
+	:param export_surfaces: flag for [ Surface ] section export
+	:param export_materials: flag for [ Material ] section export
+	:param export_cells: flag for [ Cell ] section export
+	:param add_comment: additional commentaries in title section
+	:param precision: number of significant digits for surface parameters,
+		None to write parameters as they are printed by Python
+	:param geometry: Geometry object (current geometry by default)
+	"""
+	geometry = current_geometry(geometry)
+	stream.writelines(title_lines(add_comment))
+	if export_materials and geometry.materials:
+		stream.writelines(material_lines(geometry.materials))
+	if export_surfaces and geometry.surfaces:
+		stream.writelines(surface_lines(geometry.surfaces, precision))
+	if export_cells and geometry.cells:
+		stream.writelines(cell_lines(geometry.cells))
+
 
 def phits_export(
 		to_file=False, inp_name="example",
 		export_surfaces=True, export_materials=True, export_cells=True,
-		add_comment=""):
-	# TODO: improve export to file
+		add_comment="", precision=None, verbose=True, geometry=None):
 	"""
 	Function for printing defined sections in PHITS format, uses created_surfaces,
-	created_materials lists which contain all defined objects
+	created_materials, created_cells lists which contain all defined objects
+	(or lists of geometry)
 
 	:param to_file: flag to export sections in input file
 	:param inp_name: name for input file export
@@ -19,67 +108,34 @@ def phits_export(
 	:param export_materials: flag for [ Material ] section export
 	:param export_cells: flag for [ Cell ] section export
 	:param add_comment: additional commentaries in title section
+	:param precision: number of significant digits for surface parameters,
+		None to write parameters as they are printed by Python
+	:param verbose: flag to print sections and messages about empty lists
+		in console (printing is default as in previous versions, False
+		for large models)
+	:param geometry: Geometry object (current geometry by default)
 	"""
-	text_title = "[ Title ]\n"
-	text_title += f"\t{sys.argv[0][:-3]} PHITS input file\n"
-	text_title += f"\tgeometry generated with FitsGeo\n"
-	text_title += f"\t{add_comment}\n"
-# ------------------------------------------------------------------------------
-	text_materials = ""
-	if not created_materials:
-		print("No material is defined!\ncreated_materials list is empty!")
-		export_materials = False
-	else:
-		text_materials = "\n[ Material ]\n"
-		for mat in created_materials:
-			if mat.phits_print() != "":
-				text_materials += mat.phits_print() + "\n"
-		# For colors
-		text_materials += "\n[ Mat Name Color ]\n\tmat\tname\tsize\tcolor\n"
-		for mat in created_materials:
-			if mat.matn > 0:  # To avoid outer and void
-				mat_name = "{"+mat.name.replace('_', '\\_')+"}"
-				mat_name = mat_name.replace("(", "\\(").replace(")", "\\)")
-
-				text_materials += \
-					f"\t{mat.matn}\t{mat_name}\t1.00\t{mat.color}\n"
-# ------------------------------------------------------------------------------
-	text_surfaces = ""
-	if not created_surfaces:
-		print("No surface is defined!\ncreated_surfaces list is empty!")
-		export_surfaces = False
-	else:
-		text_surfaces = "\n[ Surface ]\n"
-		for s in created_surfaces:
-			text_surfaces += s.phits_print() + "\n"
-# ------------------------------------------------------------------------------
-	text_cells = ""
-	if not created_cells:
-		print("No cell is defined!\ncreated_cells list is empty!")
-		export_cells = False
-	else:
-		text_cells = "\n[ Cell ]\n"
-		for c in created_cells:
-			text_cells += c.phits_print() + "\n"
-# ------------------------------------------------------------------------------
-	# TODO: module for T-Gshow
-	# text_tgshow = "[ T-Gshow ]\n"
-
-
-
-# ------------------------------------------------------------------------------
-
-	print(text_title+text_materials+text_surfaces+text_cells)
+	geometry = current_geometry(geometry)
+	if verbose:
+		if not geometry.materials:
+			print("No material is defined!\ncreated_materials list is empty!")
+		if not geometry.surfaces:
+			print("No surface is defined!\ncreated_surfaces list is empty!")
+		if not geometry.cells:
+			print("No cell is defined!\ncreated_cells list is empty!")
+
+	sections = dict(
+		export_surfaces=export_surfaces, export_materials=export_materials,
+		export_cells=export_cells, add_comment=add_comment,
+		precision=precision, geometry=geometry)
+
+	if verbose:
+		phits_write(sys.stdout, **sections)
+		print()
 
 	if to_file:
 		with open(f"{inp_name}_FitsGeo.inp", "w", encoding="utf-8") as f:
-			f.write(text_title)
-			if export_materials:
-				f.write(text_materials)
-			if export_surfaces:
-				f.write(text_surfaces)
-			if export_cells:
-				f.write(text_cells)
+			phits_write(f, **sections)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+import threading
+
+# Stack of active geometries for every thread, see current_geometry
+LOCAL = threading.local()
+
+DEFAULT_GEOMETRY = None  # Geometry with created_surfaces etc. lists
+
+
+class Counter:
+
+	def __init__(self, start: int):
+		"""
+		Counter of object numbers: iterator like itertools.count, which can be
+		moved past numbers of imported objects
+
+		:param start: first number
+		"""
+		self.start = start
+		self.value = start
+
+	def __iter__(self):
+		return self
+
+	def __next__(self):
+		value = self.value
+		self.value += 1
+		return value
+
+	def __repr__(self):
+		return f"Counter({self.value})"
+
+	def skip(self, number: int):
+		"""
+		Move counter past number, so next numbers are greater
+
+		:param number: used number
+		"""
+		self.value = max(self.value, number + 1)
+
+	def reset(self):
+		"""
+		Start counting from the first number again
+		"""
+		self.value = self.start
+
+
+class Geometry:
+
+	def __init__(self, name="Geometry", compact=False):
+		"""
+		Define geometry: registry of surfaces, cells and materials with its own
+		counters for sn, cn and matn. Objects created inside "with" block are
+		added to this geometry:
+
+			with Geometry() as geometry:
+				sphere = SPH()
+
+		Active geometry is kept per thread, so several geometries can be built
+		concurrently in threads. Predefined materials (MAT_OUTER, MAT_VOID,
+		MAT_WATER) are shared by all geometries. In compact geometry vector
+		parameters of surfaces (xyz0, h etc.) are stored as tuples and equal
+		directions (h, a, b, c) are shared: less memory for models with many
+		surfaces, but vectors are changed only by assignment
+		(surface.xyz0 = [...])
+
+		:param name: name for geometry
+		:param compact: if True store vectors of surfaces as tuples
+		"""
+		self.name = name
+		self.surfaces = []
+		self.cells = []
+		self.materials = []
+		self.vectors = {} if compact else None  # Shared directions
+
+		self.surface_counter = Counter(1)
+		self.cell_counter = Counter(100)
+		self.material_counter = Counter(1)
+
+		if DEFAULT_GEOMETRY is not None:  # Default geometry defines them
+			from .material import PREDEFINED_MATERIALS
+			self.materials.extend(PREDEFINED_MATERIALS)
+			self.material_counter = Counter(
+				max(m.matn for m in PREDEFINED_MATERIALS) + 1)
+
+	def __enter__(self):
+		active_geometries().append(self)
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		active_geometries().remove(self)
+
+	def __repr__(self):
+		return \
+			f"Geometry('{self.name}': {len(self.surfaces)} surfaces, " + \
+			f"{len(self.cells)} cells, {len(self.materials)} materials)"
+
+	def clear(self):
+		"""
+		Remove all surfaces, cells and materials from geometry, except
+		predefined materials (MAT_OUTER, MAT_VOID, MAT_WATER), numbers of new
+		objects start from the beginning
+		"""
+		from .material import PREDEFINED_MATERIALS
+		self.surfaces.clear()
+		self.cells.clear()
+		self.materials[:] = list(PREDEFINED_MATERIALS)
+		if self.vectors is not None:
+			self.vectors.clear()
+		self.surface_counter.reset()
+		self.cell_counter.reset()
+		self.material_counter.reset()
+		for m in PREDEFINED_MATERIALS:
+			self.material_counter.skip(m.matn)
+
+
+def active_geometries():
+	"""
+	Get stack of geometries activated with "with" blocks in current thread
+
+	:return: list of Geometry objects
+	"""
+	if not hasattr(LOCAL, "stack"):
+		LOCAL.stack = []
+	return LOCAL.stack
+
+
+def current_geometry(geometry: Geometry = None):
+	"""
+	Get geometry for new objects and default lists of functions: innermost
+	active geometry of current thread or default geometry
+
+	:param geometry: if not None it is returned as is
+	:return: Geometry object
+	"""
+	if geometry is not None:
+		return geometry
+	stack = active_geometries()
+	return stack[-1] if stack else DEFAULT_GEOMETRY
+
+
+DEFAULT_GEOMETRY = Geometry("Default")
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
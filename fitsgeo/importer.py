@@ -0,0 +1,500 @@
+import re
+from functools import lru_cache
+import numpy as np
+
+from .const import ANGEL_COLORS
+from .material import Material, periodic_table, MAT_OUTER, MAT_VOID, \
+	PREDEFINED_MATERIALS
+from .surface import P, SPH, BOX, RPP, RCC, TRC, T, REC, WED, SurfaceArray
+from .cell import Cell
+from .geometry import current_geometry
+
+SECTION = re.compile(r"^\s*\[\s*([^\]]*?)\s*\]\s*(off)?", re.IGNORECASE)
+NAME = re.compile(r"\$\s*name:\s*'(.*?)'")
+COMMENT_LINE = re.compile(r"^(\s{0,4}c(\s|$)|[#%!])", re.IGNORECASE)
+MATERIAL_START = re.compile(
+	r"^\s*m(?:at)?\s*(?:\[\s*(\d+)\s*\]|(\d+)(?=\s))", re.IGNORECASE)
+NUCLIDE = re.compile(r"^(\d*)([a-z]{1,2})$", re.IGNORECASE)
+PARAMETER = re.compile(r"\s*=\s*")
+
+# Avogadro constant in 1e24/mol, for conversion of atomic density
+AVOGADRO = 0.602214076
+
+
+@lru_cache(maxsize=None)
+def atomic_numbers():
+	"""
+	Get atomic numbers by element symbol
+
+	:return: dictionary {symbol: Z}
+	"""
+	return {s: z for z, s in enumerate(periodic_table()["symbol"]) if s}
+
+
+def number(text: str):
+	"""
+	Convert PHITS number to int if possible, else to float
+
+	:param text: string with number (Fortran exponent D is allowed)
+	:return: int or float
+	"""
+	try:
+		return int(text)
+	except ValueError:
+		return float(text.replace("D", "E").replace("d", "e"))
+
+
+def split_entries(stream):
+	"""
+	Split PHITS input into entries in single pass: lines of sections are
+	joined with continuation lines (5 or more leading spaces), comments are
+	removed, names from "$ name: '...'" comments are kept
+
+	:param stream: text stream with PHITS input
+	:return: generator of (section, text, name) tuples, section in lower case
+	"""
+	section, text, name = None, None, None
+	for line in stream:
+		match = SECTION.match(line)
+		if match:
+			if text is not None:
+				yield section, text, name
+			section = None if match.group(2) else match.group(1).lower()
+			section = section and " ".join(section.split())
+			text, name = None, None
+			continue
+		if section is None or COMMENT_LINE.match(line):
+			continue
+
+		data = line.partition("$")[0]
+		match = NAME.search(line)
+		if section == "mat name color":
+			continuation = False
+		elif section == "material":
+			continuation = not MATERIAL_START.match(data)
+		else:
+			continuation = len(line) - len(line.lstrip(" ")) >= 5
+		if not data.strip():
+			if text is not None and match and name is None:
+				name = match.group(1)
+			continue
+
+		if continuation and text is not None:
+			text += " " + data.strip()
+		else:
+			if text is not None:
+				yield section, text, name
+			text, name = data.strip(), None
+		if match and name is None:
+			name = match.group(1)
+	if text is not None:
+		yield section, text, name
+
+
+def parse_element(token: str):
+	"""
+	Parse nuclide token of [ Material ] section: "H", "1H" or "1001"
+
+	:param token: string with nuclide
+	:return: tuple (A, Z), A = 0 for natural element
+	"""
+	token = token.split(".")[0]  # Library suffix
+	if token.isdigit():  # ZZZAAA format
+		return int(token) % 1000, int(token) // 1000
+	match = NUCLIDE.match(token)
+	if not match:
+		raise ValueError(f"Incorrect nuclide '{token}' in [ Material ]!")
+	symbol = match.group(2).capitalize()
+	elements = atomic_numbers()
+	if symbol not in elements:
+		raise ValueError(f"Unknown element '{symbol}' in [ Material ]!")
+	return int(match.group(1) or 0), elements[symbol]
+
+
+def parse_material(text: str, name):
+	"""
+	Parse [ Material ] entry
+
+	:param text: entry text
+	:param name: material name from comment or None
+	:return: dictionary with parameters of Material (matn from input)
+	"""
+	match = MATERIAL_START.match(text)
+	matn = int(match.group(1) or match.group(2))
+	tokens = PARAMETER.sub("=", text[match.end():]).split()
+
+	elements, gas, mass = [], False, False
+	quantities = [t for t in tokens if "=" not in t]
+	for t in tokens:
+		if t.upper().startswith("GAS="):
+			gas = t[4:] == "1"
+	for nuclide, quantity in zip(quantities[::2], quantities[1::2]):
+		a, z = parse_element(nuclide)
+		quantity = number(quantity)
+		mass = mass or quantity < 0
+		elements.append([a, z, abs(quantity)])
+
+	ratio_type = "mass" if mass else "atomic"
+	name = f"mat{matn}" if name is None else name
+	return dict(
+		elements=elements, name=name, ratio_type=ratio_type, gas=gas, matn=matn)
+
+
+def atomic_to_mass_density(elements: list, ratio_type: str, density: float):
+	"""
+	Convert atomic density (1e24 atoms/cm^3) of material to g/cm^3
+
+	:param elements: elements of material in [[A1, Z1, Q1], ...] format
+	:param ratio_type: type of ratio: "atomic" or "mass"
+	:param density: atomic density in 1e24 atoms/cm^3
+	:return: float density in g/cm^3
+	"""
+	weights = periodic_table()["atomic_weight"]
+	weights = [a if a else weights[z] for a, z, _ in elements]
+	q = [e[2] for e in elements]
+	if ratio_type == "mass":
+		molar_mass = sum(q) / sum(w / m for w, m in zip(q, weights))
+	else:
+		molar_mass = sum(w * m for w, m in zip(q, weights)) / sum(q)
+	return density * molar_mass / AVOGADRO
+
+
+def parse_surface(text: str, name):
+	"""
+	Parse [ Surface ] entry
+
+	:param text: entry text
+	:param name: surface name from comment or None
+	:return: surface object
+	"""
+	tokens = text.split()
+	sn, trn = int(tokens[0]), ""
+	if tokens[1][0].isdigit():
+		trn, tokens = tokens[1], tokens[:1] + tokens[2:]
+	symbol = tokens[1].upper()
+	v = [number(t) for t in tokens[2:]]
+	kwargs = {} if name is None else {"name": name}
+
+	if symbol == "P":
+		s = P(*v[:4], trn=trn, **kwargs)
+	elif symbol in ("PX", "PY", "PZ"):
+		s = P(d=v[0], trn=trn, vert=symbol[1].lower(), **kwargs)
+	elif symbol in ("SPH", "S"):
+		s = SPH(v[:3], v[3], trn=trn, **kwargs)
+	elif symbol == "SO":
+		s = SPH([0, 0, 0], v[0], trn=trn, **kwargs)
+	elif symbol in ("SX", "SY", "SZ"):
+		xyz0 = [0, 0, 0]
+		xyz0["XYZ".index(symbol[1])] = v[0]
+		s = SPH(xyz0, v[1], trn=trn, **kwargs)
+	elif symbol == "BOX":
+		s = BOX(v[:3], v[3:6], v[6:9], v[9:12], trn=trn, **kwargs)
+	elif symbol == "RPP":
+		s = RPP(v[:2], v[2:4], v[4:6], trn=trn, **kwargs)
+	elif symbol == "RCC":
+		s = RCC(v[:3], v[3:6], v[6], trn=trn, **kwargs)
+	elif symbol == "TRC":
+		s = TRC(v[:3], v[3:6], v[6], v[7], trn=trn, **kwargs)
+	elif symbol in ("TX", "TY", "TZ"):
+		s = T(v[:3], *v[3:6], trn=trn, rot=symbol[1].lower(), **kwargs)
+	elif symbol == "REC":
+		s = REC(v[:3], v[3:6], v[6:9], v[9:12], trn=trn, **kwargs)
+	elif symbol == "WED":
+		s = WED(v[:3], v[3:6], v[6:9], v[9:12], trn=trn, **kwargs)
+	else:
+		raise ValueError(f"Surface '{symbol}' (sn {sn}) is not supported!")
+	s.sn = sn
+	return s
+
+
+def split_cell_def(text: str):
+	"""
+	Split PHITS cell definition into FitsGeo cell_def list: top-level regions
+	in parentheses with " ", ":" and "#" operators between them, otherwise the
+	whole definition is one region
+
+	:param text: cell definition string
+	:return: list with regions and operators
+	"""
+	cell_def, depth, start, between = [], 0, 0, ""
+	for i, char in enumerate(text):
+		if char == "(":
+			if depth == 0:
+				if cell_def:
+					cell_def.append(":" if ":" in between else " ")
+				if between.strip().endswith("#"):
+					cell_def.append("#")
+				start = i + 1
+			depth += 1
+		elif char == ")":
+			depth -= 1
+			if depth == 0:
+				cell_def.append(" ".join(text[start:i].split()) + " ")
+				between = ""
+		elif depth == 0:
+			between += char
+			if char not in " :#":
+				return [" ".join(text.split()) + " "]
+	if depth != 0 or between.strip():
+		return [" ".join(text.split()) + " "]
+	return cell_def
+
+
+def parse_fill(text: str, cn: int):
+	"""
+	Parse FILL= parameter of cell: one universe number or index ranges of
+	lattice elements "i1:i2 j1:j2 k1:k2" with universe numbers (i fastest)
+
+	:param text: parameter value
+	:param cn: cell number for error messages
+	:return: tuple (universe number or numpy.ndarray [i, j, k], lower indexes)
+	"""
+	tokens = text.split()
+	try:
+		if len(tokens) == 1:
+			return int(tokens[0]), (0, 0, 0)
+		ranges = [tuple(int(i) for i in r.split(":")) for r in tokens[:3]]
+		shape = [stop - start + 1 for start, stop in ranges]
+		fill = np.array([int(u) for u in tokens[3:]]).reshape(shape[::-1])
+	except ValueError:
+		raise ValueError(
+			f"FILL={text} (cell {cn}) is not supported!") from None
+	return fill.transpose(2, 1, 0), tuple(r[0] for r in ranges)
+
+
+def parse_cell(text: str, name, materials: dict):
+	"""
+	Parse [ Cell ] entry
+
+	:param text: entry text
+	:param name: cell name from comment or None
+	:param materials: dictionary {matn: Material}
+	:return: Cell object (density is read by cell_densities)
+	"""
+	tokens = PARAMETER.sub("=", text).split()
+	cn = int(tokens[0])
+	if tokens[1].upper() == "LIKE":
+		raise ValueError(f"LIKE n BUT cells (cell {cn}) are not supported!")
+	matn = int(tokens[1])
+	if matn not in materials:
+		raise ValueError(f"Material {matn} of cell {cn} is not defined!")
+	rest = tokens[3:] if matn > 0 else tokens[2:]  # Without density
+
+	first = next((i for i, t in enumerate(rest) if "=" in t), len(rest))
+	parameters = {}
+	for t in rest[first:]:
+		if "=" in t:
+			key, _, value = t.partition("=")
+			parameters[key.upper()] = value
+		else:  # Parameters with several values
+			parameters[key.upper()] += " " + t
+
+	cell = Cell(
+		split_cell_def(" ".join(rest[:first])),
+		name="Cell" if name is None else name, material=materials[matn])
+	if "VOL" in parameters:
+		cell.volume = number(parameters["VOL"])
+	if "U" in parameters:
+		cell.u = int(parameters["U"])
+	if "LAT" in parameters:
+		cell.lat = int(parameters["LAT"])
+	if "FILL" in parameters:
+		cell.fill, cell.fill_start = parse_fill(parameters["FILL"], cn)
+	cell.cn = cn
+	return cell
+
+
+def phits_read(stream, clear=True, geometry=None):
+	"""
+	Read [ Surface ], [ Cell ], [ Material ] and [ Mat Name Color ] sections
+	of PHITS input from text stream and rebuild FitsGeo objects with original
+	numbers (sn, cn, matn) and names from "$ name: '...'" comments. Numbers
+	must not be used by other objects of geometry, numbers of new objects
+	follow imported ones. Materials with numbers of predefined materials get
+	new numbers, unless they are equal to predefined materials
+
+	:param stream: text stream with PHITS input
+	:param clear: if True remove all objects of geometry (except predefined
+		materials) before reading
+	:param geometry: Geometry object to read into (current geometry by default)
+	:return: tuple of lists (surfaces, cells, materials) with read objects
+	"""
+	geometry = current_geometry(geometry)
+	if clear:
+		geometry.clear()
+	with geometry:
+		return read_entries(stream)
+
+
+def check_numbers(numbers: list, used: set, kind: str):
+	"""
+	Check that numbers of imported objects are unique and are not used by
+	objects of geometry
+
+	:param numbers: list of numbers of imported objects
+	:param used: set of numbers of objects of geometry
+	:param kind: kind of objects for error message
+	"""
+	used = set(used)
+	for n in numbers:
+		if n in used:
+			raise ValueError(f"{kind} number {n} is already defined!")
+		used.add(n)
+
+
+def reserve_numbers(entries: dict, geometry):
+	"""
+	Check numbers of surface and cell entries before any object is created:
+	numbers must be unique and not used in geometry
+
+	:param entries: dictionary {section: list of (text, name)}
+	:param geometry: Geometry object to read into
+	:return: tuple of lists with numbers (sn, cn) of entries
+	"""
+	sn = [int(text.split()[0]) for text, _ in entries["surface"]]
+	cn = [int(text.split()[0]) for text, _ in entries["cell"]]
+	used_sn = set()
+	for s in geometry.surfaces:
+		used_sn.update(range(s.sn, s.sn + len(s)) if isinstance(
+			s, SurfaceArray) else [s.sn])
+	check_numbers(sn, used_sn, "Surface")
+	check_numbers(cn, {c.cn for c in geometry.cells}, "Cell")
+	return sn, cn
+
+
+def cell_densities(entries: list):
+	"""
+	Get densities of materials from cell entries: material has one density,
+	the first cell with material defines it
+
+	:param entries: list of (text, name) of [ Cell ] entries
+	:return: dictionary {matn: density from cell definition}
+	"""
+	densities = {}
+	for text, _ in entries:
+		tokens = PARAMETER.sub("=", text).split()
+		if len(tokens) > 2 and tokens[1].isdigit() and int(tokens[1]) > 0:
+			densities.setdefault(int(tokens[1]), number(tokens[2]))
+	return densities
+
+
+def read_materials(entries: dict, geometry):
+	"""
+	Create materials of [ Material ] entries with densities from cells.
+	Material equal to predefined material with the same number (e.g. water
+	exported by FitsGeo as mat[1]) is read as predefined material, other
+	materials with numbers of predefined materials get new numbers
+
+	:param entries: dictionary {section: list of (text, name)}
+	:param geometry: Geometry object to read into
+	:return: dictionary {matn from input: Material}
+	"""
+	parameters = [parse_material(*e) for e in entries["material"]]
+	densities = cell_densities(entries["cell"])
+	for p in parameters:
+		density = densities.get(p["matn"])
+		if density is None:
+			continue
+		if density > 0:  # Atomic density
+			density = atomic_to_mass_density(
+				p["elements"], p["ratio_type"], density)
+		p["density"] = abs(density)
+
+	predefined = {m.matn: m for m in PREDEFINED_MATERIALS}
+	check_numbers(
+		[p["matn"] for p in parameters],
+		{m.matn for m in geometry.materials if m not in PREDEFINED_MATERIALS},
+		"Material")
+	free = max(
+		[m.matn for m in geometry.materials] + [p["matn"] for p in parameters],
+		default=0) + 1
+
+	materials = {}
+	for p in parameters:
+		m = predefined.get(p["matn"])
+		if m is None:
+			materials[p["matn"]] = Material(**p)
+		elif p["elements"] == m.elements and p["ratio_type"] == m.ratio_type \
+				and p["gas"] == m.gas and p["name"] == m.name and \
+				np.isclose(p.get("density", m.density), m.density):
+			materials[p["matn"]] = m
+		else:
+			materials[p["matn"]] = Material(**dict(p, matn=free))
+			free += 1
+	return materials
+
+
+def read_entries(stream):
+	"""
+	Read entries of PHITS input and create objects in current geometry,
+	counters of geometry are moved past imported numbers
+
+	:param stream: text stream with PHITS input
+	:return: tuple of lists (surfaces, cells, materials) with read objects
+	"""
+	entries = {
+		"surface": [], "cell": [], "material": [], "mat name color": []}
+	for section, text, name in split_entries(stream):
+		if section in entries:
+			entries[section].append((text, name))
+	geometry = current_geometry()
+	sn, cn = reserve_numbers(entries, geometry)
+
+	by_matn = read_materials(entries, geometry)
+	materials = list(by_matn.values())
+	for text, _ in entries["mat name color"]:
+		tokens = text.split()
+		if not tokens[0].isdigit() or int(tokens[0]) not in by_matn:
+			continue  # Header line or unknown material
+		material = by_matn[int(tokens[0])]
+		if material in PREDEFINED_MATERIALS:
+			continue  # Predefined materials are shared by all geometries
+		if material.name == f"mat{tokens[0]}" and len(tokens) > 1:
+			material.name = tokens[1].strip("{}") \
+				.replace("\\_", "_").replace("\\(", "(").replace("\\)", ")")
+		color = " ".join(tokens[3:])
+		if color in ANGEL_COLORS:
+			material.color = color
+
+	surfaces = [parse_surface(*e) for e in entries["surface"]]
+	by_matn.update({MAT_OUTER.matn: MAT_OUTER, MAT_VOID.matn: MAT_VOID})
+	cells = [parse_cell(text, name, by_matn) for text, name in entries["cell"]]
+
+	# Surfaces get materials of cells using them as inner side (for drawing)
+	by_sn = {s.sn: s for s in surfaces}
+	for cell in reversed(cells):
+		if cell.material.matn < 1:
+			continue
+		for region in cell.cell_def:
+			region = region.strip()
+			if region[:1] == "-" and region[1:].isdigit() and \
+					int(region[1:]) in by_sn:
+				surface = by_sn[int(region[1:])]
+				surface.material = cell.material  # Color follows material
+
+	for counter, numbers in zip(
+			(geometry.surface_counter, geometry.cell_counter,
+				geometry.material_counter),
+			(sn, cn, [m.matn for m in materials])):
+		counter.skip(max(numbers, default=0))
+	return surfaces, cells, materials
+
+
+def phits_import(inp_name: str, clear=True, geometry=None):
+	"""
+	Import geometry from PHITS input file, see phits_read
+
+	:param inp_name: path to PHITS input file
+	:param clear: if True remove all objects of geometry (except predefined
+		materials) before import
+	:param geometry: Geometry object to import into (current geometry by default)
+	:return: tuple of lists (surfaces, cells, materials) with imported objects
+	"""
+	with open(inp_name, "r", encoding="utf-8") as f:
+		return phits_read(f, clear, geometry)
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
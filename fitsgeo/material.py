@@ -1,44 +1,208 @@
-import pkg_resources
-import itertools
-import pandas as pd
+import os
+import pickle
+import numpy as np
 from random import choice
 
 from .const import ANGEL_COLORS
-
-
-# Counter for objects, every new object will have n+1 material number
-material_counter = itertools.count(1)
-
-created_materials = []  # All objects after initialisation go here
-
-
-# Periodic table database
-DF_PTABLE = pd.read_csv(
-	pkg_resources.resource_filename("fitsgeo", "data/PTABLE.dat"),
-	sep="\t", comment="#",
-	names=[
-		"symbol", "name", "atomic_number",
-		"atomic_weight", "density", "description"])
-
-# Database for single materials from Periodic Table
-DF_PT = pd.read_csv(
-	pkg_resources.resource_filename("fitsgeo", "data/PTDATABASE.dat"),
-	sep="\t", comment="#")
-
-# Database adopted from SRIM
-DF_S = pd.read_csv(
-	pkg_resources.resource_filename("fitsgeo", "data/SDATABASE.dat"),
-	sep="\t", comment="#")
-
-# Database adopted from GEANT4
-DF_G = pd.read_csv(
-	pkg_resources.resource_filename("fitsgeo", "data/GDATABASE.dat"),
-	sep="\t", comment="#")
-
-MAT_DB = pd.concat([DF_PT, DF_S, DF_G])
-# To avoid duplicates
-MAT_DB = MAT_DB.drop_duplicates(subset="Name").reset_index(drop=True)
-# print(MAT_DB)
+from .geometry import DEFAULT_GEOMETRY, current_geometry
+
+
+# Counter for objects of default geometry, every new object will have n+1
+# material number (every Geometry has its own counter)
+material_counter = DEFAULT_GEOMETRY.material_counter
+
+# All objects of default geometry after initialisation go here
+created_materials = DEFAULT_GEOMETRY.materials
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+# Periodic table and material databases: Periodic Table, SRIM and GEANT4
+PTABLE_FILE = "PTABLE.dat"
+DATABASE_FILES = ("PTDATABASE.dat", "SDATABASE.dat", "GDATABASE.dat")
+PTABLE_COLUMNS = [
+	"symbol", "name", "atomic_number", "atomic_weight", "density", "description"]
+
+# Binary cache of databases, rebuilt when any source file changes
+CACHE_NAME = "databases.pkl"
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(
+	os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+	"fitsgeo")
+
+DATABASES = None  # Loaded databases, see load_databases
+PTABLE = None  # Periodic table arrays, see periodic_table
+
+
+def cache_key():
+	"""
+	Get key for databases cache: modification times and sizes of source files
+
+	:return: tuple with cache version and (file, mtime, size) for every file
+	"""
+	key = [CACHE_VERSION]
+	for file in (PTABLE_FILE,) + DATABASE_FILES:
+		stat = os.stat(os.path.join(DATA_DIR, file))
+		key.append((file, stat.st_mtime_ns, stat.st_size))
+	return tuple(key)
+
+
+def build_databases():
+	"""
+	Read databases from source files with pandas, duplicates of materials
+	are removed (first one is kept)
+
+	:return: dictionary with "ptable" and "materials" databases as
+		{column: list of values} dictionaries
+	"""
+	import pandas as pd
+
+	ptable = pd.read_csv(
+		os.path.join(DATA_DIR, PTABLE_FILE),
+		sep="\t", comment="#", names=PTABLE_COLUMNS)
+	materials = pd.concat([
+		pd.read_csv(os.path.join(DATA_DIR, file), sep="\t", comment="#")
+		for file in DATABASE_FILES])
+	# To avoid duplicates
+	materials = materials.drop_duplicates(subset="Name").reset_index(drop=True)
+	materials = materials.to_dict("list")
+	return {
+		"ptable": ptable.to_dict("list"),
+		"materials": materials,
+		"index": build_index(materials)}
+
+
+def build_index(materials: dict):
+	"""
+	Build name index of materials database with parsed formulas
+
+	:param materials: materials database as {column: list of values}
+	:return: dictionary {name: (elements, density, ratio_type)}, where
+		elements is tuple of (A, Z, Q) tuples
+	"""
+	index = {}
+	for name, n, density, formula in zip(
+			materials["Name"], materials["N"],
+			materials["Density(g/cm^3)"], materials["Formula (Z Q)"]):
+		formula = formula.split()
+		elements = tuple(
+			(0, int(formula[i]), float(formula[i + 1]))
+			for i in range(0, int(n) * 2, 2))
+
+		# If total of ratios will be greater than 1.0 it is atomic
+		total_sum = sum(e[2] for e in elements)
+		if total_sum > 1.0 or total_sum == 1.0 and int(n) == 1:
+			ratio_type = "atomic"
+		else:
+			ratio_type = "mass"
+		index[name] = (elements, float(density), ratio_type)
+	return index
+
+
+def load_databases():
+	"""
+	Load databases on first use: from binary cache in user cache directory
+	if it is up to date, otherwise from source files (cache is rebuilt,
+	package directory is never written)
+
+	:return: dictionary with "ptable" and "materials" databases as
+		{column: list of values} dictionaries
+	"""
+	global DATABASES
+	if DATABASES is not None:
+		return DATABASES
+
+	key = cache_key()
+	path = os.path.join(CACHE_DIR, CACHE_NAME)
+	try:
+		with open(path, "rb") as f:
+			cache = pickle.load(f)
+		if cache["key"] == key:
+			DATABASES = cache["databases"]
+			return DATABASES
+	except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+		pass  # Missing or broken cache
+
+	DATABASES = build_databases()
+	try:
+		os.makedirs(CACHE_DIR, exist_ok=True)
+		# Write to temporary file first, so other processes never read
+		# partially written cache
+		temporary = f"{path}.{os.getpid()}.tmp"
+		with open(temporary, "wb") as f:
+			pickle.dump(
+				{"key": key, "databases": DATABASES}, f,
+				protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(temporary, path)
+	except OSError:  # Cache is optional
+		pass
+	return DATABASES
+
+
+def periodic_table():
+	"""
+	Get periodic table as NumPy arrays indexed by atomic number Z
+	(index 0 is empty: "" symbol and nan for numbers)
+
+	:return: dictionary with "symbol", "atomic_weight" and "density" arrays
+	"""
+	global PTABLE
+	if PTABLE is None:
+		ptable = load_databases()["ptable"]
+		size = max(ptable["atomic_number"]) + 1
+		PTABLE = {
+			"symbol": np.full(size, "", dtype=object),
+			"atomic_weight": np.full(size, np.nan),
+			"density": np.full(size, np.nan)}
+		for column, array in PTABLE.items():
+			array[ptable["atomic_number"]] = ptable[column]
+		PTABLE["symbol"] = PTABLE["symbol"].astype(str)
+	return PTABLE
+
+
+def phits_print_materials(materials: list):
+	"""
+	Get PHITS definitions of materials, symbols of all elements of all
+	materials are taken at once from periodic table arrays
+
+	:param materials: list of materials
+	:return: list of strings with PHITS definitions ("" for void and outer)
+	"""
+	materials = list(materials)
+	defined = [m for m in materials if m.matn >= 1]
+	elements = [e for m in defined for e in m.elements]
+	offsets = np.cumsum([0] + [len(m.elements) for m in defined]).tolist()
+
+	# Symbols of all elements with one lookup in periodic table array
+	z = np.fromiter((e[1] for e in elements), dtype=int, count=len(elements))
+	symbols = periodic_table()["symbol"][z].tolist()
+	signs = [
+		"" if m.ratio_type == "atomic" else "-"
+		for m in defined for _ in m.elements]
+	text_elrat = [
+		f"{'' if e[0] == 0 else e[0]}{el} {sign}{e[2]} "
+		for e, el, sign in zip(elements, symbols, signs)]
+
+	txt = {}
+	for i, m in enumerate(defined):
+		gas = "GAS=1" if m.gas else "GAS=0"
+		elrat = "".join(text_elrat[offsets[i]:offsets[i + 1]])
+		txt[id(m)] = f"    mat[{m.matn}] {elrat} {gas} $ name: '{m.name}'"
+	return [txt.get(id(m), "") for m in materials]
+
+
+def __getattr__(name: str):
+	"""
+	Lazy access to databases as pandas.DataFrame: DF_PTABLE (periodic table)
+	and MAT_DB (all materials), data frames are created on first access
+
+	:param name: name of module attribute
+	:return: pandas.DataFrame
+	"""
+	if name in ("DF_PTABLE", "MAT_DB"):
+		import pandas as pd
+		database = "ptable" if name == "DF_PTABLE" else "materials"
+		globals()[name] = pd.DataFrame(load_databases()[database])
+		return globals()[name]
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def list_all_materials():
@@ -46,7 +210,7 @@ def list_all_materials():
 	print("List with all available materials:")
 	text += "List with all available materials:\n"
 	i = 1
-	for name in MAT_DB["Name"].tolist():
+	for name in load_databases()["materials"]["Name"]:
 		print(f"{i}\t-\t'{name}'")
 		text += f"{i}\t-\t'{name}'\n"
 		i += 1
@@ -83,11 +247,12 @@ class Material:
 		self.gas = gas
 		self.color = color
 
+		geometry = current_geometry()
 		if matn is None:
-			self.matn = next(material_counter)
+			self.matn = next(geometry.material_counter)
 		else:
 			self.matn = matn
-		created_materials.append(self)
+		geometry.materials.append(self)
 
 	@classmethod
 	def database(
@@ -103,33 +268,45 @@ class Material:
 		if color is None:
 			color = choice(list(ANGEL_COLORS.keys()))
 
-		row_id = MAT_DB.index[MAT_DB["Name"] == name].tolist()
-
-		if row_id:  # If row_id not empty
-			n = int(MAT_DB.iloc[row_id[0]]["N"])
-			density = float(MAT_DB.iloc[row_id[0]]["Density(g/cm^3)"])
-			formula = MAT_DB.iloc[row_id[0]]["Formula (Z Q)"].split()
-
-			elements =\
-				[
-					[
-						0, int(formula[i]),
-						float(formula[i+1])] for i in range(0, n*2, 2)]
-
-			# Sum all ratios
-			total_sum = 0
-			for i in range(n):
-				total_sum += elements[i][2]
+		record = load_databases()["index"].get(name)
+		if record is None:
+			raise NameError(f"No '{name}' name in database!\nPlease try again!")
+		elements, density, ratio_type = record
+		return cls(
+			[list(e) for e in elements], name, ratio_type, density, gas, color)
 
-			# If total will be greater than 1.0 it is atomic
-			if total_sum > 1.0 or total_sum == 1.0 and n == 1:
-				ratio_type = "atomic"
-			else:
-				ratio_type = "mass"
+	@classmethod
+	def database_many(cls, names: list, gas=False, color=None):
+		"""
+		Initialize many materials from databases at once
 
-			return cls(elements, name, ratio_type, density, gas, color)
-		else:
-			raise NameError(f"No '{name}' name in database!\nPlease try again!")
+		:param names: list with names of materials from databases
+		:param gas: True if gas (False by default), or list of flags
+		:param color: one of colors for material visualization via ANGEL
+			(random by default), or list of colors
+		:return: list of Material objects
+		"""
+		index = load_databases()["index"]
+		missing = [name for name in names if name not in index]
+		if missing:
+			raise NameError(
+				f"No {', '.join(repr(n) for n in missing)} " +
+				"names in database!\nPlease try again!")
+
+		n = len(names)
+		gases = gas if isinstance(gas, (list, tuple)) else [gas] * n
+		colors = color if isinstance(color, (list, tuple)) else [color] * n
+		if len(gases) != n or len(colors) != n:
+			raise ValueError("gas and color lists must have length of names!")
+
+		keys = list(ANGEL_COLORS.keys())
+		materials = []
+		for name, gas, color in zip(names, gases, colors):
+			elements, density, ratio_type = index[name]
+			materials.append(cls(
+				[list(e) for e in elements], name, ratio_type, density, gas,
+				choice(keys) if color is None else color))
+		return materials
 
 	@property
 	def elements(self):
@@ -245,38 +422,18 @@ class Material:
 
 		:return: string with PHITS definition
 		"""
-		if self.matn < 1:
-			return ""
-		else:
-			gas = "GAS=0"
-			if self.gas:
-				gas = "GAS=1"
-
-			text_elrat = ""
-			a, el, q = [], [], []
-			for element in self.elements:
-				if element[0] == 0:
-					a.append("")
-				else:
-					a.append(element[0])
-				el.append(DF_PTABLE.iloc[element[1] - 1]["symbol"])
-				q.append(element[2])
-
-			if self.ratio_type == "atomic":
-				for i in range(len(self.elements)):
-					text_elrat += "".join(f"{a[i]}{el[i]} {q[i]} ")
-			else:
-				for i in range(len(self.elements)):
-					text_elrat += "".join(f"{a[i]}{el[i]} -{q[i]} ")
-
-			txt = f"    mat[{self.matn}] {text_elrat} {gas} $ name: '{self.name}'"
-			return txt
+		return phits_print_materials([self])[0]
 
 
 # Pre-defined materials as constants for default surface material
 MAT_OUTER = Material([], matn=-1)  # Special material for outer void
 MAT_VOID = Material([], matn=0, color="gray")  # Special material for void
-MAT_WATER = Material.database("MAT_WATER", color="blue")
+# Water is defined here as in databases, so import doesn't load them
+MAT_WATER = Material(
+	[[0, 1, 2.0], [0, 8, 1.0]], "MAT_WATER", "atomic", 1.0, color="blue")
+
+# Predefined materials are shared by all geometries
+PREDEFINED_MATERIALS = [MAT_OUTER, MAT_VOID, MAT_WATER]
 
 
 if __name__ == "__main__":
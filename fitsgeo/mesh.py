@@ -0,0 +1,584 @@
+import functools
+import itertools
+import json
+import os
+import struct
+import numpy as np
+
+from .const import ANGEL_COLORS, as_rgb
+from .geometry import current_geometry
+
+# Surfaces tessellated and written at once
+CHUNK_SIZE = 1000
+
+
+def orient_outward(points, faces):
+	"""
+	Orient triangles of convex mesh counterclockwise when viewed from outside
+	(normals point outward from centroid)
+
+	:param points: numpy.ndarray with vertices (V, 3)
+	:param faces: numpy.ndarray with vertex indexes of triangles (F, 3)
+	:return: numpy.ndarray with oriented faces
+	"""
+	faces = np.asarray(faces)
+	v0, v1, v2 = points[faces[:, 0]], points[faces[:, 1]], points[faces[:, 2]]
+	normals = np.cross(v1 - v0, v2 - v0)
+	inward = np.einsum("ij,ij->i", normals, v0 - points.mean(axis=0)) < 0
+	faces[inward] = faces[inward][:, ::-1]
+	return faces
+
+
+def ring_faces(first: int, segments: int):
+	"""
+	Get triangles of band between two rings of vertices
+
+	:param first: index of the first vertex of the first ring, the second
+		ring follows it
+	:param segments: number of vertices in ring
+	:return: numpy.ndarray with faces (2 * segments, 3)
+	"""
+	i = np.arange(segments)
+	j = (i + 1) % segments
+	a, b = first + i, first + j
+	c, d = first + segments + j, first + segments + i
+	return np.concatenate([np.column_stack([a, b, c]), np.column_stack([a, c, d])])
+
+
+def fan_faces(center: int, first: int, segments: int):
+	"""
+	Get triangles of fan from center vertex to ring of vertices
+
+	:param center: index of center vertex
+	:param first: index of the first vertex of ring
+	:param segments: number of vertices in ring
+	:return: numpy.ndarray with faces (segments, 3)
+	"""
+	i = np.arange(segments)
+	return np.column_stack(
+		[np.full(segments, center), first + (i + 1) % segments, first + i])
+
+
+@functools.lru_cache()
+def box_template():
+	"""
+	Get template of box (parallelepiped): vertices are coefficients of
+	vectors [xyz0, a, b, c]
+
+	:return: tuple (coefficients (8, 4), faces (12, 3))
+	"""
+	corners = np.array(list(itertools.product([0, 1], repeat=3)))[:, ::-1]
+	coefficients = np.column_stack([np.ones(8), corners])
+	quads = []
+	for axis in range(3):
+		for side in (0, 1):
+			quad = [i for i in range(8) if corners[i, axis] == side]
+			quads.append([quad[0], quad[1], quad[3]])
+			quads.append([quad[0], quad[3], quad[2]])
+	return coefficients, orient_outward(corners.astype(float), quads)
+
+
+@functools.lru_cache()
+def wedge_template():
+	"""
+	Get template of wedge: vertices are coefficients of vectors
+	[xyz0, a, b, h]
+
+	:return: tuple (coefficients (6, 4), faces (8, 3))
+	"""
+	points = np.array([
+		[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [0, 1, 1]])
+	faces = [
+		[0, 1, 2], [3, 4, 5],  # Triangles
+		[0, 1, 4], [0, 4, 3], [1, 2, 5], [1, 5, 4], [2, 0, 3], [2, 3, 5]]
+	coefficients = np.column_stack([np.ones(6), points])
+	return coefficients, orient_outward(points.astype(float), faces)
+
+
+@functools.lru_cache()
+def cylinder_template(segments: int):
+	"""
+	Get template of elliptical frustum: vertices are coefficients of
+	vectors [xyz0, h, a_1, b_1, a_2, b_2], where a, b are semi-axes of
+	bottom (1) and top (2) ellipses
+
+	:param segments: number of segments of ellipses
+	:return: tuple (coefficients (2 * segments + 2, 6), faces)
+	"""
+	phi = 2 * np.pi * np.arange(segments) / segments
+	cos, sin, zeros = np.cos(phi), np.sin(phi), np.zeros(segments)
+	ones = np.ones(segments)
+	coefficients = np.concatenate([
+		np.column_stack([ones, zeros, cos, sin, zeros, zeros]),  # Bottom
+		np.column_stack([ones, ones, zeros, zeros, cos, sin]),  # Top
+		[[1, 0, 0, 0, 0, 0], [1, 1, 0, 0, 0, 0]]])  # Centers
+	faces = np.concatenate([
+		ring_faces(0, segments),
+		fan_faces(2 * segments, 0, segments),
+		fan_faces(2 * segments + 1, segments, segments)])
+	# Reference cylinder with unit radius along z
+	basis = np.array([[0, 0, 0], [0, 0, 1], [1, 0, 0], [0, 1, 0], [1, 0, 0], [0, 1, 0]])
+	return coefficients, orient_outward(coefficients @ basis, faces)
+
+
+@functools.lru_cache()
+def sphere_template(segments: int):
+	"""
+	Get template of unit sphere: vertices on rings of latitude
+
+	:param segments: number of segments of rings, sphere has segments // 2
+		rings of latitude
+	:return: tuple (vertices, faces)
+	"""
+	rings = max(2, segments // 2)
+	theta = np.pi * np.arange(1, rings) / rings
+	phi = 2 * np.pi * np.arange(segments) / segments
+	sin_theta = np.sin(theta)[:, None]
+	vertices = np.concatenate([
+		np.stack([
+			sin_theta * np.cos(phi), sin_theta * np.sin(phi),
+			np.broadcast_to(np.cos(theta)[:, None], (rings - 1, segments))],
+			axis=-1).reshape(-1, 3),
+		[[0, 0, 1], [0, 0, -1]]])  # Poles
+	last = (rings - 2) * segments  # First vertex of the last ring
+	faces = np.concatenate(
+		[ring_faces(k * segments, segments) for k in range(rings - 2)] + [
+			fan_faces(len(vertices) - 2, 0, segments),
+			fan_faces(len(vertices) - 1, last, segments)])
+	return vertices, orient_outward(vertices, faces)
+
+
+@functools.lru_cache()
+def torus_template(segments: int):
+	"""
+	Get template of torus: angles of vertices along axis circle (u) and
+	along tube (v)
+
+	:param segments: number of segments of axis circle, tube has
+		segments // 2 segments
+	:return: tuple (u, v, faces)
+	"""
+	tube = max(3, segments // 2)
+	u = np.repeat(2 * np.pi * np.arange(segments) / segments, tube)
+	v = np.tile(2 * np.pi * np.arange(tube) / tube, segments)
+	i, k = np.divmod(np.arange(segments * tube), tube)
+	a = i * tube + k
+	b = i * tube + (k + 1) % tube
+	c = (i + 1) % segments * tube + (k + 1) % tube
+	d = (i + 1) % segments * tube + k
+	faces = np.concatenate([np.column_stack([a, c, b]), np.column_stack([a, d, c])])
+	return u, v, faces
+
+
+def template_meshes(template, basis, flip=None):
+	"""
+	Make meshes of many objects from template: vertices are linear
+	combinations of vectors of objects
+
+	:param template: tuple (coefficients (V, k), faces (F, 3))
+	:param basis: numpy.ndarray with vectors of objects (N, k, 3)
+	:param flip: numpy.ndarray (bool) with objects with reversed orientation
+		(left-handed vectors), their faces are reversed
+	:return: tuple (vertices (N * V, 3), faces (N * F, 3))
+	"""
+	coefficients, faces = template
+	basis = np.asarray(basis, dtype=float)
+	vertices = np.einsum("vk,nkd->nvd", coefficients, basis).reshape(-1, 3)
+	faces = np.broadcast_to(faces, (len(basis),) + faces.shape)
+	if flip is not None:
+		faces = np.where(flip[:, None, None], faces[:, :, ::-1], faces)
+	offsets = np.arange(len(basis)) * len(coefficients)
+	return vertices, (faces + offsets[:, None, None]).reshape(-1, 3)
+
+
+def handedness(a, b, c):
+	"""
+	Find objects with left-handed vectors
+
+	:param a: numpy.ndarray (N, 3)
+	:param b: numpy.ndarray (N, 3)
+	:param c: numpy.ndarray (N, 3)
+	:return: numpy.ndarray (bool), True where (a x b) . c < 0
+	"""
+	return np.einsum("ij,ij->i", np.cross(a, b), c) < 0
+
+
+def perpendicular_basis(h):
+	"""
+	Get unit vectors e_1, e_2 perpendicular to vectors h, (e_1, e_2, h) are
+	right-handed
+
+	:param h: numpy.ndarray (N, 3)
+	:return: tuple of numpy.ndarray (e_1, e_2) with (N, 3) shape
+	"""
+	h = np.asarray(h, dtype=float).reshape(-1, 3)
+	h = h / np.linalg.norm(h, axis=1, keepdims=True)
+	helper = np.zeros_like(h)
+	along_x = np.abs(h[:, 0]) > 0.9
+	helper[~along_x, 0] = 1
+	helper[along_x, 1] = 1
+	e_1 = np.cross(helper, h)
+	e_1 /= np.linalg.norm(e_1, axis=1, keepdims=True)
+	return e_1, np.cross(h, e_1)
+
+
+def box_meshes(xyz0, a, b, c):
+	"""
+	Make meshes of boxes (parallelepipeds) from base vertices and edge vectors
+
+	:param xyz0: numpy.ndarray with base vertices (N, 3)
+	:param a: numpy.ndarray with edge vectors (N, 3)
+	:param b: numpy.ndarray with edge vectors (N, 3)
+	:param c: numpy.ndarray with edge vectors (N, 3)
+	:return: tuple (vertices, faces)
+	"""
+	basis = np.stack(np.broadcast_arrays(xyz0, a, b, c), axis=1)
+	return template_meshes(
+		box_template(), basis, handedness(basis[:, 1], basis[:, 2], basis[:, 3]))
+
+
+def wedge_meshes(xyz0, a, b, h):
+	"""
+	Make meshes of wedges from base vertices, vectors of base triangle and
+	height vectors
+
+	:param xyz0: numpy.ndarray with base vertices (N, 3)
+	:param a: numpy.ndarray with vectors of triangle (N, 3)
+	:param b: numpy.ndarray with vectors of triangle (N, 3)
+	:param h: numpy.ndarray with height vectors (N, 3)
+	:return: tuple (vertices, faces)
+	"""
+	basis = np.stack(np.broadcast_arrays(xyz0, a, b, h), axis=1)
+	return template_meshes(
+		wedge_template(), basis,
+		handedness(basis[:, 1], basis[:, 2], basis[:, 3]))
+
+
+def cylinder_meshes(xyz0, h, a_1, b_1, a_2, b_2, segments: int):
+	"""
+	Make meshes of elliptical frustums (cylinders and truncated cones)
+
+	:param xyz0: numpy.ndarray with centers of bottom (N, 3)
+	:param h: numpy.ndarray with height vectors (N, 3)
+	:param a_1: numpy.ndarray with semi-axes of bottom ellipses (N, 3)
+	:param b_1: numpy.ndarray with semi-axes of bottom ellipses (N, 3)
+	:param a_2: numpy.ndarray with semi-axes of top ellipses (N, 3)
+	:param b_2: numpy.ndarray with semi-axes of top ellipses (N, 3)
+	:param segments: number of segments of ellipses
+	:return: tuple (vertices, faces)
+	"""
+	basis = np.stack(np.broadcast_arrays(xyz0, h, a_1, b_1, a_2, b_2), axis=1)
+	a = np.where(
+		np.any(basis[:, 2] != 0, axis=1, keepdims=True), basis[:, 2], basis[:, 4])
+	b = np.where(
+		np.any(basis[:, 3] != 0, axis=1, keepdims=True), basis[:, 3], basis[:, 5])
+	return template_meshes(
+		cylinder_template(segments), basis, handedness(a, b, basis[:, 1]))
+
+
+def circular_cylinder_meshes(xyz0, h, r_1, r_2, segments: int):
+	"""
+	Make meshes of circular cylinders and truncated cones
+
+	:param xyz0: numpy.ndarray with centers of bottom (N, 3)
+	:param h: numpy.ndarray with height vectors (N, 3)
+	:param r_1: numpy.ndarray with radii of bottom (N,)
+	:param r_2: numpy.ndarray with radii of top (N,)
+	:param segments: number of segments of circles
+	:return: tuple (vertices, faces)
+	"""
+	e_1, e_2 = perpendicular_basis(h)
+	r_1 = np.reshape(r_1, (-1, 1))
+	r_2 = np.reshape(r_2, (-1, 1))
+	return cylinder_meshes(
+		xyz0, h, r_1 * e_1, r_1 * e_2, r_2 * e_1, r_2 * e_2, segments)
+
+
+def sphere_meshes(centers, radii, segments: int):
+	"""
+	Make meshes of spheres
+
+	:param centers: numpy.ndarray with centers (N, 3)
+	:param radii: numpy.ndarray with radii (N,)
+	:param segments: number of segments of rings of latitude
+	:return: tuple (vertices, faces)
+	"""
+	vertices, faces = sphere_template(segments)
+	centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+	radii = np.broadcast_to(np.asarray(radii, dtype=float), len(centers))
+	points = centers[:, None] + radii[:, None, None] * vertices
+	offsets = np.arange(len(centers)) * len(vertices)
+	return \
+		points.reshape(-1, 3), \
+		(faces + offsets[:, None, None]).reshape(-1, 3)
+
+
+def torus_mesh(xyz0, axis, r: float, b: float, c: float, segments: int):
+	"""
+	Make mesh of elliptical torus
+
+	:param xyz0: center of torus
+	:param axis: unit vector of rotational axis
+	:param r: distance from center to center of tube (A)
+	:param b: semi-axis of tube along rotational axis (B)
+	:param c: semi-axis of tube in radial direction (C)
+	:param segments: number of segments of axis circle
+	:return: tuple (vertices, faces)
+	"""
+	u, v, faces = torus_template(segments)
+	e_1, e_2 = perpendicular_basis(axis)
+	rho = r + c * np.cos(v)
+	vertices = \
+		np.asarray(xyz0, dtype=float) + \
+		(rho * np.cos(u))[:, None] * e_1 + (rho * np.sin(u))[:, None] * e_2 + \
+		(b * np.sin(v))[:, None] * np.asarray(axis, dtype=float)
+	return vertices, faces
+
+
+def plane_mesh(normal, d: float, size: float):
+	"""
+	Make mesh of square part of plane: square is centered at the point of
+	plane closest to the origin, triangles face positive side of plane
+
+	:param normal: normal vector (A, B, C) of plane Ax + By + Cz - D = 0
+	:param d: D parameter of plane
+	:param size: half of square side
+	:return: tuple (vertices, faces)
+	"""
+	normal = np.asarray(normal, dtype=float)
+	center = normal * d / np.dot(normal, normal)
+	e_1, e_2 = perpendicular_basis(normal)
+	corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * size
+	vertices = center + corners[:, :1] * e_1 + corners[:, 1:] * e_2
+	return vertices, np.array([[0, 1, 2], [0, 2, 3]])
+
+
+def join_meshes(meshes: list):
+	"""
+	Join meshes into one mesh
+
+	:param meshes: list of tuples (vertices, faces)
+	:return: tuple (vertices, faces)
+	"""
+	if not meshes:
+		return np.empty((0, 3)), np.empty((0, 3), dtype=int)
+	offsets = np.cumsum([0] + [len(v) for v, _ in meshes[:-1]])
+	return \
+		np.concatenate([v for v, _ in meshes]), \
+		np.concatenate([f + o for (_, f), o in zip(meshes, offsets)])
+
+
+def surface_rgba(surface):
+	"""
+	Get color of surface (or surface array) with opacity
+
+	:param surface: surface object
+	:return: tuple (r, g, b, opacity) with values 0-1
+	"""
+	color = surface.color
+	if color is None:  # Surface arrays keep None for material color
+		color = ANGEL_COLORS[surface.material.color]
+	return tuple(float(x) for x in as_rgb(color)) + \
+		(float(getattr(surface, "opacity", 1.0)),)
+
+
+def mesh_surfaces(surfaces: list = None, geometry=None):
+	"""
+	Get surfaces for mesh export: all surfaces of geometry except planes
+	(planes are infinite) by default
+
+	:param surfaces: list of surfaces or None
+	:param geometry: Geometry object (current geometry by default)
+	:return: list of surfaces
+	"""
+	if surfaces is not None:
+		return list(surfaces)
+	from .surface import P  # surface module imports mesh
+	return [s for s in current_geometry(geometry).surfaces if not isinstance(s, P)]
+
+
+def color_groups(surfaces: list, segments: int):
+	"""
+	Generate meshes of surfaces grouped by color and type, surfaces of one
+	group are tessellated together in chunks of CHUNK_SIZE surfaces
+
+	:param surfaces: list of surfaces
+	:param segments: number of segments for round surfaces
+	:return: generator of (rgba, vertices, faces) tuples
+	"""
+	groups = {}
+	for s in surfaces:
+		groups.setdefault((surface_rgba(s), type(s)), []).append(s)
+	for (rgba, kind), group in groups.items():
+		for i in range(0, len(group), CHUNK_SIZE):
+			chunk = group[i:i + CHUNK_SIZE]
+			if hasattr(kind, "meshes"):
+				vertices, faces = kind.meshes(chunk, segments)
+			else:  # Surface arrays are already vectorized
+				vertices, faces = join_meshes([s.mesh(segments) for s in chunk])
+			if len(faces):
+				yield rgba, vertices, faces
+
+
+def write_stl(file_name: str, surfaces: list = None, segments=24, geometry=None):
+	"""
+	Write meshes of surfaces to binary STL file, triangles are written in
+	chunks. Color of triangle is written to attribute bytes (VisCAM/SolidView
+	convention: bit 15 is set, 5 bits for each of red, green and blue)
+
+	:param file_name: name of STL file
+	:param surfaces: list of surfaces (surfaces of geometry except planes by
+		default)
+	:param segments: number of segments for round surfaces
+	:param geometry: Geometry object (current geometry by default)
+	:return: number of triangles
+	"""
+	triangle = np.dtype([
+		("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("color", "<u2")])
+	count = 0
+	with open(file_name, "wb") as f:
+		f.write(b"FitsGeo mesh".ljust(80, b" "))
+		f.write(struct.pack("<I", 0))  # Number of triangles is written at end
+		for rgba, vertices, faces in color_groups(
+				mesh_surfaces(surfaces, geometry), segments):
+			data = np.zeros(len(faces), dtype=triangle)
+			corners = vertices[faces]
+			normals = np.cross(
+				corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+			length = np.linalg.norm(normals, axis=1, keepdims=True)
+			data["normal"] = np.divide(
+				normals, length, out=np.zeros_like(normals), where=length > 0)
+			data["vertices"] = corners
+			r, g, b = (round(x * 31) for x in rgba[:3])
+			data["color"] = 0x8000 | (r << 10) | (g << 5) | b
+			f.write(data.tobytes())
+			count += len(faces)
+		f.seek(80)
+		f.write(struct.pack("<I", count))
+	return count
+
+
+def write_obj(file_name: str, surfaces: list = None, segments=24, geometry=None):
+	"""
+	Write meshes of surfaces to Wavefront OBJ file with materials in MTL file
+	(same name with .mtl extension), every surface is a separate object
+
+	:param file_name: name of OBJ file
+	:param surfaces: list of surfaces (surfaces of geometry except planes by
+		default)
+	:param segments: number of segments for round surfaces
+	:param geometry: Geometry object (current geometry by default)
+	:return: number of triangles
+	"""
+	surfaces = mesh_surfaces(surfaces, geometry)
+	mtl_name = os.path.splitext(file_name)[0] + ".mtl"
+	colors = {}
+	count, offset = 0, 1  # OBJ indexes start from 1
+	with open(file_name, "w") as f:
+		f.write(f"# FitsGeo mesh\nmtllib {os.path.basename(mtl_name)}\n")
+		for s in surfaces:
+			vertices, faces = s.mesh(segments)
+			rgba = surface_rgba(s)
+			material = colors.setdefault(rgba, f"color{len(colors)}")
+			f.write(f"o {s.name.replace(' ', '_')}_{s.sn}\nusemtl {material}\n")
+			f.write(
+				("v {:.6g} {:.6g} {:.6g}\n" * len(vertices)).format(
+					*vertices.ravel().tolist()))
+			f.write(
+				("f {} {} {}\n" * len(faces)).format(
+					*(faces.ravel() + offset).tolist()))
+			offset += len(vertices)
+			count += len(faces)
+	with open(mtl_name, "w") as f:
+		for (r, g, b, opacity), material in colors.items():
+			f.write(
+				f"newmtl {material}\nKa {r:.4g} {g:.4g} {b:.4g}\n" +
+				f"Kd {r:.4g} {g:.4g} {b:.4g}\nd {opacity:.4g}\n\n")
+	return count
+
+
+def write_gltf(file_name: str, surfaces: list = None, segments=24, geometry=None):
+	"""
+	Write meshes of surfaces to glTF 2.0 file, binary data goes to file with
+	the same name and .bin extension. Surfaces of one color are one mesh with
+	primitives for chunks of surfaces, binary data is written chunk by chunk
+
+	:param file_name: name of glTF file
+	:param surfaces: list of surfaces (surfaces of geometry except planes by
+		default)
+	:param segments: number of segments for round surfaces
+	:param geometry: Geometry object (current geometry by default)
+	:return: number of triangles
+	"""
+	bin_name = os.path.splitext(file_name)[0] + ".bin"
+	views, accessors, materials, meshes = [], [], {}, {}
+	count, length = 0, 0
+	with open(bin_name, "wb") as f:
+		for rgba, vertices, faces in color_groups(
+				mesh_surfaces(surfaces, geometry), segments):
+			positions = vertices.astype("<f4")
+			indices = faces.astype("<u4")
+			primitive = {"attributes": {"POSITION": len(accessors)}}
+			for data, target in ((positions, 34962), (indices, 34963)):
+				views.append({
+					"buffer": 0, "byteOffset": length,
+					"byteLength": data.nbytes, "target": target})
+				f.write(data.tobytes())
+				length += data.nbytes
+			accessors.append({
+				"bufferView": len(views) - 2, "componentType": 5126,
+				"count": len(positions), "type": "VEC3",
+				"min": positions.min(axis=0).tolist(),
+				"max": positions.max(axis=0).tolist()})
+			accessors.append({
+				"bufferView": len(views) - 1, "componentType": 5125,
+				"count": indices.size, "type": "SCALAR"})
+			primitive["indices"] = len(accessors) - 1
+			primitive["material"] = materials.setdefault(rgba, len(materials))
+			meshes.setdefault(rgba, []).append(primitive)
+			count += len(faces)
+
+	gltf = {
+		"asset": {"version": "2.0", "generator": "FitsGeo"},
+		"scene": 0,
+		"scenes": [{"nodes": list(range(len(meshes)))}],
+		"nodes": [{"mesh": i} for i in range(len(meshes))],
+		"meshes": [{"primitives": p} for p in meshes.values()],
+		"materials": [
+			{
+				"pbrMetallicRoughness": {
+					"baseColorFactor": list(rgba), "metallicFactor": 0.0},
+				"alphaMode": "BLEND" if rgba[3] < 1 else "OPAQUE",
+				"doubleSided": True}
+			for rgba in materials],
+		"buffers": [{"uri": os.path.basename(bin_name), "byteLength": length}],
+		"bufferViews": views,
+		"accessors": accessors}
+	with open(file_name, "w") as f:
+		json.dump(gltf, f)
+	return count
+
+
+def export_mesh(file_name: str, surfaces: list = None, segments=24, geometry=None):
+	"""
+	Write meshes of surfaces to file, format is chosen by extension:
+	.stl (binary STL), .obj (Wavefront OBJ) or .gltf (glTF 2.0)
+
+	:param file_name: name of file
+	:param surfaces: list of surfaces (surfaces of geometry except planes by
+		default)
+	:param segments: number of segments for round surfaces
+	:param geometry: Geometry object (current geometry by default)
+	:return: number of triangles
+	"""
+	writers = {".stl": write_stl, ".obj": write_obj, ".gltf": write_gltf}
+	extension = os.path.splitext(file_name)[1].lower()
+	if extension not in writers:
+		raise ValueError(f"Mesh format '{extension}' is not supported!")
+	return writers[extension](file_name, surfaces, segments, geometry)
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
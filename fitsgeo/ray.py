@@ -0,0 +1,543 @@
+import numpy as np
+from numpy import linalg as la
+
+from .surface import as_points, surface_items, \
+	P, SPH, BOX, RPP, RCC, TRC, T, REC, WED
+from .bvh import BVH
+from .cell import top_level_cells
+from .geometry import current_geometry
+
+# Minimal distance for intersection to be counted as positive (cm)
+EPS = 1e-9
+
+
+def as_rays(origins, directions):
+	"""
+	Convert rays to float arrays, directions are normalized, so all distances
+	are in units of length (cm)
+
+	:param origins: array-like of ray origins with (N, 3) shape
+	:param directions: array-like of ray directions with (N, 3) shape
+	:return: tuple of numpy.ndarray origins and unit directions (N, 3)
+	"""
+	o = as_points(origins)
+	d = as_points(directions)
+	d = d / la.norm(d, axis=1)[:, None]
+	if len(o) == 1 and len(d) > 1:
+		o = np.repeat(o, len(d), axis=0)
+	elif len(d) == 1 and len(o) > 1:
+		d = np.repeat(d, len(o), axis=0)
+	return o, d
+
+
+def nearest_positive(t):
+	"""
+	Get nearest positive distance for every ray from candidate distances
+
+	:param t: numpy.ndarray (N, k) with candidate distances, nan for invalid
+	:return: numpy.ndarray (N) with nearest positive distance, inf if none
+	"""
+	t = np.where(np.isnan(t) | (t <= EPS), np.inf, t)
+	return t.min(axis=1)
+
+
+def solve_quadratic(a, b, c):
+	"""
+	Solve a*t^2 + b*t + c = 0 for arrays of coefficients
+
+	:param a: numpy.ndarray with coefficients a
+	:param b: numpy.ndarray with coefficients b
+	:param c: numpy.ndarray with coefficients c
+	:return: numpy.ndarray (N, 2) with real roots, nan if there are no roots
+	"""
+	with np.errstate(divide="ignore", invalid="ignore"):
+		disc = b ** 2 - 4 * a * c
+		sqrt_disc = np.sqrt(np.where(disc >= 0, disc, np.nan))
+		# Numerically stable form of roots
+		q = -0.5 * (b + np.copysign(sqrt_disc, b))
+		t1 = q / a
+		t2 = c / q
+		# Linear equation for a = 0
+		linear = np.abs(a) < 1e-14
+		t1 = np.where(linear, -c / b, t1)
+		t2 = np.where(linear, np.nan, t2)
+	return np.column_stack([t1, t2])
+
+
+def solve_quartic(coefficients):
+	"""
+	Solve quartic equations for arrays of coefficients with eigenvalues of
+	companion matrices, real roots are polished by Newton iterations
+
+	:param coefficients: numpy.ndarray (N, 5) with coefficients from t^4 to t^0
+	:return: numpy.ndarray (N, 4) with real roots, nan for complex roots
+	"""
+	c = coefficients[:, 1:] / coefficients[:, :1]
+	companion = np.zeros((len(c), 4, 4))
+	companion[:, 0, :] = -c
+	companion[:, 1, 0] = companion[:, 2, 1] = companion[:, 3, 2] = 1
+	roots = la.eigvals(companion)
+
+	real = np.abs(roots.imag) <= 1e-6 * np.maximum(1, np.abs(roots.real))
+	t = roots.real
+	for _ in range(2):  # Newton polishing
+		f = (((t + c[:, :1]) * t + c[:, 1:2]) * t + c[:, 2:3]) * t + c[:, 3:]
+		df = ((4 * t + 3 * c[:, :1]) * t + 2 * c[:, 1:2]) * t + c[:, 2:3]
+		with np.errstate(divide="ignore", invalid="ignore"):
+			step = np.where(df != 0, f / df, 0)
+		t = t - np.where(np.isfinite(step), step, 0)
+	return np.where(real, t, np.nan)
+
+
+def slabs(w, d, edges):
+	"""
+	Slab test for parallelepiped with base point in origin
+
+	:param w: numpy.ndarray (N, 3) with ray origins relative to base point
+	:param d: numpy.ndarray (N, 3) with ray directions
+	:param edges: numpy.ndarray (3, 3) with edge vectors
+	:return: numpy.ndarray (N, 2) with entry and exit distances, nan if missed
+	"""
+	t_near = np.full(len(w), -np.inf)
+	t_far = np.full(len(w), np.inf)
+	for e in edges:
+		e = e / np.dot(e, e)
+		w_e, d_e = w @ e, d @ e  # Coordinates in units of edge
+		with np.errstate(divide="ignore", invalid="ignore"):
+			t1 = -w_e / d_e
+			t2 = (1 - w_e) / d_e
+		parallel = d_e == 0
+		inside = (w_e >= 0) & (w_e <= 1)
+		t1 = np.where(parallel, np.where(inside, -np.inf, np.inf), t1)
+		t2 = np.where(parallel, np.where(inside, np.inf, -np.inf), t2)
+		t_near = np.maximum(t_near, np.minimum(t1, t2))
+		t_far = np.minimum(t_far, np.maximum(t1, t2))
+	hit = t_near <= t_far
+	return np.column_stack([
+		np.where(hit, t_near, np.nan), np.where(hit, t_far, np.nan)])
+
+
+def axial(surface, o, d):
+	"""
+	Get ray coordinates along height vector of surface with bottom face in
+	xyz0: axial coordinate of origin and direction, unit axis and height
+
+	:param surface: surface with xyz0 and h parameters
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with ray directions
+	:return: tuple (w, w_n, d_n, n, length), where w - origins relative to xyz0
+	"""
+	h = np.asarray(surface.h, dtype=float)
+	length = la.norm(h)
+	n = h / length
+	w = o - np.asarray(surface.xyz0, dtype=float)
+	return w, w @ n, d @ n, n, length
+
+
+def caps(w_n, d_n, length):
+	"""
+	Get distances to planes of bottom (0) and top (length) faces
+
+	:param w_n: numpy.ndarray with axial coordinates of ray origins
+	:param d_n: numpy.ndarray with axial components of ray directions
+	:param length: height of surface
+	:return: numpy.ndarray (N, 2) with distances, nan for parallel rays
+	"""
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return np.column_stack([-w_n / d_n, (length - w_n) / d_n])
+
+
+def ray_p(surface, o, d):
+	"""
+	Get nearest positive intersection distances with plane
+
+	:param surface: P object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	if surface.vert in ("x", "y", "z"):
+		normal = np.eye(3)[("x", "y", "z").index(surface.vert)]
+	else:
+		normal = np.array([surface.a, surface.b, surface.c], dtype=float)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		t = (surface.d - o @ normal) / (d @ normal)
+	return nearest_positive(t[:, None])
+
+
+def ray_sph(surface, o, d):
+	"""
+	Get nearest positive intersection distances with sphere (quadratic solve)
+
+	:param surface: SPH object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	w = o - np.asarray(surface.xyz0, dtype=float)
+	b = 2 * np.einsum("ij,ij->i", w, d)
+	c = np.einsum("ij,ij->i", w, w) - surface.r ** 2
+	return nearest_positive(solve_quadratic(np.ones(len(o)), b, c))
+
+
+def ray_box(surface, o, d):
+	"""
+	Get nearest positive intersection distances with box (slab test)
+
+	:param surface: BOX object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	w = o - np.asarray(surface.xyz0, dtype=float)
+	edges = np.array([surface.a, surface.b, surface.c], dtype=float)
+	return nearest_positive(slabs(w, d, edges))
+
+
+def ray_rpp(surface, o, d):
+	"""
+	Get nearest positive intersection distances with rectangular solid
+	(slab test)
+
+	:param surface: RPP object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	bounds = np.array([surface.x, surface.y, surface.z], dtype=float)
+	w = o - bounds[:, 0]
+	edges = np.diag(bounds[:, 1] - bounds[:, 0])
+	return nearest_positive(slabs(w, d, edges))
+
+
+def ray_rcc(surface, o, d):
+	"""
+	Get nearest positive intersection distances with cylinder
+	(quadratic solve for side face, planes for bottom and top faces)
+
+	:param surface: RCC object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	return ray_trc_shape(surface, o, d, surface.r, surface.r)
+
+
+def ray_trc(surface, o, d):
+	"""
+	Get nearest positive intersection distances with truncated cone
+	(quadratic solve for side face, planes for bottom and top faces)
+
+	:param surface: TRC object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	return ray_trc_shape(surface, o, d, surface.r_1, surface.r_2)
+
+
+def ray_trc_shape(surface, o, d, r_1: float, r_2: float):
+	"""
+	Get nearest positive intersection distances with truncated cone with
+	bottom radius r_1 and top radius r_2 (cylinder for r_1 = r_2)
+
+	:param surface: surface with xyz0 and h parameters
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:param r_1: bottom face radius
+	:param r_2: top face radius
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	w, w_n, d_n, n, length = axial(surface, o, d)
+	w_p = w - np.outer(w_n, n)  # Radial components
+	d_p = d - np.outer(d_n, n)
+	k = (r_2 - r_1) / length  # Radius change per unit of height
+	r_0 = r_1 + k * w_n  # Radius at axial coordinate of origin
+
+	side = solve_quadratic(
+		np.einsum("ij,ij->i", d_p, d_p) - k ** 2 * d_n ** 2,
+		2 * (np.einsum("ij,ij->i", w_p, d_p) - k * r_0 * d_n),
+		np.einsum("ij,ij->i", w_p, w_p) - r_0 ** 2)
+	s = w_n[:, None] + side * d_n[:, None]  # Axial coordinates of hits
+	side[(s < 0) | (s > length)] = np.nan
+
+	faces = caps(w_n, d_n, length)
+	for i, r in enumerate((r_1, r_2)):
+		hit = w_p + faces[:, i:i + 1] * d_p
+		faces[np.einsum("ij,ij->i", hit, hit) > r ** 2, i] = np.nan
+	return nearest_positive(np.column_stack([side, faces]))
+
+
+def ray_rec(surface, o, d):
+	"""
+	Get nearest positive intersection distances with elliptical cylinder
+	(quadratic solve for side face, planes for bottom and top faces)
+
+	:param surface: REC object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	w, w_n, d_n, n, length = axial(surface, o, d)
+	a = np.asarray(surface.a, dtype=float)
+	b = np.asarray(surface.b, dtype=float)
+	a, b = a / np.dot(a, a), b / np.dot(b, b)
+	w_u, w_v, d_u, d_v = w @ a, w @ b, d @ a, d @ b  # Ellipse coordinates
+
+	side = solve_quadratic(
+		d_u ** 2 + d_v ** 2,
+		2 * (w_u * d_u + w_v * d_v),
+		w_u ** 2 + w_v ** 2 - 1)
+	s = w_n[:, None] + side * d_n[:, None]
+	side[(s < 0) | (s > length)] = np.nan
+
+	faces = caps(w_n, d_n, length)
+	u = w_u[:, None] + faces * d_u[:, None]
+	v = w_v[:, None] + faces * d_v[:, None]
+	faces[u ** 2 + v ** 2 > 1] = np.nan
+	return nearest_positive(np.column_stack([side, faces]))
+
+
+def ray_triangle(o, d, v0, v1, v2):
+	"""
+	Get intersection distances with triangle (Moller-Trumbore algorithm)
+
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:param v0: first vertex of triangle
+	:param v1: second vertex of triangle
+	:param v2: third vertex of triangle
+	:return: numpy.ndarray (N) with distances, nan for missed rays
+	"""
+	e1, e2 = v1 - v0, v2 - v0
+	p = np.cross(d, e2)
+	det = p @ e1
+	with np.errstate(divide="ignore", invalid="ignore"):
+		inv = 1 / det
+		s = o - v0
+		u = np.einsum("ij,ij->i", s, p) * inv
+		q = np.cross(s, e1)
+		v = np.einsum("ij,ij->i", d, q) * inv
+		t = q @ e2 * inv
+	hit = (np.abs(det) > 1e-14) & (u >= 0) & (v >= 0) & (u + v <= 1)
+	return np.where(hit, t, np.nan)
+
+
+def ray_wed(surface, o, d):
+	"""
+	Get nearest positive intersection distances with wedge
+	(triangle tests for bottom and top faces, quad tests for side faces)
+
+	:param surface: WED object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	v0 = np.asarray(surface.xyz0, dtype=float)
+	a = v0 + np.asarray(surface.a, dtype=float)
+	b = v0 + np.asarray(surface.b, dtype=float)
+	h = np.asarray(surface.h, dtype=float)
+
+	triangles = [(v0, a, b), (v0 + h, a + h, b + h)]
+	for p1, p2 in ((v0, a), (v0, b), (a, b)):  # Side quads as 2 triangles
+		triangles += [(p1, p2, p2 + h), (p1, p2 + h, p1 + h)]
+	return nearest_positive(
+		np.column_stack([ray_triangle(o, d, *tr) for tr in triangles]))
+
+
+def ray_t(surface, o, d):
+	"""
+	Get nearest positive intersection distances with torus (quartic solve),
+	elliptic cross section is made circular by scaling along rotational axis
+
+	:param surface: T object
+	:param o: numpy.ndarray (N, 3) with ray origins
+	:param d: numpy.ndarray (N, 3) with unit ray directions
+	:return: numpy.ndarray (N) with distances, inf for missed rays
+	"""
+	axis = {"x": 0, "z": 2}.get(surface.rot, 1)  # y axis by default
+	order = [i for i in range(3) if i != axis] + [axis]  # Rotational axis last
+	w = (o - np.asarray(surface.xyz0, dtype=float))[:, order]
+	v = d[:, order]
+	scale = surface.c / surface.b
+	w[:, 2] *= scale
+	v[:, 2] *= scale
+
+	r2 = surface.r ** 2
+	g = np.einsum("ij,ij->i", v, v)
+	h = 2 * np.einsum("ij,ij->i", w, v)
+	i = np.einsum("ij,ij->i", w, w) + r2 - surface.c ** 2
+	coefficients = np.column_stack([
+		g ** 2,
+		2 * g * h,
+		h ** 2 + 2 * g * i - 4 * r2 * (v[:, 0] ** 2 + v[:, 1] ** 2),
+		2 * h * i - 8 * r2 * (w[:, 0] * v[:, 0] + w[:, 1] * v[:, 1]),
+		i ** 2 - 4 * r2 * (w[:, 0] ** 2 + w[:, 1] ** 2)])
+	return nearest_positive(solve_quartic(coefficients))
+
+
+# Intersection functions for every surface class
+RAY_FUNCTIONS = {
+	P: ray_p, SPH: ray_sph, BOX: ray_box, RPP: ray_rpp, RCC: ray_rcc,
+	TRC: ray_trc, T: ray_t, REC: ray_rec, WED: ray_wed}
+
+
+def ray_function(surface):
+	"""
+	Get ray intersection function of surface, subclasses of surface classes
+	use function of the nearest base class
+
+	:param surface: surface object
+	:return: function (surface, origins, directions) -> distances
+	"""
+	for cls in type(surface).__mro__:
+		if cls in RAY_FUNCTIONS:
+			return RAY_FUNCTIONS[cls]
+	raise NotImplementedError(
+		f"Ray intersection is not implemented for {type(surface).__name__}")
+
+
+def intersect(surface, origins, directions):
+	"""
+	Get nearest positive intersection distances of rays with surface,
+	vectorized over rays (trn is not applied)
+
+	:param surface: surface object
+	:param origins: array-like of ray origins with (N, 3) shape
+	:param directions: array-like of ray directions with (N, 3) shape
+	:return: numpy.ndarray (N) with distances along rays, inf for missed rays
+	"""
+	function = ray_function(surface)
+	o, d = as_rays(origins, directions)
+	return function(surface, o, d)
+
+
+def cast(origins, directions, surfaces: list = None, geometry=None):
+	"""
+	Cast rays and find nearest surface crossed by every ray
+
+	:param origins: array-like of ray origins with (N, 3) shape
+	:param directions: array-like of ray directions with (N, 3) shape
+	:param surfaces: list of surfaces (surfaces of geometry by default),
+		surface arrays are cast item by item
+	:param geometry: Geometry object (current geometry by default)
+	:return: tuple of numpy.ndarray: distances (inf for missed rays) and
+		surface numbers (-1 for missed rays)
+	"""
+	if surfaces is None:
+		surfaces = current_geometry(geometry).surfaces
+	o, d = as_rays(origins, directions)
+	distance = np.full(len(o), np.inf)
+	sn = np.full(len(o), -1)
+	for surface in surface_items(surfaces):
+		t = ray_function(surface)(surface, o, d)
+		closer = t < distance
+		distance[closer] = t[closer]
+		sn[closer] = surface.sn
+	return distance, sn
+
+
+def trace(
+		origins, directions, max_distance=np.inf,
+		cells: list = None, surfaces: list = None, max_steps=100000,
+		geometry=None):
+	"""
+	Trace rays through model: all rays are moved together from one surface
+	crossing to the next one and cell of every segment is found at its
+	midpoint, segments are kept in arrays and split by rays at the end. Rays with
+	origins in outer void (matn = -1) start at the first crossing into other
+	cell. Tracing of ray stops in outer void, after max_distance (from
+	origin) or after leaving all surfaces. Consecutive segments in the same
+	cell are merged
+
+	:param origins: array-like of ray origins with (N, 3) shape
+	:param directions: array-like of ray directions with (N, 3) shape
+	:param max_distance: maximum traced distance along rays (cm)
+	:param cells: list of cells (cells of the real world by default)
+	:param surfaces: list of surfaces (surfaces of geometry by default)
+	:param max_steps: maximum number of surface crossings for one ray
+	:param geometry: Geometry object (current geometry by default)
+	:return: tuple (segments, areal_density), where segments is a list with
+		ordered list of (cell, material, path length) segments for every ray
+		(cell and material are None for segments outside of all cells) and
+		areal_density is numpy.ndarray with integrated areal density (g/cm^2)
+	"""
+	geometry = current_geometry(geometry)
+	if cells is None:
+		cells = top_level_cells(geometry.cells)
+	if surfaces is None:
+		surfaces = geometry.surfaces
+	o, d = as_rays(origins, directions)
+	bvh = BVH(cells, surfaces, geometry=geometry)
+	surfaces = list(surface_items(surfaces))  # Items are created only once
+
+	# Cells are indexed in arrays, the last index is for no cell
+	cns = np.array([c.cn for c in cells], dtype=int)
+	sorter = np.argsort(cns)
+	outer = np.array([c.material.matn < 0 for c in cells] + [False])
+	density = np.array(
+		[c.material.density if c.material.matn > 0 else 0 for c in cells] + [0])
+
+	# Segments of all rays: ray index, cell index and length
+	seg_ray, seg_cell, seg_length = [], [], []
+	travelled = np.zeros(len(o))
+	entered = np.zeros(len(o), dtype=bool)  # Ray left outer void
+	p = o.copy()
+	active = np.arange(len(o))
+	for _ in range(max_steps):
+		if not len(active):
+			break
+		t, _ = cast(p[active], d[active], surfaces)
+		step = np.minimum(t, max_distance - travelled[active])
+		# Without more crossings ray leaves all surfaces
+		finite = np.isfinite(step)
+		cell = np.full(len(active), len(cells))
+		cn = bvh.query(
+			p[active[finite]] + step[finite, None] / 2 * d[active[finite]])
+		pos = np.minimum(np.searchsorted(cns, cn, sorter=sorter), len(cns) - 1)
+		found = (cn >= 0) & (cns[sorter[pos]] == cn) if len(cns) else \
+			np.zeros(len(cn), dtype=bool)
+		cell[np.flatnonzero(finite)[found]] = sorter[pos[found]]
+
+		# Ray from outer void is moved to the first crossing into model
+		in_outer = outer[cell]
+		record = finite & ~in_outer
+		stopped = ~finite | in_outer & entered[active]
+		entered[active[record]] = True
+		seg_ray.append(active[record])
+		seg_cell.append(cell[record])
+		seg_length.append(step[record])
+
+		moved = active[~stopped]
+		p[moved] += step[~stopped, None] * d[moved]
+		travelled[moved] += step[~stopped]
+		active = moved[travelled[moved] < max_distance]
+
+	ray, cell, length = (
+		np.concatenate(a) if a else np.empty(0, dtype=dtype) for a, dtype in (
+			(seg_ray, int), (seg_cell, int), (seg_length, float)))
+	order = np.argsort(ray, kind="stable")  # Segments of ray in step order
+	ray, cell, length = ray[order], cell[order], length[order]
+	areal_density = np.bincount(
+		ray, weights=density[cell] * length, minlength=len(o))
+
+	# Consecutive segments in the same cell are merged
+	first = np.ones(len(ray), dtype=bool)
+	first[1:] = (ray[1:] != ray[:-1]) | (cell[1:] != cell[:-1])
+	length = np.bincount(np.cumsum(first) - 1, weights=length)
+	ray, cell = ray[first], cell[first]
+
+	cell_list = list(cells) + [None]
+	material_list = [c.material for c in cells] + [None]
+	bounds = np.concatenate(
+		[[0], np.cumsum(np.bincount(ray, minlength=len(o)))]).tolist()
+	items = [
+		(cell_list[k], material_list[k], l)
+		for k, l in zip(cell.tolist(), length.tolist())]
+	segments = [items[i:j] for i, j in zip(bounds[:-1], bounds[1:])]
+	return segments, areal_density
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
@@ -0,0 +1,450 @@
+import re
+import numpy as np
+
+from .surface import as_points, unbounded_box, SurfaceLookup
+from .cell import top_level_cells
+from .geometry import current_geometry
+
+# Tokens of PHITS cell definition: signed surface numbers, operators and
+# parentheses, whitespace between operands means intersection
+TOKEN = re.compile(r"\s*([-+]?\d+|[():#])")
+
+
+def boxes_intersection(boxes: list):
+	"""
+	Get bounding box of intersection of boxes
+
+	:param boxes: list of boxes [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	:return: numpy.ndarray box, with min > max if intersection is empty
+	"""
+	boxes = np.asarray(boxes)
+	return np.column_stack([boxes[:, :, 0].max(axis=0), boxes[:, :, 1].min(axis=0)])
+
+
+def boxes_union(boxes: list):
+	"""
+	Get bounding box of union of boxes, empty boxes are ignored
+
+	:param boxes: list of boxes [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	:return: numpy.ndarray box, with min > max if all boxes are empty
+	"""
+	boxes = np.asarray(boxes)
+	boxes = boxes[np.all(boxes[:, :, 0] <= boxes[:, :, 1], axis=1)]
+	if len(boxes) == 0:
+		return np.array([[np.inf, -np.inf]] * 3)
+	return np.column_stack([boxes[:, :, 0].min(axis=0), boxes[:, :, 1].max(axis=0)])
+
+
+class Halfspace:
+
+	def __init__(self, sn: int, negative: bool):
+		"""
+		Region on one side of surface
+
+		:param sn: surface number
+		:param negative: True for negative sense (-sn), False for positive (+sn)
+		"""
+		self.sn = sn
+		self.negative = negative
+
+	def __repr__(self):
+		return f"{'-' if self.negative else '+'}{self.sn}"
+
+	def compile(self):
+		"""
+		Emit function computing boolean mask of region from SenseCache
+
+		:return: function(cache) -> numpy.ndarray (bool)
+		"""
+		sn = self.sn
+		if self.negative:
+			return lambda cache: cache.negative(sn)
+		return lambda cache: ~cache.negative(sn)
+
+	def bounding_box(self, surfaces: dict):
+		"""
+		Get bounding box of region
+
+		:param surfaces: dictionary {sn: surface}
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		if self.sn not in surfaces:
+			raise ValueError(f"No surface with sn={self.sn} is defined!")
+		return surfaces[self.sn].halfspace_bounding_box(self.negative)
+
+
+class Intersection:
+
+	def __init__(self, items: list):
+		"""
+		Intersection (blank operator) of regions
+
+		:param items: list of regions
+		"""
+		self.items = items
+
+	def __repr__(self):
+		return "(" + " ".join(repr(i) for i in self.items) + ")"
+
+	def compile(self):
+		"""
+		Emit function computing boolean mask of region from SenseCache
+
+		:return: function(cache) -> numpy.ndarray (bool)
+		"""
+		first, *rest = [i.compile() for i in self.items]
+
+		def mask(cache):
+			m = first(cache).copy()  # Copy to keep cached arrays intact
+			for f in rest:
+				if not m.any():
+					break
+				m &= f(cache)
+			return m
+		return mask
+
+	def bounding_box(self, surfaces: dict):
+		"""
+		Get bounding box of region: intersection shrinks the box
+
+		:param surfaces: dictionary {sn: surface}
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		return boxes_intersection([i.bounding_box(surfaces) for i in self.items])
+
+
+class Union:
+
+	def __init__(self, items: list):
+		"""
+		Union (: operator) of regions
+
+		:param items: list of regions
+		"""
+		self.items = items
+
+	def __repr__(self):
+		return "(" + " : ".join(repr(i) for i in self.items) + ")"
+
+	def compile(self):
+		"""
+		Emit function computing boolean mask of region from SenseCache
+
+		:return: function(cache) -> numpy.ndarray (bool)
+		"""
+		first, *rest = [i.compile() for i in self.items]
+
+		def mask(cache):
+			m = first(cache).copy()  # Copy to keep cached arrays intact
+			for f in rest:
+				if m.all():
+					break
+				m |= f(cache)
+			return m
+		return mask
+
+	def bounding_box(self, surfaces: dict):
+		"""
+		Get bounding box of region: union grows the box
+
+		:param surfaces: dictionary {sn: surface}
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		return boxes_union([i.bounding_box(surfaces) for i in self.items])
+
+
+class Complement:
+
+	def __init__(self, item):
+		"""
+		Complement (# operator) of region
+
+		:param item: region
+		"""
+		self.item = item
+
+	def __repr__(self):
+		return f"#{self.item!r}"
+
+	def compile(self):
+		"""
+		Emit function computing boolean mask of region from SenseCache
+
+		:return: function(cache) -> numpy.ndarray (bool)
+		"""
+		f = self.item.compile()
+		return lambda cache: ~f(cache)
+
+	def bounding_box(self, surfaces: dict):
+		"""
+		Get bounding box of region: complement is unbounded
+
+		:param surfaces: dictionary {sn: surface}
+		:return: numpy.ndarray [[-inf, inf], [-inf, inf], [-inf, inf]]
+		"""
+		return unbounded_box()
+
+
+class CellComplement:
+
+	def __init__(self, cn: int):
+		"""
+		Complement of another cell (#cn notation)
+
+		:param cn: cell number
+		"""
+		self.cn = cn
+
+	def __repr__(self):
+		return f"#{self.cn}"
+
+	def compile(self):
+		"""
+		Emit function computing boolean mask of region from SenseCache
+
+		:return: function(cache) -> numpy.ndarray (bool)
+		"""
+		cn = self.cn
+		return lambda cache: ~cache.cell_mask(cn)
+
+	def bounding_box(self, surfaces: dict):
+		"""
+		Get bounding box of region: complement is unbounded
+
+		:param surfaces: dictionary {sn: surface}
+		:return: numpy.ndarray [[-inf, inf], [-inf, inf], [-inf, inf]]
+		"""
+		return unbounded_box()
+
+
+def tokenize(text: str):
+	"""
+	Split PHITS cell definition into tokens with explicit "&" (intersection)
+	operators between neighbouring operands
+
+	:param text: string with cell definition, like "(-1 2):#(3)"
+	:return: list of tokens
+	"""
+	tokens = []
+	pos = 0
+	text = text.rstrip()
+	while pos < len(text):
+		match = TOKEN.match(text, pos)
+		if match is None:
+			raise ValueError(f"cell_def incorrect near '{text[pos:]}'!")
+		token = match.group(1)
+		# Operand after operand (or closing parenthesis) means intersection
+		if tokens and (tokens[-1] == ")" or tokens[-1][-1].isdigit()) and \
+				(token in ("(", "#") or token[-1].isdigit()):
+			tokens.append("&")
+		tokens.append(token)
+		pos = match.end()
+	return tokens
+
+
+def parse_cell_def(text: str):
+	"""
+	Parse PHITS cell definition into expression tree, with usual precedence:
+	# (NOT) first, then blank (AND), then : (OR)
+
+	:param text: string with cell definition, like "(-1 2):#(3)"
+	:return: expression tree of Halfspace, Intersection, Union, Complement
+		and CellComplement objects
+	"""
+	tokens = tokenize(text)
+	pos = 0
+
+	def peek():
+		return tokens[pos] if pos < len(tokens) else None
+
+	def take():
+		nonlocal pos
+		token = peek()
+		pos += 1
+		return token
+
+	def union():
+		items = [intersection()]
+		while peek() == ":":
+			take()
+			items.append(intersection())
+		return items[0] if len(items) == 1 else Union(items)
+
+	def intersection():
+		items = [unary()]
+		while peek() == "&":
+			take()
+			items.append(unary())
+		return items[0] if len(items) == 1 else Intersection(items)
+
+	def unary():
+		token = take()
+		if token == "#":
+			if peek() is not None and peek().isdigit():
+				return CellComplement(int(take()))
+			return Complement(unary())
+		if token == "(":
+			item = union()
+			if take() != ")":
+				raise ValueError(f"cell_def incorrect: unbalanced '(' in '{text}'!")
+			return item
+		if token is not None and token[-1].isdigit():
+			sn = int(token)
+			return Halfspace(abs(sn), sn < 0)
+		raise ValueError(
+			f"cell_def incorrect: unexpected '{token or 'end'}' in '{text}'!")
+
+	tree = union()
+	if pos != len(tokens):
+		raise ValueError(f"cell_def incorrect: unexpected '{peek()}' in '{text}'!")
+	return tree
+
+
+class SenseCache:
+
+	def __init__(self, points, surfaces: list = None, cells: list = None):
+		"""
+		Per batch storage of surface senses, every surface sense computed only
+		once and shared between all cells
+
+		:param points: array-like of points with (N, 3) shape
+		:param surfaces: surfaces list or dictionary {sn: surface} to look up
+			numbers (surfaces of current geometry by default)
+		:param cells: cells list or dictionary {cn: cell} to look up #cn
+			complements (cells of current geometry by default)
+		"""
+		if surfaces is None:
+			surfaces = current_geometry().surfaces
+		if cells is None:
+			cells = current_geometry().cells
+
+		self.points = as_points(points)
+		if not isinstance(surfaces, dict):
+			surfaces = SurfaceLookup(surfaces)
+		if not isinstance(cells, dict):
+			cells = {c.cn: c for c in cells}
+		self.surfaces = surfaces
+		self.cells = cells
+		self.__negative = {}
+		self.__cell_masks = {}
+
+	def negative(self, sn: int):
+		"""
+		Get mask of points on negative side of surface
+
+		:param sn: surface number
+		:return: numpy.ndarray (bool)
+		"""
+		mask = self.__negative.get(sn)
+		if mask is None:
+			if sn not in self.surfaces:
+				raise ValueError(f"No surface with sn={sn} is defined!")
+			mask = self.surfaces[sn].sense(self.points) < 0
+			self.__negative[sn] = mask
+		return mask
+
+	def cell_mask(self, cn: int):
+		"""
+		Get mask of points inside cell
+
+		:param cn: cell number
+		:return: numpy.ndarray (bool)
+		"""
+		mask = self.__cell_masks.get(cn)
+		if mask is None:
+			if cn not in self.cells:
+				raise ValueError(f"No cell with cn={cn} is defined!")
+			mask = compile_cell(self.cells[cn])(self)
+			self.__cell_masks[cn] = mask
+		return mask
+
+
+def parse_cell(cell):
+	"""
+	Parse cell definition of cell into expression tree, cell_def is parsed only
+	once and tree with compiled function is cached while cell_def stays the same
+
+	:param cell: Cell object
+	:return: tuple (cell_def string, expression tree, compiled function)
+	"""
+	text = cell.get_cell_def
+	compiled = cell.compiled
+	if compiled is None or compiled[0] != text:
+		tree = parse_cell_def(text)
+		compiled = (text, tree, tree.compile())
+		cell.compiled = compiled
+	return compiled
+
+
+def compile_cell(cell):
+	"""
+	Compile cell definition into vectorized function
+
+	:param cell: Cell object
+	:return: function(cache: SenseCache) -> numpy.ndarray (bool) with True for
+		points inside cell
+	"""
+	return parse_cell(cell)[2]
+
+
+def cell_bounding_box(cell, surfaces: list = None):
+	"""
+	Get axis-aligned bounding box of cell with interval arithmetic through
+	cell definition: intersection shrinks the box, union grows it and
+	complement is unbounded
+
+	:param cell: Cell object
+	:param surfaces: surfaces list or dictionary {sn: surface}
+		(surfaces of current geometry by default)
+	:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]],
+		infinite limits for unbounded cells
+	"""
+	if surfaces is None:
+		surfaces = current_geometry().surfaces
+	if not isinstance(surfaces, dict):
+		surfaces = SurfaceLookup(surfaces)
+	return parse_cell(cell)[1].bounding_box(surfaces)
+
+
+def cells_bounding_box(cells: list, surfaces: list = None):
+	"""
+	Get bounding box containing all cells
+
+	:param cells: list of cells
+	:param surfaces: list of surfaces (surfaces of current geometry by default)
+	:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	"""
+	if surfaces is None:
+		surfaces = current_geometry().surfaces
+	surfaces = SurfaceLookup(surfaces)
+	return boxes_union([parse_cell(c)[1].bounding_box(surfaces) for c in cells])
+
+
+def cells_mask(
+		points, cells: list = None, surfaces: list = None, geometry=None):
+	"""
+	Compute inside/outside masks for all cells for batch of points, surface
+	senses are shared between cells
+
+	:param points: array-like of points with (N, 3) shape
+	:param cells: list of cells (cells of the real world by default)
+	:param surfaces: list of surfaces (surfaces of geometry by default)
+	:param geometry: Geometry object (current geometry by default)
+	:return: numpy.ndarray (bool) with (len(cells), N) shape
+	"""
+	geometry = current_geometry(geometry)
+	if cells is None:
+		cells = top_level_cells(geometry.cells)
+	if surfaces is None:
+		surfaces = geometry.surfaces
+	cache = SenseCache(points, surfaces, geometry.cells)
+	masks = np.empty((len(cells), len(cache.points)), dtype=bool)
+	for i, cell in enumerate(cells):
+		masks[i] = compile_cell(cell)(cache)
+	return masks
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
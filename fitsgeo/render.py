@@ -0,0 +1,293 @@
+import itertools
+import struct
+import zlib
+import numpy as np
+
+from .const import ANGEL_COLORS, WHITE, BLACK, as_rgb
+from .cell import top_level_cells
+from .surface import SurfaceLookup
+from .region import SenseCache, compile_cell, cell_bounding_box, \
+	boxes_union
+from .geometry import current_geometry
+
+# Axes (horizontal, vertical) of image for slices along coordinate planes
+PLANES = {
+	"xy": ((1, 0, 0), (0, 1, 0)),
+	"yz": ((0, 1, 0), (0, 0, 1)),
+	"xz": ((1, 0, 0), (0, 0, 1))
+}
+
+# Indexes (min 0 or max 1) of box limits along x, y, z for 8 corners of box
+CORNERS = np.array(list(itertools.product([0, 1], repeat=3)))
+
+
+def slice_axes(plane):
+	"""
+	Get orthonormal axes of slice plane
+
+	:param plane: "xy", "yz", "xz" or tuple of two vectors (horizontal and
+		vertical directions of image) for arbitrary plane
+	:return: tuple of numpy.ndarray (horizontal axis, vertical axis)
+	"""
+	if isinstance(plane, str):
+		if plane not in PLANES:
+			raise ValueError(f"Plane '{plane}' is not supported!")
+		plane = PLANES[plane]
+	u, v = np.asarray(plane, dtype=float).reshape(2, 3)
+	u = u / np.linalg.norm(u)
+	v = v - np.dot(v, u) * u  # Vertical axis orthogonal to horizontal one
+	if np.linalg.norm(v) < 1e-12:
+		raise ValueError("Plane vectors must not be parallel!")
+	return u, v / np.linalg.norm(v)
+
+
+def slice_frame(u, v, center, size, boxes, cells: list):
+	"""
+	Find center and size of slice, by default slice covers projection of
+	bounding box of cells (except outer void) on plane
+
+	:param u: horizontal axis
+	:param v: vertical axis
+	:param center: center of slice or None
+	:param size: (width, height) of slice or None
+	:param boxes: numpy.ndarray with bounding boxes of cells
+	:param cells: list of cells
+	:return: tuple (center, (width, height))
+	"""
+	if center is not None and size is not None:
+		return np.asarray(center, dtype=float), size
+	bounds = boxes_union(
+		[b for b, c in zip(boxes, cells) if c.material.matn >= 0] or
+		np.empty((0, 3, 2)))
+	if not np.all(np.isfinite(bounds)):
+		raise ValueError("Slice size can't be found for unbounded cells!")
+	if center is None:
+		center = bounds.mean(axis=1)
+	center = np.asarray(center, dtype=float)
+	if size is None:
+		corners = np.array(np.meshgrid(*bounds)).reshape(3, -1).T - center
+		size = (
+			2 * np.abs(corners @ u).max(), 2 * np.abs(corners @ v).max())
+	return center, size
+
+
+def pixel_range(coordinates, limits):
+	"""
+	Find range of pixels with coordinates inside limits
+
+	:param coordinates: increasing coordinates of pixel centers
+	:param limits: (min, max) limits
+	:return: tuple (start, stop) of pixel indexes
+	"""
+	return \
+		int(np.searchsorted(coordinates, limits[0], side="left")), \
+		int(np.searchsorted(coordinates, limits[1], side="right"))
+
+
+def slice_cells(
+		plane="xz", center=None, size=None, pixels=1000,
+		chunk_size=1000000, cells: list = None, surfaces: list = None,
+		geometry=None):
+	"""
+	Find cells for pixels of 2D slice of model: bounding box of every cell is
+	projected on image and cell is evaluated only for unresolved pixels of
+	this rectangle, in chunks of rows. Smaller cells are evaluated first,
+	pixel is assigned to the first cell found (like in BVH)
+
+	:param plane: "xy", "yz", "xz" or tuple of two vectors (horizontal and
+		vertical directions of image) for arbitrary plane
+	:param center: point in the center of slice, by default center of
+		bounding box of cells
+	:param size: (width, height) of slice in cm, by default projection of
+		bounding box of cells
+	:param pixels: width of image in pixels or (width, height) in pixels
+	:param chunk_size: maximum number of pixels evaluated at once
+	:param cells: list of cells (cells of the real world by default)
+	:param surfaces: list of surfaces (surfaces of geometry by default)
+	:param geometry: Geometry object (current geometry by default)
+	:return: numpy.ndarray with (height, width) shape with cell numbers (cn),
+		-1 for pixels outside of all cells, first row is the top of slice
+	"""
+	geometry = current_geometry(geometry)
+	if cells is None:
+		cells = top_level_cells(geometry.cells)
+	if surfaces is None:
+		surfaces = geometry.surfaces
+	cells = list(cells)
+	surfaces = SurfaceLookup(surfaces)
+	lookup = {c.cn: c for c in geometry.cells}  # For #cn complements
+	lookup.update({c.cn: c for c in cells})
+
+	boxes = np.array(
+		[cell_bounding_box(c, surfaces) for c in cells]).reshape(-1, 3, 2)
+	u, v = slice_axes(plane)
+	center, (width, height) = slice_frame(u, v, center, size, boxes, cells)
+	if np.ndim(pixels) == 0:
+		pixels = (pixels, max(1, round(pixels * height / width)))
+	nx, ny = pixels
+	x = ((np.arange(nx) + 0.5) / nx - 0.5) * width
+	y = ((np.arange(ny) + 0.5) / ny - 0.5) * height  # Image rows are reversed
+	labels = np.full((ny, nx), -1)
+
+	with np.errstate(invalid="ignore"):  # inf - inf for unbounded cells
+		volumes = np.nan_to_num(
+			np.prod(boxes[:, :, 1] - boxes[:, :, 0], axis=1), nan=np.inf)
+	# Rectangles of pixels [c0, c1, r0, r1] for projections of cell boxes
+	finite = np.all(np.isfinite(boxes), axis=(1, 2))
+	corners = np.where(finite[:, None, None], boxes, 0)[:, [0, 1, 2], CORNERS]
+	corners -= center
+	distance = corners @ np.cross(u, v)
+	px, py = corners @ u, corners @ v
+	rectangles = np.column_stack([
+		np.searchsorted(x, px.min(axis=1), side="left"),
+		np.searchsorted(x, px.max(axis=1), side="right"),
+		np.searchsorted(y, py.min(axis=1), side="left"),
+		np.searchsorted(y, py.max(axis=1), side="right")])
+	rectangles[~finite] = 0, nx, 0, ny
+	visible = \
+		np.all(boxes[:, :, 0] <= boxes[:, :, 1], axis=1) & \
+		(~finite | ((distance.min(axis=1) <= 0) & (distance.max(axis=1) >= 0))) & \
+		(rectangles[:, 0] < rectangles[:, 1]) & \
+		(rectangles[:, 2] < rectangles[:, 3])
+
+	for i in np.argsort(volumes, kind="stable"):
+		if not visible[i]:  # Empty cells and cells not crossing slice
+			continue
+		c0, c1, r0, r1 = rectangles[i].tolist()
+		step = max(1, chunk_size // (c1 - c0))
+		for start in range(r0, r1, step):
+			stop = min(start + step, r1)
+			rect = labels[ny - stop:ny - start, c0:c1][::-1]
+			rows, columns = np.nonzero(rect < 0)
+			if not len(rows):
+				continue
+			points = \
+				center + x[c0 + columns, None] * u + y[start + rows, None] * v
+			cache = SenseCache(points, surfaces, lookup)
+			mask = compile_cell(cells[i])(cache)
+			rect[rows[mask], columns[mask]] = cells[i].cn
+	return labels
+
+
+def boundaries_mask(labels):
+	"""
+	Find pixels on boundaries between cells: pixels with other cell to the
+	right or below
+
+	:param labels: numpy.ndarray with cell numbers of pixels
+	:return: numpy.ndarray (bool) with the same shape
+	"""
+	mask = np.zeros(labels.shape, dtype=bool)
+	mask[:, :-1] |= labels[:, :-1] != labels[:, 1:]
+	mask[:-1, :] |= labels[:-1, :] != labels[1:, :]
+	return mask
+
+
+def render_slice(
+		plane="xz", center=None, size=None, pixels=1000, boundaries=True,
+		background=WHITE, boundary_color=BLACK, chunk_size=1000000,
+		cells: list = None, surfaces: list = None, geometry=None):
+	"""
+	Render 2D slice of model (like [ T-Gshow ] of PHITS): pixels are colored
+	with colors of cell materials (ANGEL colors), outer void and pixels outside
+	of all cells have background color
+
+	:param plane: "xy", "yz", "xz" or tuple of two vectors (horizontal and
+		vertical directions of image) for arbitrary plane
+	:param center: point in the center of slice, by default center of
+		bounding box of cells
+	:param size: (width, height) of slice in cm, by default projection of
+		bounding box of cells
+	:param pixels: width of image in pixels or (width, height) in pixels
+	:param boundaries: if True draw boundaries between cells
+	:param background: color for outer void
+	:param boundary_color: color for boundaries
+	:param chunk_size: number of pixels evaluated at once
+	:param cells: list of cells (cells of the real world by default)
+	:param surfaces: list of surfaces (surfaces of geometry by default)
+	:param geometry: Geometry object (current geometry by default)
+	:return: numpy.ndarray (uint8) with RGB image, (height, width, 3) shape
+	"""
+	geometry = current_geometry(geometry)
+	if cells is None:
+		cells = top_level_cells(geometry.cells)
+	labels = slice_cells(
+		plane, center, size, pixels, chunk_size, cells, surfaces, geometry)
+
+	# Palette: colors of cells sorted by cn and background at the end
+	cns = np.array([c.cn for c in cells], dtype=int)
+	order = np.argsort(cns, kind="stable")
+	palette = np.array(
+		[as_rgb(ANGEL_COLORS[cells[i].material.color])
+			if cells[i].material.matn >= 0 else as_rgb(background)
+			for i in order] + [as_rgb(background)]).reshape(-1, 3)
+	palette = np.round(palette * 255).astype(np.uint8)
+
+	index = np.searchsorted(cns[order], labels)
+	index[index == len(cns)] = 0
+	index[(labels < 0) | (cns[order][index] != labels)] = len(cns)
+	image = palette[index]
+	if boundaries:
+		color = np.round(np.array(as_rgb(boundary_color)) * 255)
+		image[boundaries_mask(labels)] = color.astype(np.uint8)
+	return image
+
+
+def png_chunk(kind: bytes, data: bytes):
+	"""
+	Make PNG chunk with length and CRC
+
+	:param kind: chunk type
+	:param data: chunk data
+	:return: bytes
+	"""
+	return \
+		struct.pack(">I", len(data)) + kind + data + \
+		struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+
+def write_png(file_name: str, image, rows=256):
+	"""
+	Write RGB image to PNG file, image data is compressed in chunks of rows
+
+	:param file_name: name of PNG file
+	:param image: array-like (uint8) with (height, width, 3) shape
+	:param rows: number of rows in one IDAT chunk
+	"""
+	image = np.ascontiguousarray(image, dtype=np.uint8)
+	height, width = image.shape[:2]
+	compressor = zlib.compressobj()
+	with open(file_name, "wb") as f:
+		f.write(b"\x89PNG\r\n\x1a\n")
+		f.write(png_chunk(
+			b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+		for start in range(0, height, rows):
+			block = image[start:start + rows].reshape(-1, width * 3)
+			raw = np.zeros((len(block), width * 3 + 1), dtype=np.uint8)
+			raw[:, 1:] = block  # Filter type 0 (None) for every row
+			data = compressor.compress(raw.tobytes())
+			if data:
+				f.write(png_chunk(b"IDAT", data))
+		f.write(png_chunk(b"IDAT", compressor.flush()))
+		f.write(png_chunk(b"IEND", b""))
+
+
+def slice_png(file_name="slice.png", **kwargs):
+	"""
+	Render 2D slice of model and write it to PNG file, works without browser
+	and vpython
+
+	:param file_name: name of PNG file
+	:param kwargs: parameters of render_slice (plane, center, size, pixels,
+		boundaries etc.)
+	:return: numpy.ndarray (uint8) with RGB image
+	"""
+	image = render_slice(**kwargs)
+	write_png(file_name, image)
+	return image
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
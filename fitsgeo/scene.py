@@ -0,0 +1,154 @@
+import collections
+import numpy as np
+
+from .const import as_rgb
+from .surface import P, TRC, T, SurfaceArray, DRAW_SEGMENTS, prototype_key
+from .geometry import current_geometry
+
+# Maximum number of objects merged in one vpython.compound
+COMPOUND_SIZE = 5000
+
+# Level of detail of extrusions (TRC, T): surfaces smaller than LOD_PIXELS[i]
+# pixels on canvas are drawn with LOD_SEGMENTS[i] segments of circles
+LOD_PIXELS = (20, 100)
+LOD_SEGMENTS = (8, 16, DRAW_SEGMENTS)
+
+
+def surface_boxes(surfaces: list):
+	"""
+	Get surfaces with bounding boxes, surface arrays are replaced by their
+	items (bounding boxes of arrays are computed at once)
+
+	:param surfaces: list of surfaces and surface arrays
+	:return: tuple (list of (surface or (array, index))), numpy.ndarray of
+		boxes with (N, 3, 2) shape)
+	"""
+	items, boxes = [], []
+	for s in surfaces:
+		if isinstance(s, SurfaceArray):
+			items.extend((s, i) for i in range(len(s)))
+			boxes.append(s.get_bounding_boxes)
+		else:
+			items.append(s)
+			boxes.append(np.asarray(s.get_bounding_box, dtype=float)[None])
+	if not boxes:
+		return items, np.empty((0, 3, 2))
+	return items, np.concatenate(boxes)
+
+
+def screen_sizes(boxes, height: int):
+	"""
+	Get sizes of surfaces in pixels when the whole model fits canvas height
+	(as with vpython autoscale), infinite for unbounded surfaces (planes)
+
+	:param boxes: numpy.ndarray of bounding boxes with (N, 3, 2) shape
+	:param height: canvas height in pixels
+	:return: numpy.ndarray with size of every surface in pixels
+	"""
+	edges = boxes[:, :, 1] - boxes[:, :, 0]
+	sizes = edges.max(axis=1)
+	finite = np.isfinite(sizes)
+	if not finite.any():
+		return sizes
+	lo = boxes[finite, :, 0].min(axis=0)
+	hi = boxes[finite, :, 1].max(axis=0)
+	extent = (hi - lo).max()
+	if extent <= 0:
+		return np.full(len(sizes), np.inf)
+	return sizes * height / extent
+
+
+def lod_segments(size: float):
+	"""
+	Get number of segments of circles of extrusion by its size on canvas
+
+	:param size: size of surface on canvas in pixels
+	:return: int number of segments
+	"""
+	return LOD_SEGMENTS[np.searchsorted(LOD_PIXELS, size, side="right")]
+
+
+def draw_surface(surface, size: float, prototypes: dict = None):
+	"""
+	Draw surface without labels, number of segments of extrusions depends
+	on surface size on canvas
+
+	:param surface: surface object
+	:param size: size of surface on canvas in pixels
+	:param prototypes: dictionary of hidden prototypes for cloning of
+		extrusions (TRC, T), None to create new extrusion
+	:return: vpython object of surface
+	"""
+	if isinstance(surface, P):
+		return surface.draw(label=False)[0]
+	if isinstance(surface, (TRC, T)):
+		return surface.draw(
+			segments=lod_segments(size), prototypes=prototypes)[0]
+	return surface.draw()[0]
+
+
+def draw_all(
+		surfaces: list = None, min_pixels: float = 1.0, compound=True,
+		chunk_size=COMPOUND_SIZE, scene=None, geometry=None):
+	"""
+	Draw surfaces in one batch: surfaces are grouped by type, material, color
+	and opacity, all objects are created first (without labels and without
+	waiting for browser) and then every group is merged in vpython.compound,
+	so browser renders few large objects instead of thousands small ones.
+	Surfaces smaller than min_pixels on canvas (when the whole model fits
+	canvas) are skipped, small cones and tori are drawn with less segments.
+	Cones and tori of repeated shapes are clones of hidden prototypes, which
+	are deleted after drawing
+
+	:param surfaces: list of surfaces and surface arrays (surfaces of
+		geometry by default)
+	:param min_pixels: minimum size of surface in pixels, 0 to draw all
+	:param compound: if True merge groups in vpython.compound objects
+	:param chunk_size: maximum number of objects in one compound
+	:param scene: vpython.canvas to draw in (selected canvas by default)
+	:param geometry: Geometry object (current geometry by default)
+	:return: list of vpython objects (compounds and single objects)
+	"""
+	import vpython  # Imported on first use, see HEADLESS in const module
+	if surfaces is None:
+		surfaces = current_geometry(geometry).surfaces
+	if scene is not None:
+		scene.select()
+	canvas = vpython.canvas.get_selected()
+	height = canvas.height if canvas is not None else 400  # vpython default
+
+	items, boxes = surface_boxes(surfaces)
+	sizes = screen_sizes(boxes, height)
+	keep = np.flatnonzero(sizes >= min_pixels)
+
+	drawn = [items[i] for i in keep]
+	drawn = [s[0][s[1]] if isinstance(s, tuple) else s for s in drawn]  # Arrays
+	shapes = [
+		prototype_key(s, lod_segments(sizes[i]))
+		if isinstance(s, (TRC, T)) else None for i, s in zip(keep, drawn)]
+	counts = collections.Counter(shapes)
+
+	groups = {}
+	prototypes = {}  # Hidden extrusions of this call, for repeated shapes
+	for i, s, shape in zip(keep, drawn, shapes):
+		key = (type(s), s.material.name, as_rgb(s.color), s.opacity)
+		repeated = shape is not None and counts[shape] > 1
+		groups.setdefault(key, []).append(
+			draw_surface(s, sizes[i], prototypes if repeated else None))
+	for prototype in prototypes.values():
+		prototype.delete()
+
+	if not compound:
+		return [obj for group in groups.values() for obj in group]
+	objects = []
+	for group in groups.values():
+		for i in range(0, len(group), chunk_size):
+			chunk = group[i:i + chunk_size]
+			objects.append(vpython.compound(chunk) if len(chunk) > 1 else chunk[0])
+	return objects
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
@@ -1,17 +1,31 @@
+import abc
+import functools
 import itertools
+import operator
+import numpy as np
 from numpy import linalg as la
 from numpy import format_float_positional, abs, power, sqrt, sum, random, \
 	amin, inner, cross
 from scipy.special import ellipe, ellipk
-from vpython import canvas, arrow, vertex, vector
 
 from .const import *
 from .material import Material, MAT_WATER
+from .geometry import DEFAULT_GEOMETRY, current_geometry
+from .mesh import plane_mesh, sphere_meshes, box_meshes, wedge_meshes, \
+	cylinder_meshes, circular_cylinder_meshes, torus_mesh, join_meshes
 
-# Counter for objects, every new object will have n+1 surface number
-surface_counter = itertools.count(1)
+# Counter for objects of default geometry, every new object will have n+1
+# surface number (every Geometry has its own counter)
+surface_counter = DEFAULT_GEOMETRY.surface_counter
 
-created_surfaces = []  # All objects after initialisation go here
+# All objects of default geometry after initialisation go here
+created_surfaces = DEFAULT_GEOMETRY.surfaces
+
+# Number of segments of circles for extrusions in draw (level of detail)
+DRAW_SEGMENTS = 32
+
+# Significant digits of shape parameters in keys of prototypes for cloning
+PROTOTYPE_DIGITS = 3
 
 
 def list_all_surfaces():
@@ -31,6 +45,7 @@ T (TX, TY, TZ) - general torus (rotational x, y, z axes);
 REC - Right elliptical cylinder (careful, because A and B vectors have only 
 magnitude meaning for visualization, direction of vectors is meaningless);
 WED - wedge surface, note that only right triangle can be used as bottom;
+SPHArray, RCCArray, RPPArray - arrays of SPH, RCC, RPP surfaces;
 ...
 Look at README.md for more information\n"""
 	print(text)
@@ -57,16 +72,20 @@ def create_scene(
 	:param background: set background color for scene
 	:return: vpython.canvas object
 	"""
-	scene = canvas(
+	import vpython  # Imported on first use, see HEADLESS in const module
+	scene = vpython.canvas(
 		width=width, height=height,
-		resizable=resizable, background=background)
+		resizable=resizable, background=as_vector(background))
 
 	if axes:  # Create axis
 		shaft_width = 0.003 * ax_length
 
-		ax_x = arrow(axis=vector(ax_length, 0, 0), color=RED)
-		ax_y = arrow(axis=vector(0, ax_length, 0), color=GREEN)
-		ax_z = arrow(axis=vector(0, 0, ax_length), color=BLUE)
+		ax_x = vpython.arrow(
+			axis=vpython.vector(ax_length, 0, 0), color=as_vector(RED))
+		ax_y = vpython.arrow(
+			axis=vpython.vector(0, ax_length, 0), color=as_vector(GREEN))
+		ax_z = vpython.arrow(
+			axis=vpython.vector(0, 0, ax_length), color=as_vector(BLUE))
 
 		for ax in [ax_x, ax_y, ax_z]:
 			ax.opacity = ax_opacity
@@ -89,6 +108,94 @@ def create_scene(
 	return scene
 
 
+def prototype_key(surface, segments: int):
+	"""
+	Get key of extrusion shape of TRC or T for cloning: shape parameters are
+	rounded to PROTOTYPE_DIGITS significant digits, so surfaces of nearly
+	the same shape share one prototype
+
+	:param surface: TRC or T object
+	:param segments: number of segments of circles
+	:return: tuple with type, rounded shape parameters and segments
+	"""
+	def q(value):
+		return float(f"{value:.{PROTOTYPE_DIGITS}g}")
+
+	if isinstance(surface, TRC):
+		return "TRC", q(surface.r_1), q(surface.r_2), q(surface.get_len_h), \
+			segments
+	width, height = (surface.c, surface.b) if surface.rot not in ("x", "z") \
+		else (surface.b, surface.c)
+	return "T", surface.rot, q(surface.r), q(width), q(height), segments
+
+
+def draw_prototype(prototypes: dict, key: tuple, make):
+	"""
+	Get hidden prototype object from cache, prototype is created by make()
+	on first use. Extrusions wait for browser on creation, clones of
+	prototype don't, so surfaces of the same shape are drawn as clones
+
+	:param prototypes: dictionary {key: prototype} of one canvas
+	:param key: tuple from prototype_key
+	:param make: function without parameters for new (hidden) vpython object
+	:return: vpython object
+	"""
+	prototype = prototypes.get(key)
+	if prototype is None:
+		prototype = prototypes[key] = make()
+	return prototype
+
+
+def as_points(points):
+	"""
+	Convert points to float array of (N, 3) shape
+
+	:param points: point [x, y, z] or array-like of points with (N, 3) shape
+	:return: numpy.ndarray with (N, 3) shape
+	"""
+	return np.asarray(points, dtype=float).reshape(-1, 3)
+
+
+def sense_sign(negative):
+	"""
+	Convert boolean mask of points on negative side of surface to sense array
+
+	:param negative: boolean array, True for points on negative side (inside)
+	:return: numpy.ndarray (int8) with -1 for negative and 1 for positive sense
+	"""
+	return 1 - 2 * negative.astype(np.int8)
+
+
+def unbounded_box():
+	"""
+	Get bounding box of unbounded region (marker with infinite limits)
+
+	:return: numpy.ndarray [[-inf, inf], [-inf, inf], [-inf, inf]]
+	"""
+	return np.array([[-np.inf, np.inf]] * 3)
+
+
+def disks_bounding_box(xyz0: list, h: list, r_1: float, r_2: float):
+	"""
+	Get axis-aligned bounding box of two parallel disks: bottom disk with
+	center xyz0 and top disk with center xyz0 + h, both orthogonal to h
+
+	:param xyz0: center of bottom disk [x0, y0, z0]
+	:param h: vector from bottom to top disk center [Hx, Hy, Hz]
+	:param r_1: radius of bottom disk
+	:param r_2: radius of top disk
+	:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	"""
+	xyz0 = np.asarray(xyz0, dtype=float)
+	h = np.asarray(h, dtype=float)
+	n = h / la.norm(h)
+	extent = np.sqrt(np.clip(1 - n ** 2, 0, None))  # Unit disk extent
+	top = xyz0 + h
+	return np.column_stack([
+		np.minimum(xyz0 - r_1 * extent, top - r_2 * extent),
+		np.maximum(xyz0 + r_1 * extent, top + r_2 * extent)])
+
+
 def notation(f: float):
 	"""
 	Function returns nice looking string with number for surface labels
@@ -99,7 +206,50 @@ def notation(f: float):
 	return format_float_positional(f, precision=3, trim="-")
 
 
-class Surface:  # superclass with common properties/methods for all surfaces
+def store_vector(vector, shared=False):
+	"""
+	Get vector parameter for storing in surface: in compact geometry (see
+	Geometry) vectors are tuples, directions are shared by surfaces with
+	equal directions (positions are mostly distinct, they are not shared),
+	otherwise vector is stored as is
+
+	:param vector: list with vector components
+	:param shared: if True share equal vectors in compact geometry
+	:return: vector as is or tuple
+	"""
+	vectors = current_geometry().vectors
+	if vectors is None:
+		return vector
+	vector = tuple(vector)
+	if not shared:
+		return vector
+	# Keyed by text: equal vectors are printed differently for 0 and 0.0
+	# (or -0.0), such vectors aren't shared
+	return vectors.setdefault(repr(vector), vector)
+
+
+def set_component(vector, i: int, value):
+	"""
+	Set component of vector parameter: list is changed in place, tuple of
+	compact geometry is replaced
+
+	:param vector: list or tuple with vector components
+	:param i: index of component
+	:param value: new value of component
+	:return: vector with new component
+	"""
+	if isinstance(vector, tuple):
+		return vector[:i] + (value,) + vector[i + 1:]
+	vector[i] = value
+	return vector
+
+
+class Surface(abc.ABC):  # superclass with common properties/methods for all surfaces
+	# Fixed attributes without __dict__: small memory footprint for models
+	# with many surfaces, subclasses define slots for their parameters
+	__slots__ = (
+		"__name", "__sn", "__trn", "__material", "__color", "__opacity",
+		"__bounding_box")
 
 	def __init__(
 			self, name="Surface", trn="", material=MAT_WATER):
@@ -114,10 +264,12 @@ class Surface:  # superclass with common properties/methods for all surfaces
 		self.trn = trn
 		self.material = material
 
-		self.sn = next(surface_counter)
-		self.color = ANGEL_COLORS[self.material.color]
+		geometry = current_geometry()
+		self.sn = next(geometry.surface_counter)
+		self.color = None  # Color of material
 
 		self.opacity = 1.0
+		geometry.surfaces.append(self)
 
 	# Overload operators
 	# Positive sign
@@ -207,18 +359,20 @@ class Surface:  # superclass with common properties/methods for all surfaces
 	@property
 	def color(self):
 		"""
-		Get surface color
+		Get surface color, color of surface material if color isn't set
 
 		:return: color of surface
 		"""
+		if self.__color is None:
+			return ANGEL_COLORS[self.material.color]
 		return self.__color
 
 	@color.setter
-	def color(self, color: vector):
+	def color(self, color):
 		"""
 		Set surface color
 
-		:param color: color
+		:param color: color, None to use color of surface material
 		"""
 		self.__color = color
 
@@ -248,10 +402,106 @@ class Surface:  # superclass with common properties/methods for all surfaces
 		if self.material.matn == 0:
 			self.__opacity = 0.02
 
+	phits_groups = ()  # Numbers of parameters in groups of PHITS definition
+
+	@abc.abstractmethod
+	def phits_fields(self):
+		"""
+		Get fields of PHITS surface definition
+
+		:return: tuple (symbol, list of parameters, description for comment)
+		"""
+
+	def phits_print(self):
+		"""
+		Print PHITS surface definition
+
+		:return: string with PHITS surface definition
+		"""
+		symbol, values, description = self.phits_fields()
+		return phits_definitions(
+			self.phits_groups, (self.sn,), (self.trn,), (symbol,),
+			list(map(str, values)), (self.name,), (description,))[0]
+
+	def reset_bounding_box(self):
+		"""
+		Reset cached bounding box, called by setters of surface parameters
+
+		"""
+		self.__bounding_box = None
+
+	@property
+	def bounding_box(self):
+		"""
+		Get axis-aligned bounding box of surface, cached until any parameter
+		of surface is set again (in-place change of lists isn't tracked)
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		if self.__bounding_box is None:
+			self.__bounding_box = self.get_bounding_box
+			self.__bounding_box.flags.writeable = False
+		return self.__bounding_box
+
+	@property
+	def get_bounding_box(self):
+		"""
+		Get analytic axis-aligned bounding box of surface (not cached)
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		return unbounded_box()
+
+	def halfspace_bounding_box(self, negative: bool):
+		"""
+		Get bounding box of region on one side of surface: negative side of
+		closed surface is bounded by its bounding box, positive is unbounded
+
+		:param negative: True for negative side (-sn), False for positive (+sn)
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		if negative:
+			return self.bounding_box
+		return unbounded_box()
+
+	@abc.abstractmethod
+	def sense(self, points):
+		"""
+		Get surface sense for every point in one vectorized call,
+		points lying on surface belong to negative side (trn is not applied)
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+
+	def mesh(self, segments: int = 24):
+		"""
+		Get triangle mesh of surface, triangles are counterclockwise when
+		viewed from outside (trn is not applied)
+
+		:param segments: number of segments for round surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return self.meshes([self], segments)
+
+	@classmethod
+	@abc.abstractmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of many surfaces of this class, vectorized
+		over surfaces
+
+		:param surfaces: list of surfaces of this class
+		:param segments: number of segments for round surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+
 
 class P(Surface):
 	symbol_p = "P"
 	symbol_px, symbol_py, symbol_pz = "PX", "PY", "PZ"
+	__slots__ = ("__a", "__b", "__c", "__d", "__vert")
+	phits_groups = (3, 1)
 
 	def __init__(
 			self,
@@ -281,9 +531,8 @@ class P(Surface):
 		self.c = c
 		self.d = d
 
-		Surface.__init__(self, name, trn)
 		self.vert = vert
-		created_surfaces.append(self)
+		Surface.__init__(self, name, trn)
 
 	@property
 	def a(self):
@@ -302,6 +551,7 @@ class P(Surface):
 		:param a: parameter A
 		"""
 		self.__a = a
+		self.reset_bounding_box()
 
 	@property
 	def b(self):
@@ -320,6 +570,7 @@ class P(Surface):
 		:param b: parameter B
 		"""
 		self.__b = b
+		self.reset_bounding_box()
 
 	@property
 	def c(self):
@@ -338,6 +589,7 @@ class P(Surface):
 		:param c: parameter C
 		"""
 		self.__c = c
+		self.reset_bounding_box()
 
 	@property
 	def d(self):
@@ -356,6 +608,7 @@ class P(Surface):
 		:param d: D parameter
 		"""
 		self.__d = d
+		self.reset_bounding_box()
 
 	@property
 	def vert(self):
@@ -374,6 +627,7 @@ class P(Surface):
 		:param vert: string with axis ("", "x" "y" or "z")
 		"""
 		self.__vert = vert
+		self.reset_bounding_box()
 
 	@property
 	def equation_p(self):
@@ -403,32 +657,91 @@ class P(Surface):
 		print(f"{prefix} trn:", self.trn)
 		print(f"{prefix} axis to which plane is vertical:", self.vert)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Prints PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
 		"""
 		symbol = self.symbol_p
 		equation = self.equation_p
-		a, b, c = self.a, self.b, self.c
+		a, b, c = self.__a, self.__b, self.__c
 
-		if self.vert != "":
+		if self.__vert != "":
 			a, b, c = "", "", ""
 			equation = self.equation_pxyz
-			if self.vert == "x":
+			if self.__vert == "x":
 				symbol = self.symbol_px
-			elif self.vert == "y":
+			elif self.__vert == "y":
 				symbol = self.symbol_py
-			elif self.vert == "z":
+			elif self.__vert == "z":
 				symbol = self.symbol_pz
 
-		txt = f"    {self.sn} {self.trn}  {symbol}  {a} {b}" + \
-			f" {c}  {self.d} $ name: '{self.name}' (Plane) {equation}"
+		return \
+			symbol, [scalar_field(v) for v in (a, b, c, self.__d)], \
+			f"(Plane) {equation}"
+
+	def halfspace_bounding_box(self, negative: bool):
+		"""
+		Get bounding box of region on one side of plane, bounded only along
+		axis for planes vertical to x, y or z axes
+
+		:param negative: True for negative side (-sn), False for positive (+sn)
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		box = unbounded_box()
+		if self.vert in ("x", "y", "z"):
+			axis, d = "xyz".index(self.vert), self.d
+		else:
+			normal = np.array([self.a, self.b, self.c], dtype=float)
+			if np.count_nonzero(normal) != 1:
+				return box  # Inclined plane
+			axis = int(np.flatnonzero(normal)[0])
+			d = self.d / normal[axis]
+			negative = negative == (normal[axis] > 0)
+		box[axis, 1 if negative else 0] = d
+		return box
+
+	def sense(self, points):
+		"""
+		Get plane sense for points: -1 where Ax + By + Cz − D <= 0
+		(x <= D, y <= D or z <= D for vertical planes)
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		p = as_points(points)
+		if self.vert in ("x", "y", "z"):
+			f = p[:, "xyz".index(self.vert)] - self.d
+		else:
+			f = p @ np.array([self.a, self.b, self.c], dtype=float) - self.d
+		return sense_sign(f <= 0)
+
+	def mesh(self, segments: int = 24, size: float = 10):
+		"""
+		Get triangle mesh of square part of plane, triangles face positive
+		side of plane
+
+		:param segments: dummy parameter, same as for other surfaces
+		:param size: half of square side
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		if self.vert in ("x", "y", "z"):
+			normal = np.eye(3)["xyz".index(self.vert)]
+		else:
+			normal = np.array([self.a, self.b, self.c], dtype=float)
+		return plane_mesh(normal, self.d, size)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of square parts of planes
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+		:param surfaces: list of planes
+		:param segments: dummy parameter, same as for other surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return join_meshes([s.mesh(segments) for s in surfaces])
 
 	def draw(self, size: float = 10, opacity=0.2, label=True):
 		"""
@@ -439,6 +752,7 @@ class P(Surface):
 		:param label: If True create label for object
 		:return: vpython.quad and vpython.label objects
 		"""
+		import vpython
 		symbol = self.symbol_p
 
 		if self.a == 1 and self.b == 0 and self.c == 0:
@@ -482,18 +796,18 @@ class P(Surface):
 			color1, color2, color3, color4 = CYAN, MAGENTA, YELLOW, WHITE
 
 		# Plane made with 4 vertexes
-		dot1 = vertex(
-			pos=vector(x[0], y[0], z[0]),
-			color=color1, opacity=opacity)
-		dot2 = vertex(
-			pos=vector(x[1], y[1], z[1]),
-			color=color2, opacity=opacity)
-		dot3 = vertex(
-			pos=vector(x[2], y[2], z[2]),
-			color=color3, opacity=opacity)
-		dot4 = vertex(
-			pos=vector(x[3], y[3], z[3]),
-			color=color4, opacity=opacity)
+		dot1 = vpython.vertex(
+			pos=vpython.vector(x[0], y[0], z[0]),
+			color=as_vector(color1), opacity=opacity)
+		dot2 = vpython.vertex(
+			pos=vpython.vector(x[1], y[1], z[1]),
+			color=as_vector(color2), opacity=opacity)
+		dot3 = vpython.vertex(
+			pos=vpython.vector(x[2], y[2], z[2]),
+			color=as_vector(color3), opacity=opacity)
+		dot4 = vpython.vertex(
+			pos=vpython.vector(x[3], y[3], z[3]),
+			color=as_vector(color4), opacity=opacity)
 		plane = vpython.quad(vs=[dot1, dot2, dot3, dot4])
 
 		lbl = None
@@ -508,6 +822,8 @@ class P(Surface):
 class SPH(Surface):
 
 	symbol = "SPH"
+	__slots__ = ("__xyz0", "__r")
+	phits_groups = (3, 1)
 
 	def __init__(
 			self, xyz0: list = None, r=1.0,
@@ -529,7 +845,6 @@ class SPH(Surface):
 		self.r = r
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def xyz0(self):
@@ -547,7 +862,8 @@ class SPH(Surface):
 
 		:param xyz0: list [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -565,7 +881,8 @@ class SPH(Surface):
 
 		:param x0: float x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -583,7 +900,8 @@ class SPH(Surface):
 
 		:param y0: float y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -601,7 +919,8 @@ class SPH(Surface):
 
 		:param z0: float z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def r(self):
@@ -620,6 +939,7 @@ class SPH(Surface):
 		:param r: radius
 		"""
 		self.__r = r
+		self.reset_bounding_box()
 
 	@property
 	def diameter(self):
@@ -723,21 +1043,47 @@ class SPH(Surface):
 		print(f"{prefix} cross section:", self.cross_section)
 		print(f"{prefix} circumference:", self.circumference)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
+		"""
+		return \
+			self.symbol, [*self.__xyz0, scalar_field(self.__r)], \
+			"(sphere) x0 y0 z0 R"
+
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box as center +- R
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		xyz0 = np.asarray(self.xyz0, dtype=float)
+		return np.column_stack([xyz0 - self.r, xyz0 + self.r])
+
+	def sense(self, points):
+		"""
+		Get sphere sense for points: -1 inside sphere, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {self.r}" + \
-			f" $ name: '{self.name}' (sphere) x0 y0 z0 R"
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		return sense_sign(np.einsum("ij,ij->i", d, d) <= self.r ** 2)
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of spheres (segments // 2 rings of latitude)
+
+		:param surfaces: list of spheres
+		:param segments: number of segments of rings
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return sphere_meshes(
+			[s.xyz0 for s in surfaces], [s.r for s in surfaces], segments)
 
 	def draw(self, opacity: float = None, label_center=False, label_base=False):
 		"""
@@ -748,14 +1094,15 @@ class SPH(Surface):
 		:param label_base: dummy flag, same as label_center for sphere
 		:return: vpython.sphere object
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
 			self.opacity = opacity
 
 		sph = vpython.sphere(
-			pos=vector(self.x0, self.y0, self.z0),
-			color=self.color, opacity=self.opacity,
+			pos=vpython.vector(self.x0, self.y0, self.z0),
+			color=as_vector(self.color), opacity=self.opacity,
 			radius=self.r)
 
 		lbl = None
@@ -778,6 +1125,8 @@ class SPH(Surface):
 class BOX(Surface):
 
 	symbol = "BOX"
+	__slots__ = ("__xyz0", "__a", "__b", "__c")
+	phits_groups = (3, 3, 3, 3)
 
 	def __init__(
 			self,
@@ -810,7 +1159,6 @@ class BOX(Surface):
 		self.c = c
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def xyz0(self):
@@ -828,7 +1176,8 @@ class BOX(Surface):
 
 		:param xyz0: list [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -846,7 +1195,8 @@ class BOX(Surface):
 
 		:param x0: float x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -864,7 +1214,8 @@ class BOX(Surface):
 
 		:param y0: float y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -882,7 +1233,8 @@ class BOX(Surface):
 
 		:param z0: float z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def a(self):
@@ -900,7 +1252,8 @@ class BOX(Surface):
 
 		:param a: list A [Ax, Ay, Az]
 		"""
-		self.__a = a
+		self.__a = store_vector(a, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def b(self):
@@ -918,7 +1271,8 @@ class BOX(Surface):
 
 		:param b: list B [Bx, By, Bz]
 		"""
-		self.__b = b
+		self.__b = store_vector(b, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def c(self):
@@ -936,7 +1290,8 @@ class BOX(Surface):
 
 		:param c: list C [Cx, Cy, Cz]
 		"""
-		self.__c = c
+		self.__c = store_vector(c, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def get_center(self):
@@ -1058,25 +1413,57 @@ class BOX(Surface):
 		print(f"{prefix} BC area:", self.get_bc_area)
 		print(f"{prefix} full area:", self.get_full_area)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
+		"""
+		return \
+			self.symbol, [*self.__xyz0, *self.__a, *self.__b, *self.__c], \
+			"(box, all angles are 90deg) " + \
+			"[x0 y0 z0] [Ax Ay Az] [Bx By Bz] [Cx Cy Cz]"
+
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box of all 8 box vertices
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		xyz0 = np.asarray(self.xyz0, dtype=float)
+		edges = np.array([self.a, self.b, self.c], dtype=float)
+		return np.column_stack([
+			xyz0 + np.minimum(edges, 0).sum(axis=0),
+			xyz0 + np.maximum(edges, 0).sum(axis=0)])
+
+	def sense(self, points):
+		"""
+		Get box sense for points: -1 inside box, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		inside = np.ones(len(d), dtype=bool)
+		for v in (self.a, self.b, self.c):
+			v = np.asarray(v, dtype=float)
+			t = d @ (v / np.dot(v, v))  # Projection on edge vector
+			inside &= (t >= 0) & (t <= 1)
+		return sense_sign(inside)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
-		a = " ".join(str(i) for i in self.a)
-		b = " ".join(str(i) for i in self.b)
-		c = " ".join(str(i) for i in self.c)
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {a}  {b}  {c}" + \
-			f" $ name: '{self.name}' " + \
-			"(box, all angles are 90deg) [x0 y0 z0] [Ax Ay Az] [Bx By Bz] [Cx Cy Cz]"
+		Get joined triangle mesh of boxes (12 triangles for box)
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+		:param surfaces: list of boxes
+		:param segments: dummy parameter, same as for other surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return box_meshes(*(
+			np.array([getattr(s, v) for s in surfaces], dtype=float)
+			for v in ("xyz0", "a", "b", "c")))
 
 	def draw(self, opacity: float = None, label_base=False, label_center=False):
 		"""
@@ -1087,6 +1474,7 @@ class BOX(Surface):
 		:param label_center: if True create label for object center
 		:return: vpython.box and vpython.label objects
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
@@ -1097,11 +1485,11 @@ class BOX(Surface):
 		z0 = self.get_center[2]
 
 		# TODO: recheck
-		direction = vector(self.c[0], self.c[1], self.c[2])
+		direction = vpython.vector(self.c[0], self.c[1], self.c[2])
 
 		box = vpython.box(
-			color=self.color, opacity=self.opacity,
-			pos=vector(x0, y0, z0),
+			color=as_vector(self.color), opacity=self.opacity,
+			pos=vpython.vector(x0, y0, z0),
 			length=self.get_len_c,
 			height=self.get_len_b,
 			width=self.get_len_a,
@@ -1131,7 +1519,7 @@ class BOX(Surface):
 
 			txt_b = txt + f"base: ({xb}, {yb}, {zb})"
 			lbl_b = vpython.label(
-				pos=vector(self.xyz0[0], self.xyz0[1], self.xyz0[2]),
+				pos=vpython.vector(self.xyz0[0], self.xyz0[1], self.xyz0[2]),
 				text=txt_b, font="monospace", box=False, opacity=0.5, border=6,
 				# for opposite directions
 				xoffset=(-1) ** self.sn * 20 * random.random(),
@@ -1144,6 +1532,8 @@ class BOX(Surface):
 class RPP(Surface):
 
 	symbol = "RPP"
+	__slots__ = ("__x", "__y", "__z")
+	phits_groups = (2, 2, 2)
 
 	def __init__(
 			self,
@@ -1173,7 +1563,6 @@ class RPP(Surface):
 		self.z = z
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def x(self):
@@ -1191,7 +1580,8 @@ class RPP(Surface):
 
 		:param x: [x_min, x_max]
 		"""
-		self.__x = x
+		self.__x = store_vector(x)
+		self.reset_bounding_box()
 
 	@property
 	def y(self):
@@ -1209,7 +1599,8 @@ class RPP(Surface):
 
 		:param y: [y_min, y_max]
 		"""
-		self.__y = y
+		self.__y = store_vector(y)
+		self.reset_bounding_box()
 
 	@property
 	def z(self):
@@ -1227,7 +1618,8 @@ class RPP(Surface):
 
 		:param z: [z_min, z_max]
 		"""
-		self.__z = z
+		self.__z = store_vector(z)
+		self.reset_bounding_box()
 
 	@property
 	def get_width(self):
@@ -1341,24 +1733,51 @@ class RPP(Surface):
 		print(f"{prefix} height*length area:", self.get_hl_area)
 		print(f"{prefix} full area:", self.get_full_area)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
 		"""
-		x = " ".join(str(i) for i in self.x)
-		y = " ".join(str(i) for i in self.y)
-		z = " ".join(str(i) for i in self.z)
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {x}  {y}  {z}" + \
-			f" $ name: '{self.name}' " + \
+		return \
+			self.symbol, [*self.__x, *self.__y, *self.__z], \
 			"(Rectangular solid) [x_min x_max] [y_min y_max] [z_min z_max]"
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box, same as rectangular solid itself
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		return np.array([self.x, self.y, self.z], dtype=float)
+
+	def sense(self, points):
+		"""
+		Get rectangular solid sense for points: -1 inside, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		p = as_points(points)
+		inside = np.ones(len(p), dtype=bool)
+		for i, (v_min, v_max) in enumerate((self.x, self.y, self.z)):
+			inside &= (p[:, i] >= v_min) & (p[:, i] <= v_max)
+		return sense_sign(inside)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of rectangular solids (12 triangles for solid)
+
+		:param surfaces: list of rectangular solids
+		:param segments: dummy parameter, same as for other surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		limits = np.array(
+			[[s.x, s.y, s.z] for s in surfaces], dtype=float).reshape(-1, 3, 2)
+		edges = limits[:, :, 1] - limits[:, :, 0]
+		return box_meshes(limits[:, :, 0], *(edges[None] * np.eye(3)[:, None]))
 
 	def draw(self, opacity: float = None, label_center=False):
 		"""
@@ -1368,6 +1787,7 @@ class RPP(Surface):
 		:param label_center: if True create label for object
 		:return: vpython.box and vpython.label objects
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
@@ -1378,8 +1798,8 @@ class RPP(Surface):
 		z0 = self.get_center[2]
 
 		box = vpython.box(
-			color=self.color, opacity=self.opacity,
-			pos=vector(x0, y0, z0),
+			color=as_vector(self.color), opacity=self.opacity,
+			pos=vpython.vector(x0, y0, z0),
 			length=self.get_width,  # x and z swap
 			height=self.get_height,
 			width=self.get_length)  # x and z swap
@@ -1406,6 +1826,8 @@ class RPP(Surface):
 class RCC(Surface):
 
 	symbol = "RCC"
+	__slots__ = ("__xyz0", "__h", "__r")
+	phits_groups = (3, 3, 1)
 
 	def __init__(
 			self,
@@ -1432,7 +1854,6 @@ class RCC(Surface):
 		self.r = r
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def xyz0(self):
@@ -1450,7 +1871,8 @@ class RCC(Surface):
 
 		:param xyz0: [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -1468,7 +1890,8 @@ class RCC(Surface):
 
 		:param x0: float x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -1486,7 +1909,8 @@ class RCC(Surface):
 
 		:param y0: float y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -1504,7 +1928,8 @@ class RCC(Surface):
 
 		:param z0: float z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def h(self):
@@ -1522,7 +1947,8 @@ class RCC(Surface):
 
 		:param h: list [Hx, Hy, Hz]
 		"""
-		self.__h = h
+		self.__h = store_vector(h, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def r(self):
@@ -1541,6 +1967,7 @@ class RCC(Surface):
 		:param r: radius
 		"""
 		self.__r = r
+		self.reset_bounding_box()
 
 	@property
 	def diameter(self):
@@ -1662,22 +2089,53 @@ class RCC(Surface):
 		print(f"{prefix} side area:", self.get_side_area)
 		print(f"{prefix} full area:", self.get_full_area)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
+		"""
+		return \
+			self.symbol, [*self.__xyz0, *self.__h, scalar_field(self.__r)], \
+			"(cylinder) [x0 y0 z0] [Hx Hy Hz] R"
+
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box of bottom and top faces
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		return disks_bounding_box(self.xyz0, self.h, self.r, self.r)
+
+	def sense(self, points):
+		"""
+		Get cylinder sense for points: -1 inside cylinder, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		h = np.asarray(self.h, dtype=float)
+		t = d @ (h / np.dot(h, h))  # Fraction of height vector
+		radial = d - np.outer(t, h)
+		inside = \
+			(t >= 0) & (t <= 1) & \
+			(np.einsum("ij,ij->i", radial, radial) <= self.r ** 2)
+		return sense_sign(inside)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
-		h = " ".join(str(i) for i in self.h)
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {h}  {self.r}" + \
-			f" $ name: '{self.name}' (cylinder) [x0 y0 z0] [Hx Hy Hz] R"
+		Get joined triangle mesh of cylinders
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+		:param surfaces: list of cylinders
+		:param segments: number of segments of bases
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		r = [s.r for s in surfaces]
+		return circular_cylinder_meshes(
+			[s.xyz0 for s in surfaces], [s.h for s in surfaces], r, r, segments)
 
 	def draw(self, opacity: float = None, label_base=False, label_center=False):
 		"""
@@ -1688,6 +2146,7 @@ class RCC(Surface):
 		:param label_center: if True create label for object center
 		:return: vpython.cylinder object
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
@@ -1697,11 +2156,11 @@ class RCC(Surface):
 		y0 = self.xyz0[1]
 		z0 = self.xyz0[2]
 
-		direction = vector(self.h[0], self.h[1], self.h[2])
+		direction = vpython.vector(self.h[0], self.h[1], self.h[2])
 
 		cyl = vpython.cylinder(
-			color=self.color, opacity=self.opacity,
-			pos=vector(x0, y0, z0),
+			color=as_vector(self.color), opacity=self.opacity,
+			pos=vpython.vector(x0, y0, z0),
 			axis=direction,
 			radius=self.r)
 
@@ -1714,7 +2173,7 @@ class RCC(Surface):
 
 			txt_c = txt + f"center: ({xc}, {yc}, {zc})"
 			lbl_c = vpython.label(
-				pos=vector(self.get_center[0], self.get_center[1], self.get_center[2]),
+				pos=vpython.vector(self.get_center[0], self.get_center[1], self.get_center[2]),
 				text=txt_c, font="monospace", box=False, opacity=0.5, border=6,
 				# for opposite directions
 				xoffset=(-1) ** self.sn * 20 * random.random(),
@@ -1740,6 +2199,8 @@ class RCC(Surface):
 class TRC(Surface):
 
 	symbol = "TRC"
+	__slots__ = ("__xyz0", "__h", "__r_1", "__r_2")
+	phits_groups = (3, 3, 1, 1)
 
 	def __init__(
 			self,
@@ -1768,7 +2229,6 @@ class TRC(Surface):
 		self.r_2 = r_2
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def xyz0(self):
@@ -1786,7 +2246,8 @@ class TRC(Surface):
 
 		:param xyz0: [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -1804,7 +2265,8 @@ class TRC(Surface):
 
 		:param x0: x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -1822,7 +2284,8 @@ class TRC(Surface):
 
 		:param y0: y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -1840,7 +2303,8 @@ class TRC(Surface):
 
 		:param z0: z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def h(self):
@@ -1858,7 +2322,8 @@ class TRC(Surface):
 
 		:param h: [Hx, Hy, Hz]
 		"""
-		self.__h = h
+		self.__h = store_vector(h, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def r_1(self):
@@ -1877,6 +2342,7 @@ class TRC(Surface):
 		:param r_1: bottom radius
 		"""
 		self.__r_1 = r_1
+		self.reset_bounding_box()
 
 	@property
 	def r_2(self):
@@ -1895,6 +2361,7 @@ class TRC(Surface):
 		:param r_2: top radius
 		"""
 		self.__r_2 = r_2
+		self.reset_bounding_box()
 
 	@property
 	def bottom_diameter(self):
@@ -2085,27 +2552,61 @@ class TRC(Surface):
 		print(f"{prefix} side area:", self.get_side_area)
 		print(f"{prefix} full area:", self.get_full_area)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
-		h = " ".join(str(i) for i in self.h)
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {h}  {self.r_1}  {self.r_2}" + \
-			f" $ name: '{self.name}' " + \
+		return \
+			self.symbol, [
+				*self.__xyz0, *self.__h,
+				scalar_field(self.__r_1), scalar_field(self.__r_2)], \
 			"(truncated right-angle cone) [x0 y0 z0] [Hx Hy Hz] R_b R_t"
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box of bottom and top faces
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		return disks_bounding_box(self.xyz0, self.h, self.r_1, self.r_2)
+
+	def sense(self, points):
+		"""
+		Get cone sense for points: -1 inside cone, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		h = np.asarray(self.h, dtype=float)
+		t = d @ (h / np.dot(h, h))  # Fraction of height vector
+		radial = d - np.outer(t, h)
+		r = self.r_1 + (self.r_2 - self.r_1) * t  # Radius at t
+		inside = \
+			(t >= 0) & (t <= 1) & \
+			(np.einsum("ij,ij->i", radial, radial) <= r ** 2)
+		return sense_sign(inside)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of truncated cones
+
+		:param surfaces: list of truncated cones
+		:param segments: number of segments of bases
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return circular_cylinder_meshes(
+			[s.xyz0 for s in surfaces], [s.h for s in surfaces],
+			[s.r_1 for s in surfaces], [s.r_2 for s in surfaces], segments)
 
 	def draw(
 			self, opacity: float = None,
-			label_base=False, label_center=False, truncated=True):
+			label_base=False, label_center=False, truncated=True,
+			segments: int = DRAW_SEGMENTS, prototypes: dict = None):
 		"""
 		Draw surface using vpython
 
@@ -2113,17 +2614,22 @@ class TRC(Surface):
 		:param label_base: if True create label for object base
 		:param label_center: if True create label for object center
 		:param truncated: if True draw as truncated, otherwise simple cone
+		:param segments: number of segments of circles (level of detail)
+		:param prototypes: dictionary of hidden prototypes (see draw_all),
+			truncated cone is drawn as clone of prototype of its shape, None
+			to create new extrusion
 		:return: vpython.cylinder object
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
 			self.opacity = opacity
 
-		color = self.color
+		color = as_vector(self.color)
 		opacity = self.opacity
-		position = vector(self.x0, self.y0, self.z0)
-		direction = vector(self.h[0], self.h[1], self.h[2])
+		position = vpython.vector(self.x0, self.y0, self.z0)
+		direction = vpython.vector(self.h[0], self.h[1], self.h[2])
 
 		if truncated:
 			# TODO: should work for every case (truncated or not),
@@ -2131,14 +2637,31 @@ class TRC(Surface):
 			#  Sometimes works not as expected!
 			r1 = self.r_1
 			r2 = self.r_2
-			r_min = amin([r1, r2])
 			h = self.get_len_h
 
-			s = [[-r1, 0], [-r2, h], [r2, h], [r1, 0], [-r1, 0]]  # Shape
-			p = vpython.paths.circle(pos=position, up=direction, radius=r_min/1e3)
-
-			cone = vpython.extrusion(
-				path=p, shape=s, opacity=opacity, color=color, up=direction)
+			if prototypes is None:
+				s = [[-r1, 0], [-r2, h], [r2, h], [r1, 0], [-r1, 0]]  # Shape
+				p = vpython.paths.circle(
+					pos=position, up=direction, radius=amin([r1, r2])/1e3,
+					np=segments)
+				cone = vpython.extrusion(
+					path=p, shape=s, opacity=opacity, color=color, up=direction)
+			else:
+				key = prototype_key(self, segments)
+
+				def make():  # White cone along y axis, color is set for clones
+					_, r1, r2, h, _ = key
+					s = [[-r1, 0], [-r2, h], [r2, h], [r1, 0], [-r1, 0]]  # Shape
+					p = vpython.paths.circle(radius=amin([r1, r2])/1e3, np=segments)
+					return vpython.extrusion(path=p, shape=s, visible=False)
+
+				up = direction.norm()
+				axis = up.cross(vpython.vector(1, 0, 0))
+				if axis.mag < 1e-6:  # Cone along x axis
+					axis = up.cross(vpython.vector(0, 0, 1))
+				cone = draw_prototype(prototypes, key, make).clone(
+					pos=vpython.vector(*self.get_center), axis=axis, up=up,
+					color=color, opacity=opacity, visible=True)
 
 		else:  # TODO: works only for not truncated cones
 			cone = vpython.cone(
@@ -2154,7 +2677,7 @@ class TRC(Surface):
 
 			txt_c = txt + f"center: ({xc}, {yc}, {zc})"
 			lbl_c = vpython.label(
-				pos=vector(self.get_center[0], self.get_center[1], self.get_center[2]),
+				pos=vpython.vector(self.get_center[0], self.get_center[1], self.get_center[2]),
 				text=txt_c, font="monospace", box=False, opacity=0.5, border=6,
 				# for opposite directions
 				xoffset=(-1) ** self.sn * 20 * random.random(),
@@ -2178,6 +2701,8 @@ class TRC(Surface):
 
 class T(Surface):
 	symbol_tx, symbol_ty, symbol_tz = "TX", "TY", "TZ"
+	__slots__ = ("__xyz0", "__r", "__b", "__c", "__rot")
+	phits_groups = (3, 1, 1, 1)
 
 	def __init__(
 			self, xyz0: list = None, r=0.5, b=0.08, c=0.1,
@@ -2203,9 +2728,9 @@ class T(Surface):
 		self.b = b
 		self.c = c
 
-		Surface.__init__(self, name, trn, material)
 		self.rot = rot
-		created_surfaces.append(self)
+
+		Surface.__init__(self, name, trn, material)
 
 	@property
 	def xyz0(self):
@@ -2223,7 +2748,8 @@ class T(Surface):
 
 		:param xyz0: [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -2241,7 +2767,8 @@ class T(Surface):
 
 		:param x0: float x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -2259,7 +2786,8 @@ class T(Surface):
 
 		:param y0: float y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -2277,7 +2805,8 @@ class T(Surface):
 
 		:param z0: float z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def r(self):
@@ -2296,6 +2825,7 @@ class T(Surface):
 		:param r: Float R parameter
 		"""
 		self.__r = r
+		self.reset_bounding_box()
 
 	@property
 	def b(self):
@@ -2314,6 +2844,7 @@ class T(Surface):
 		:param b: parameter B
 		"""
 		self.__b = b
+		self.reset_bounding_box()
 
 	@property
 	def c(self):
@@ -2332,6 +2863,7 @@ class T(Surface):
 		:param c: parameter C
 		"""
 		self.__c = c
+		self.reset_bounding_box()
 
 	@property
 	def rot(self):
@@ -2350,6 +2882,7 @@ class T(Surface):
 		:param rot: string with axis ("x" "y" or "z")
 		"""
 		self.__rot = rot
+		self.reset_bounding_box()
 
 	@property
 	def circumference(self):
@@ -2442,34 +2975,78 @@ class T(Surface):
 		print(f"{prefix} full area:", self.get_full_area)
 		print(f"{prefix} volume:", self.get_volume)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
+		"""
+		return \
+			self.symbol, [
+				*self.__xyz0,
+				*(scalar_field(v) for v in (self.__r, self.__b, self.__c))], \
+			f"(torus, with {self.rot} rotational axis) [x0 y0 z0] A(R) B C"
+
+	@property
+	def get_bounding_box(self):
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
+		Get axis-aligned bounding box: +- B along rotational axis and
+		+- (R + C) along other axes
 
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {self.r}  {self.b}  {self.c}" + \
-			f" $ name: '{self.name}' " + \
-			f"(torus, with {self.rot} rotational axis) " + \
-			"[x0 y0 z0] A(R) B C"
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		xyz0 = np.asarray(self.xyz0, dtype=float)
+		extent = np.full(3, self.r + self.c, dtype=float)
+		extent[{"x": 0, "z": 2}.get(self.rot, 1)] = self.b
+		return np.column_stack([xyz0 - extent, xyz0 + extent])
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+	def sense(self, points):
+		"""
+		Get torus sense for points: -1 inside torus, 1 outside,
+		for TX: (x-x0)^2/B^2 + (sqrt((y-y0)^2 + (z-z0)^2) - A)^2/C^2 - 1 <= 0
 
-	def draw(self, opacity: float = None, label_center=False, label_base=False):
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		axis = {"x": 0, "z": 2}.get(self.rot, 1)  # y axis by default
+		axial = d[:, axis]
+		# Difference may be slightly negative near axis due to rounding
+		rho = np.sqrt(np.maximum(np.einsum("ij,ij->i", d, d) - axial ** 2, 0))
+		f = (axial / self.b) ** 2 + ((rho - self.r) / self.c) ** 2
+		return sense_sign(f <= 1)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of tori (tube has segments // 2 segments)
+
+		:param surfaces: list of tori
+		:param segments: number of segments around rotational axis
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return join_meshes([
+			torus_mesh(
+				s.xyz0, np.eye(3)[{"x": 0, "z": 2}.get(s.rot, 1)],
+				s.r, s.b, s.c, segments)
+			for s in surfaces])
+
+	def draw(
+			self, opacity: float = None, label_center=False, label_base=False,
+			segments: int = DRAW_SEGMENTS, prototypes: dict = None):
 		"""
 		Draw surface using vpython
 
 		:param opacity: set surface opacity, where 1.0 - fully visible
 		:param label_center: If True create label for object
 		:param label_base: Dummy, same as label_center
+		:param segments: number of segments of circles (level of detail)
+		:param prototypes: dictionary of hidden prototypes (see draw_all),
+			torus is drawn as clone of prototype of its shape, None to create
+			new extrusion
 		:return: vpython.ring object
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
@@ -2478,22 +3055,35 @@ class T(Surface):
 		width = self.b
 		height = self.c
 
-		rot_axis = vector(0, 1, 0)  # y axis by default
+		rot_axis = vpython.vector(0, 1, 0)  # y axis by default
 		if self.rot == "x":
-			rot_axis = vector(1, 0, 0)  # x axis
+			rot_axis = vpython.vector(1, 0, 0)  # x axis
 		elif self.rot == "z":
-			rot_axis = vector(0, 0, 1)  # z axis
+			rot_axis = vpython.vector(0, 0, 1)  # z axis
 		else:
 			width = self.c
 			height = self.b
 
-		p = vpython.paths.circle(
-			pos=vector(self.x0, self.y0, self.z0),
-			up=rot_axis, radius=self.r)
+		if prototypes is None:
+			p = vpython.paths.circle(
+				pos=vpython.vector(self.x0, self.y0, self.z0),
+				up=rot_axis, radius=self.r, np=segments)
+			s = vpython.shapes.ellipse(width=width, height=height, np=segments)
+			tor = vpython.extrusion(
+				path=p, shape=s, color=as_vector(self.color), opacity=self.opacity)
+		else:
+			key = prototype_key(self, segments)
+
+			def make():  # White torus in origin, color is set for clones
+				_, _, r, width, height, _ = key
+				p = vpython.paths.circle(up=rot_axis, radius=r, np=segments)
+				s = vpython.shapes.ellipse(width=width, height=height, np=segments)
+				return vpython.extrusion(path=p, shape=s, visible=False)
 
-		s = vpython.shapes.ellipse(width=width, height=height)
-		tor = vpython.extrusion(
-			path=p, shape=s, color=self.color, opacity=self.opacity)
+			prototype = draw_prototype(prototypes, key, make)
+			tor = prototype.clone(
+				pos=prototype.pos + vpython.vector(self.x0, self.y0, self.z0),
+				color=as_vector(self.color), opacity=self.opacity, visible=True)
 
 		lbl = None
 		if label_center or label_base:
@@ -2514,6 +3104,8 @@ class T(Surface):
 
 class REC(Surface):
 	symbol = "REC"
+	__slots__ = ("__xyz0", "__h", "__a", "__b")
+	phits_groups = (3, 3, 3, 3)
 
 	def __init__(
 			self,
@@ -2546,7 +3138,6 @@ class REC(Surface):
 		self.b = b
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def xyz0(self):
@@ -2564,7 +3155,8 @@ class REC(Surface):
 
 		:param xyz0: list [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -2582,7 +3174,8 @@ class REC(Surface):
 
 		:param x0: float x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -2600,7 +3193,8 @@ class REC(Surface):
 
 		:param y0: float y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -2618,7 +3212,8 @@ class REC(Surface):
 
 		:param z0: float z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def h(self):
@@ -2636,7 +3231,8 @@ class REC(Surface):
 
 		:param h: [Hx, Hy, Hz]
 		"""
-		self.__h = h
+		self.__h = store_vector(h, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def a(self):
@@ -2654,7 +3250,8 @@ class REC(Surface):
 
 		:param a: [Ax, Ay, Az]
 		"""
-		self.__a = a
+		self.__a = store_vector(a, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def b(self):
@@ -2672,7 +3269,8 @@ class REC(Surface):
 
 		:param b: [Bx, By, Bz]
 		"""
-		self.__b = b
+		self.__b = store_vector(b, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def get_center(self):
@@ -2775,26 +3373,62 @@ class REC(Surface):
 		print(f"{prefix} volume:", self.get_volume)
 		print(f"{prefix} trn:", self.trn)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
+		"""
+		return \
+			self.symbol, [*self.__xyz0, *self.__h, *self.__a, *self.__b], \
+			"(elliptical cylinder) [x0 y0 z0] [Hx Hy Hz] [Ax Ay Az] [Bx By Bz]"
+
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box of bottom and top ellipses
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		xyz0 = np.asarray(self.xyz0, dtype=float)
+		h = np.asarray(self.h, dtype=float)
+		a = np.asarray(self.a, dtype=float)
+		b = np.asarray(self.b, dtype=float)
+		extent = np.sqrt(a ** 2 + b ** 2)  # Ellipse extent along axes
+		return np.column_stack([
+			np.minimum(xyz0, xyz0 + h) - extent,
+			np.maximum(xyz0, xyz0 + h) + extent])
+
+	def sense(self, points):
+		"""
+		Get elliptical cylinder sense for points: -1 inside, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		h = np.asarray(self.h, dtype=float)
+		a = np.asarray(self.a, dtype=float)
+		b = np.asarray(self.b, dtype=float)
+		t = d @ (h / np.dot(h, h))  # Fraction of height vector
+		u = d @ (a / np.dot(a, a))  # Fraction of semi-major axis
+		v = d @ (b / np.dot(b, b))  # Fraction of semi-minor axis
+		inside = (t >= 0) & (t <= 1) & (u ** 2 + v ** 2 <= 1)
+		return sense_sign(inside)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of elliptical cylinders
+
+		:param surfaces: list of elliptical cylinders
+		:param segments: number of segments of bases
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
-		h = " ".join(str(i) for i in self.h)
-		a = " ".join(str(i) for i in self.a)
-		b = " ".join(str(i) for i in self.b)
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {h}  {a}  {b}" + \
-			f" $ name: '{self.name}' " + \
-			"(elliptical cylinder) " + \
-			"[x0 y0 z0] [Hx Hy Hz] [Ax Ay Az] [Bx By Bz]"
-
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+		xyz0, h, a, b = (
+			np.array([getattr(s, v) for s in surfaces], dtype=float)
+			for v in ("xyz0", "h", "a", "b"))
+		return cylinder_meshes(xyz0, h, a, b, a, b, segments)
 
 	def draw(self, opacity: float = None, label_base=False, label_center=False):
 		"""
@@ -2805,6 +3439,7 @@ class REC(Surface):
 		:param label_center: if True create label for object center
 		:return: vpython.cylinder object
 		"""
+		import vpython
 		if opacity is None:
 			pass
 		else:
@@ -2814,12 +3449,12 @@ class REC(Surface):
 		width = self.get_len_a * 2
 		height = self.get_len_b * 2
 
-		direction = vector(self.h[0], self.h[1], self.h[2])
+		direction = vpython.vector(self.h[0], self.h[1], self.h[2])
 
 		el_cyl = vpython.cylinder(
-			pos=vector(self.x0, self.y0, self.z0),
-			color=self.color, opacity=self.opacity,
-			size=vector(length, width, height), axis=direction)
+			pos=vpython.vector(self.x0, self.y0, self.z0),
+			color=as_vector(self.color), opacity=self.opacity,
+			size=vpython.vector(length, width, height), axis=direction)
 
 		lbl_c, lbl_b = None, None
 		txt = f"{self.symbol} '{self.name}' sn: {self.sn}\n"
@@ -2831,7 +3466,7 @@ class REC(Surface):
 			txt_c = txt + f"center: ({xc}, {yc}, {zc})"
 			lbl_c = vpython.label(
 				font="monospace", box=False, opacity=0.5, border=6, space=0,
-				pos=vector(self.get_center[0], self.get_center[1], self.get_center[2]),
+				pos=vpython.vector(self.get_center[0], self.get_center[1], self.get_center[2]),
 				text=txt_c, height=14,
 				# for opposite directions
 				xoffset=(-1) ** self.sn * 20 * random.random(),
@@ -2855,6 +3490,8 @@ class REC(Surface):
 
 class WED(Surface):
 	symbol = "WED"
+	__slots__ = ("__xyz0", "__a", "__b", "__h")
+	phits_groups = (3, 3, 3, 3)
 
 	def __init__(
 			self, xyz0: list = None,
@@ -2888,7 +3525,6 @@ class WED(Surface):
 		self.h = h
 
 		Surface.__init__(self, name, trn, material)
-		created_surfaces.append(self)
 
 	@property
 	def xyz0(self):
@@ -2906,7 +3542,8 @@ class WED(Surface):
 
 		:param xyz0: list [x0, y0, z0]
 		"""
-		self.__xyz0 = xyz0
+		self.__xyz0 = store_vector(xyz0)
+		self.reset_bounding_box()
 
 	@property
 	def x0(self):
@@ -2924,7 +3561,8 @@ class WED(Surface):
 
 		:param x0: Float x0
 		"""
-		self.__xyz0[0] = x0
+		self.__xyz0 = set_component(self.__xyz0, 0, x0)
+		self.reset_bounding_box()
 
 	@property
 	def y0(self):
@@ -2942,7 +3580,8 @@ class WED(Surface):
 
 		:param y0: Float y0
 		"""
-		self.__xyz0[1] = y0
+		self.__xyz0 = set_component(self.__xyz0, 1, y0)
+		self.reset_bounding_box()
 
 	@property
 	def z0(self):
@@ -2960,7 +3599,8 @@ class WED(Surface):
 
 		:param z0: float z0
 		"""
-		self.__xyz0[2] = z0
+		self.__xyz0 = set_component(self.__xyz0, 2, z0)
+		self.reset_bounding_box()
 
 	@property
 	def a(self):
@@ -2978,7 +3618,8 @@ class WED(Surface):
 
 		:param a: list A [Ax, Ay, Az]
 		"""
-		self.__a = a
+		self.__a = store_vector(a, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def b(self):
@@ -2996,7 +3637,8 @@ class WED(Surface):
 
 		:param b: list B [Bx, By, Bz]
 		"""
-		self.__b = b
+		self.__b = store_vector(b, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def h(self):
@@ -3014,7 +3656,8 @@ class WED(Surface):
 
 		:param h: list H [Hx, Hy, Hz]
 		"""
-		self.__h = h
+		self.__h = store_vector(h, shared=True)
+		self.reset_bounding_box()
 
 	@property
 	def get_center(self):
@@ -3147,26 +3790,57 @@ class WED(Surface):
 		print(f"{prefix} BH side rectangle surface area:", self.get_bh_area)
 		print(f"{prefix} full area:", self.get_full_area)
 
-	def phits_print(self):
+	def phits_fields(self):
 		"""
-		Print PHITS surface definition
+		Get fields of PHITS surface definition
 
-		:return: string with PHITS surface definition
+		:return: tuple (symbol, list of parameters, description for comment)
 		"""
-		xyz0 = " ".join(str(i) for i in self.xyz0)
-		a = " ".join(str(i) for i in self.a)
-		b = " ".join(str(i) for i in self.b)
-		h = " ".join(str(i) for i in self.h)
-
-		txt = \
-			f"    {self.sn} {self.trn}  " + \
-			f"{self.symbol}  {xyz0}  {a}  {b}  {h}" + \
-			f" $ name: '{self.name}' " + \
+		return \
+			self.symbol, [*self.__xyz0, *self.__a, *self.__b, *self.__h], \
 			"(wedge) [x0 y0 z0] [Ax Ay Az] [Bx By Bz] [Hx Hy Hz]"
 
-		if self.trn != "":
-			txt += f" with tr{self.trn}"
-		return txt
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box of all 6 wedge vertices
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		xyz0 = np.asarray(self.xyz0, dtype=float)
+		triangle = np.array([[0, 0, 0], self.a, self.b], dtype=float)
+		h = np.asarray(self.h, dtype=float)
+		return np.column_stack([
+			xyz0 + triangle.min(axis=0) + np.minimum(h, 0),
+			xyz0 + triangle.max(axis=0) + np.maximum(h, 0)])
+
+	def sense(self, points):
+		"""
+		Get wedge sense for points: -1 inside wedge, 1 outside
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int8) with -1 (negative sense) or 1 (positive)
+		"""
+		d = as_points(points) - np.asarray(self.xyz0, dtype=float)
+		# Coordinates of points in A, B, H basis
+		m = np.array([self.a, self.b, self.h], dtype=float).T
+		s, t, u = (d @ la.inv(m).T).T
+		inside = \
+			(s >= 0) & (t >= 0) & (s + t <= 1) & (u >= 0) & (u <= 1)
+		return sense_sign(inside)
+
+	@classmethod
+	def meshes(cls, surfaces: list, segments: int = 24):
+		"""
+		Get joined triangle mesh of wedges (8 triangles for wedge)
+
+		:param surfaces: list of wedges
+		:param segments: dummy parameter, same as for other surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return wedge_meshes(*(
+			np.array([getattr(s, v) for s in surfaces], dtype=float)
+			for v in ("xyz0", "a", "b", "h")))
 
 	def draw(self, opacity: float = None, label_base=False, label_center=False):
 		"""
@@ -3177,12 +3851,13 @@ class WED(Surface):
 		:param label_center: if True create label for object center
 		:return: vpython.cylinder object
 		"""
+		import vpython
 		if opacity is None:
 			opacity = self.opacity
 		else:
 			pass
 
-		color = self.color
+		color = as_vector(self.color)
 
 		x0, y0, z0 = self.x0, self.y0, self.z0
 
@@ -3190,14 +3865,14 @@ class WED(Surface):
 		bx, by, bz = self.b[0], self.b[1], self.b[2]
 		hx, hy, hz = self.h[0], self.h[1], self.h[2]
 
-		o = vertex(pos=vector(x0, y0, z0))  # Base vertex
-		o_prime = vertex(pos=vector(x0+hx, y0+hy, z0+hz))  # top vertex
+		o = vpython.vertex(pos=vpython.vector(x0, y0, z0))  # Base vertex
+		o_prime = vpython.vertex(pos=vpython.vector(x0+hx, y0+hy, z0+hz))  # top vertex
 
-		a = vertex(pos=vector(x0+ax, y0+ay, z0+az))
-		a_prime = vertex(pos=vector(a.pos.x+hx, a.pos.y+hy, a.pos.z+hz))
+		a = vpython.vertex(pos=vpython.vector(x0+ax, y0+ay, z0+az))
+		a_prime = vpython.vertex(pos=vpython.vector(a.pos.x+hx, a.pos.y+hy, a.pos.z+hz))
 
-		b = vertex(pos=vector(x0+bx, y0+by, z0+bz))
-		b_prime = vertex(pos=vector(b.pos.x+hx, b.pos.y+hy, b.pos.z+hz))
+		b = vpython.vertex(pos=vpython.vector(x0+bx, y0+by, z0+bz))
+		b_prime = vpython.vertex(pos=vpython.vector(b.pos.x+hx, b.pos.y+hy, b.pos.z+hz))
 
 		# Defines colors and opacity to vertexes
 		for v in [o, o_prime, a, a_prime, b, b_prime]:
@@ -3223,7 +3898,7 @@ class WED(Surface):
 			txt_c = txt + f"center: ({xc}, {yc}, {zc})"
 			lbl_c = vpython.label(
 				font="monospace", box=False, opacity=0.5, border=6, space=0,
-				pos=vector(self.get_center[0], self.get_center[1], self.get_center[2]),
+				pos=vpython.vector(self.get_center[0], self.get_center[1], self.get_center[2]),
 				text=txt_c, height=14,
 				# for opposite directions
 				xoffset=(-1) ** self.sn * 20 * random.random(),
@@ -3245,6 +3920,886 @@ class WED(Surface):
 		return wedge, lbl_c, lbl_b
 
 
+def scalar_field(value):
+	"""
+	Get scalar parameter for PHITS definition, NumPy scalars are converted to
+	Python numbers (scalar parameters are printed as in f-strings, so float32
+	is printed with all digits of Python float)
+
+	:param value: number or string
+	:return: number or string
+	"""
+	if isinstance(value, np.generic):
+		return value.item()
+	return value
+
+
+def format_number(value, precision: int):
+	"""
+	Format number with given number of significant digits
+
+	:param value: number, strings are kept as is
+	:param precision: number of significant digits
+	:return: string
+	"""
+	if isinstance(value, str):
+		return value
+	return f"{float(value):.{precision}g}"
+
+
+def format_numbers(values: list, precision: int = None):
+	"""
+	Format numbers of PHITS definitions in one batch, every distinct number
+	is formatted only once (lattice models repeat the same coordinates)
+
+	:param values: list of numbers, strings are kept as is
+	:param precision: number of significant digits, None to format numbers
+		with str() (same as numbers are printed by Python)
+	:return: list of strings
+	"""
+	fmt = str if precision is None else \
+		functools.partial(format_number, precision=precision)
+	if len(values) < 100:  # Not worth batching
+		return list(map(fmt, values))
+
+	if len(set(map(type, values))) == 1:
+		keys, numbers = values, values
+	else:  # 1, 1.0 and True are equal keys, so keys include types
+		keys = list(zip(map(type, values), values))
+		numbers = [k[1] for k in keys]
+	unique = dict(zip(keys, numbers))
+	memo = dict(zip(unique, map(fmt, unique.values())))
+	if not all(unique.values()):  # 0.0 and -0.0 are equal keys too
+		return [memo[k] if v else fmt(v) for k, v in zip(keys, numbers)]
+	return list(map(memo.__getitem__, keys))
+
+
+def item_values(values, count: int, shape: tuple = ()):
+	"""
+	Convert values of surface array items to float array, one value is
+	broadcast to all items
+
+	:param values: array-like with (count, *shape) shape or one value
+	:param count: number of items
+	:param shape: shape of value for one item
+	:return: numpy.ndarray with (count, *shape) shape
+	"""
+	values = np.asarray(values, dtype=float)
+	try:
+		return np.array(np.broadcast_to(values, (count,) + shape))
+	except ValueError:
+		raise ValueError(
+			f"Values with {values.shape} shape don't match {count} items!")
+
+
+class SurfaceArray(abc.ABC):  # superclass for arrays of surfaces of one type
+
+	item_class = Surface
+	description = ""  # Comment for PHITS definitions
+
+	def __init__(self, count: int, name="Surface", trn="", material=MAT_WATER):
+		"""
+		Define array of surfaces of one type with parameters stored in NumPy
+		arrays, array takes count consecutive surface numbers starting from
+		sn and is added to geometry as one object. Items are created on demand
+		as surface objects of item_class, so array[i] can be used as a
+		surface (e.g. -array[i] in cell definition), but changes of items
+		don't change array
+
+		:param count: number of surfaces
+		:param name: name for all surfaces
+		:param trn: transform number, specifies the number n of TRn
+		:param material: material associated with surfaces
+		"""
+		if count < 1:
+			raise ValueError("Surface array must have at least one surface!")
+		self.__count = count
+		self.name = name
+		self.trn = trn
+		self.material = material
+		self.color = None  # Color of material
+
+		geometry = current_geometry()
+		self.sn = next(geometry.surface_counter)
+		for _ in range(count - 1):  # Reserve numbers for all items
+			next(geometry.surface_counter)
+		geometry.surfaces.append(self)
+
+	def __len__(self):
+		return self.__count
+
+	def __getitem__(self, i: int):
+		if not -self.__count <= i < self.__count:
+			raise IndexError("Surface array index out of range!")
+		i = int(i) % self.__count
+		surface = object.__new__(self.item_class)  # Not added to geometry
+		self.set_item(surface, i)
+		surface.name = self.name
+		surface.trn = self.trn
+		surface.material = self.material
+		surface.sn = self.sn + i
+		surface.color = self.color
+		surface.opacity = 1.0
+		return surface
+
+	def __iter__(self):
+		for i in range(self.__count):
+			yield self[i]
+
+	@abc.abstractmethod
+	def set_item(self, surface: Surface, i: int):
+		"""
+		Set parameters of item surface from arrays
+
+		:param surface: surface object of item_class
+		:param i: index of item
+		"""
+
+	@property
+	@abc.abstractmethod
+	def get_parameters(self):
+		"""
+		Get parameters in order of PHITS definition
+
+		:return: list of numpy.ndarray with (N, k) shape
+		"""
+
+	@property
+	def get_numbers(self):
+		"""
+		Get surface numbers of all items
+
+		:return: numpy.ndarray with sn of items
+		"""
+		return np.arange(self.sn, self.sn + self.__count)
+
+	@property
+	@abc.abstractmethod
+	def get_bounding_boxes(self):
+		"""
+		Get axis-aligned bounding boxes of all items
+
+		:return: numpy.ndarray with (N, 3, 2) shape
+		"""
+
+	@property
+	def get_bounding_box(self):
+		"""
+		Get axis-aligned bounding box of all items
+
+		:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+		"""
+		boxes = self.get_bounding_boxes
+		return np.column_stack(
+			[boxes[:, :, 0].min(axis=0), boxes[:, :, 1].max(axis=0)])
+
+	@abc.abstractmethod
+	def inside(self, points, index):
+		"""
+		Check pairs of points and items: is point inside item (points lying on
+		surface are inside)
+
+		:param points: array-like of points with (M, 3) shape
+		:param index: array with (M,) shape of item indices
+		:return: numpy.ndarray (bool) with (M,) shape
+		"""
+
+	def find(self, points):
+		"""
+		Find item containing every point, candidates are taken from uniform
+		grid with cell size of the largest item bounding box, so every point
+		is checked only against items near it
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (int) with index of item containing point
+			(one of them for overlapping items), -1 for points outside all items
+		"""
+		p = as_points(points)
+		result = np.full(len(p), -1)
+		boxes = self.get_bounding_boxes
+		origin = boxes[:, :, 0].min(axis=0)
+		size = (boxes[:, :, 1] - boxes[:, :, 0]).max(axis=0)
+		size[size <= 0] = 1.0  # Flat items
+
+		# Items sorted by grid cell of bounding box minimum corner
+		cells = np.floor((boxes[:, :, 0] - origin) / size).astype(np.int64)
+		dims = cells.max(axis=0) + 1
+		keys = np.ravel_multi_index(cells.T, dims)
+		order = np.argsort(keys, kind="stable")
+		keys = keys[order]
+		first = None  # Table of first item in every grid cell for dense grids
+		if np.prod(dims) <= 10 * len(self) + 1000000:
+			first = np.searchsorted(keys, np.arange(np.prod(dims) + 1))
+
+		# Item containing point has minimum corner in cell of point or in
+		# previous cell along every axis
+		point_cells = np.floor((p - origin) / size)
+		for offset in itertools.product((0, 1), repeat=3):
+			c = point_cells - offset
+			idx = np.flatnonzero(
+				np.all((c >= 0) & (c < dims), axis=1) & (result < 0))
+			key = np.ravel_multi_index(c[idx].astype(np.int64).T, dims)
+			if first is None:
+				start = np.searchsorted(keys, key, side="left")
+				stop = np.searchsorted(keys, key, side="right")
+			else:
+				start, stop = first[key], first[key + 1]
+			while len(idx):  # Next candidate for points without hits
+				left = start < stop
+				idx, start, stop = idx[left], start[left], stop[left]
+				candidates = order[start]
+				hit = self.inside(p[idx], candidates)
+				result[idx[hit]] = candidates[hit]
+				idx, start, stop = idx[~hit], start[~hit] + 1, stop[~hit]
+		return result
+
+	def contains(self, points):
+		"""
+		Check whether points are inside any item
+
+		:param points: array-like of points with (N, 3) shape
+		:return: numpy.ndarray (bool)
+		"""
+		return self.find(points) >= 0
+
+	def phits_lines(self, precision: int = None):
+		"""
+		Get PHITS surface definitions of all items, formatted for the whole
+		arrays at once
+
+		:param precision: number of significant digits, None for str()
+		:return: list of strings with PHITS surface definitions
+		"""
+		text = format_numbers(
+			np.hstack(self.get_parameters).ravel().tolist(), precision)
+		return phits_definitions(
+			self.item_class.phits_groups, range(self.sn, self.sn + len(self)),
+			itertools.repeat(self.trn), itertools.repeat(self.item_class.symbol),
+			text, itertools.repeat(self.name), itertools.repeat(self.description))
+
+	def phits_print(self):
+		"""
+		Print PHITS surface definitions of all items
+
+		:return: string with PHITS surface definitions (line per item)
+		"""
+		return "\n".join(self.phits_lines())
+
+	def print_properties(self):
+		prefix = \
+			f"{type(self).__name__} '{self.name}' " + \
+			f"sn={self.sn}-{self.sn + len(self) - 1}"
+		print(f"{prefix} material name:", self.material.name)
+		print(f"{prefix} surfaces:", len(self))
+		print(f"{prefix} trn:", self.trn)
+		print(f"{prefix} total volume:", self.get_volume.sum())
+		print(f"{prefix} total full area:", self.get_full_area.sum())
+
+	def mesh(self, segments: int = 24):
+		"""
+		Get triangle mesh of all items
+
+		:param segments: number of segments for round surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return join_meshes([surface.mesh(segments) for surface in self])
+
+	def draw(self, **kwargs):
+		"""
+		Draw all items using vpython
+
+		:param kwargs: parameters for draw method of items
+		:return: list with results of draw method of items
+		"""
+		return [surface.draw(**kwargs) for surface in self]
+
+
+class SPHArray(SurfaceArray):
+
+	item_class = SPH
+	description = "(sphere) x0 y0 z0 R"
+
+	def __init__(
+			self, centers, radii=1.0, name="SPH", trn="", material=MAT_WATER):
+		"""
+		Define array of SPH (sphere) surfaces
+
+		:param centers: array-like of center coordinates with (N, 3) shape
+		:param radii: array-like of radii with (N,) shape or one radius for all
+		:param name: name for all surfaces
+		:param trn: transform number, specifies the number n of TRn
+		:param material: material associated with surfaces
+		"""
+		centers = as_points(centers)
+		self.__centers = centers.copy()
+		self.__radii = item_values(radii, len(centers))
+
+		SurfaceArray.__init__(self, len(centers), name, trn, material)
+
+	@property
+	def centers(self):
+		"""
+		Get array with center coordinates (can be changed in place)
+
+		:return: numpy.ndarray with (N, 3) shape
+		"""
+		return self.__centers
+
+	@centers.setter
+	def centers(self, centers):
+		"""
+		Set center coordinates, number of items can't be changed
+
+		:param centers: array-like with (N, 3) shape
+		"""
+		self.__centers = item_values(centers, len(self), (3,))
+
+	@property
+	def radii(self):
+		"""
+		Get array with radii (can be changed in place)
+
+		:return: numpy.ndarray with (N,) shape
+		"""
+		return self.__radii
+
+	@radii.setter
+	def radii(self, radii):
+		"""
+		Set radii, number of items can't be changed
+
+		:param radii: array-like with (N,) shape or one radius for all
+		"""
+		self.__radii = item_values(radii, len(self))
+
+	def set_item(self, surface: SPH, i: int):
+		"""
+		Set parameters of item surface from arrays
+
+		:param surface: SPH object
+		:param i: index of item
+		"""
+		surface.xyz0 = self.centers[i].tolist()
+		surface.r = self.radii[i].item()
+
+	@property
+	def get_parameters(self):
+		"""
+		Get parameters in order of PHITS definition
+
+		:return: list of numpy.ndarray with (N, k) shape
+		"""
+		return [self.centers, self.radii[:, None]]
+
+	@property
+	def get_volume(self):
+		"""
+		Get volumes as 4/3 * pi * R^3
+
+		:return: numpy.ndarray with volumes
+		"""
+		return (4/3) * PI * self.radii ** 3
+
+	@property
+	def get_full_area(self):
+		"""
+		Get full surface areas as 4 * pi * R^2
+
+		:return: numpy.ndarray with full surface areas
+		"""
+		return 4 * PI * self.radii ** 2
+
+	@property
+	def get_bounding_boxes(self):
+		"""
+		Get axis-aligned bounding boxes of all items
+
+		:return: numpy.ndarray with (N, 3, 2) shape
+		"""
+		r = self.radii[:, None]
+		return np.stack([self.centers - r, self.centers + r], axis=2)
+
+	def mesh(self, segments: int = 24):
+		"""
+		Get triangle mesh of all spheres, vectorized over items
+
+		:param segments: number of segments of rings
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return sphere_meshes(self.centers, self.radii, segments)
+
+	def inside(self, points, index):
+		"""
+		Check pairs of points and items: is point inside item
+
+		:param points: array-like of points with (M, 3) shape
+		:param index: array with (M,) shape of item indices
+		:return: numpy.ndarray (bool) with (M,) shape
+		"""
+		d = as_points(points) - self.centers[index]
+		return np.einsum("ij,ij->i", d, d) <= self.radii[index] ** 2
+
+
+class RCCArray(SurfaceArray):
+
+	item_class = RCC
+	description = "(cylinder) [x0 y0 z0] [Hx Hy Hz] R"
+
+	def __init__(
+			self, centers, h=(0.0, 1.0, 0.0), r=0.5,
+			name="RCC", trn="", material=MAT_WATER):
+		"""
+		Define array of RCC (cylinder) surfaces
+
+		:param centers: array-like of bottom face centers with (N, 3) shape
+		:param h: array-like of vectors from the bottom to the top with (N, 3)
+			shape or one vector for all
+		:param r: array-like of radii with (N,) shape or one radius for all
+		:param name: name for all surfaces
+		:param trn: transform number, specifies the number n of TRn
+		:param material: material associated with surfaces
+		"""
+		centers = as_points(centers)
+		self.__centers = centers.copy()
+		self.__h = item_values(h, len(centers), (3,))
+		self.__r = item_values(r, len(centers))
+
+		SurfaceArray.__init__(self, len(centers), name, trn, material)
+
+	@property
+	def centers(self):
+		"""
+		Get array with bottom face centers (can be changed in place)
+
+		:return: numpy.ndarray with (N, 3) shape
+		"""
+		return self.__centers
+
+	@centers.setter
+	def centers(self, centers):
+		"""
+		Set bottom face centers, number of items can't be changed
+
+		:param centers: array-like with (N, 3) shape
+		"""
+		self.__centers = item_values(centers, len(self), (3,))
+
+	@property
+	def h(self):
+		"""
+		Get array with height vectors (can be changed in place)
+
+		:return: numpy.ndarray with (N, 3) shape
+		"""
+		return self.__h
+
+	@h.setter
+	def h(self, h):
+		"""
+		Set height vectors, number of items can't be changed
+
+		:param h: array-like with (N, 3) shape or one vector for all
+		"""
+		self.__h = item_values(h, len(self), (3,))
+
+	@property
+	def r(self):
+		"""
+		Get array with radii (can be changed in place)
+
+		:return: numpy.ndarray with (N,) shape
+		"""
+		return self.__r
+
+	@r.setter
+	def r(self, r):
+		"""
+		Set radii, number of items can't be changed
+
+		:param r: array-like with (N,) shape or one radius for all
+		"""
+		self.__r = item_values(r, len(self))
+
+	def set_item(self, surface: RCC, i: int):
+		"""
+		Set parameters of item surface from arrays
+
+		:param surface: RCC object
+		:param i: index of item
+		"""
+		surface.xyz0 = self.centers[i].tolist()
+		surface.h = self.h[i].tolist()
+		surface.r = self.r[i].item()
+
+	@property
+	def get_parameters(self):
+		"""
+		Get parameters in order of PHITS definition
+
+		:return: list of numpy.ndarray with (N, k) shape
+		"""
+		return [self.centers, self.h, self.r[:, None]]
+
+	@property
+	def get_len_h(self):
+		"""
+		Get lengths of height vectors
+
+		:return: numpy.ndarray with lengths
+		"""
+		return la.norm(self.h, axis=1)
+
+	@property
+	def get_volume(self):
+		"""
+		Get volumes
+
+		:return: numpy.ndarray with volumes
+		"""
+		return PI * self.r ** 2 * self.get_len_h
+
+	@property
+	def get_full_area(self):
+		"""
+		Get full surface areas
+
+		:return: numpy.ndarray with full surface areas
+		"""
+		return 2 * PI * self.r ** 2 + 2 * PI * self.r * self.get_len_h
+
+	@property
+	def get_bounding_boxes(self):
+		"""
+		Get axis-aligned bounding boxes of all items
+
+		:return: numpy.ndarray with (N, 3, 2) shape
+		"""
+		n = self.h / self.get_len_h[:, None]
+		extent = self.r[:, None] * np.sqrt(np.clip(1 - n ** 2, 0, None))
+		top = self.centers + self.h
+		return np.stack([
+			np.minimum(self.centers, top) - extent,
+			np.maximum(self.centers, top) + extent], axis=2)
+
+	def mesh(self, segments: int = 24):
+		"""
+		Get triangle mesh of all cylinders, vectorized over items
+
+		:param segments: number of segments of bases
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		return circular_cylinder_meshes(
+			self.centers, self.h, self.r, self.r, segments)
+
+	def inside(self, points, index):
+		"""
+		Check pairs of points and items: is point inside item
+
+		:param points: array-like of points with (M, 3) shape
+		:param index: array with (M,) shape of item indices
+		:return: numpy.ndarray (bool) with (M,) shape
+		"""
+		d = as_points(points) - self.centers[index]
+		h = self.h[index]
+		t = np.einsum("ij,ij->i", d, h) / np.einsum("ij,ij->i", h, h)
+		radial = d - t[:, None] * h
+		return \
+			(t >= 0) & (t <= 1) & \
+			(np.einsum("ij,ij->i", radial, radial) <= self.r[index] ** 2)
+
+
+class RPPArray(SurfaceArray):
+
+	item_class = RPP
+	description = \
+		"(Rectangular solid) [x_min x_max] [y_min y_max] [z_min z_max]"
+
+	def __init__(self, x, y, z, name="RPP", trn="", material=MAT_WATER):
+		"""
+		Define array of RPP (Rectangular solid) surfaces, e.g. detector pixels
+
+		:param x: array-like of [x_min, x_max] with (N, 2) shape or one for all
+		:param y: array-like of [y_min, y_max] with (N, 2) shape or one for all
+		:param z: array-like of [z_min, z_max] with (N, 2) shape or one for all
+		:param name: name for all surfaces
+		:param trn: transform number, specifies the number n of TRn
+		:param material: material associated with surfaces
+		"""
+		count = max(len(np.reshape(v, (-1, 2))) for v in (x, y, z))
+		self.__x = item_values(x, count, (2,))
+		self.__y = item_values(y, count, (2,))
+		self.__z = item_values(z, count, (2,))
+
+		SurfaceArray.__init__(self, count, name, trn, material)
+
+	@property
+	def x(self):
+		"""
+		Get array with x limits (can be changed in place)
+
+		:return: numpy.ndarray with (N, 2) shape
+		"""
+		return self.__x
+
+	@x.setter
+	def x(self, x):
+		"""
+		Set x limits, number of items can't be changed
+
+		:param x: array-like with (N, 2) shape or one [x_min, x_max] for all
+		"""
+		self.__x = item_values(x, len(self), (2,))
+
+	@property
+	def y(self):
+		"""
+		Get array with y limits (can be changed in place)
+
+		:return: numpy.ndarray with (N, 2) shape
+		"""
+		return self.__y
+
+	@y.setter
+	def y(self, y):
+		"""
+		Set y limits, number of items can't be changed
+
+		:param y: array-like with (N, 2) shape or one [y_min, y_max] for all
+		"""
+		self.__y = item_values(y, len(self), (2,))
+
+	@property
+	def z(self):
+		"""
+		Get array with z limits (can be changed in place)
+
+		:return: numpy.ndarray with (N, 2) shape
+		"""
+		return self.__z
+
+	@z.setter
+	def z(self, z):
+		"""
+		Set z limits, number of items can't be changed
+
+		:param z: array-like with (N, 2) shape or one [z_min, z_max] for all
+		"""
+		self.__z = item_values(z, len(self), (2,))
+
+	def set_item(self, surface: RPP, i: int):
+		"""
+		Set parameters of item surface from arrays
+
+		:param surface: RPP object
+		:param i: index of item
+		"""
+		surface.x = self.x[i].tolist()
+		surface.y = self.y[i].tolist()
+		surface.z = self.z[i].tolist()
+
+	@property
+	def get_parameters(self):
+		"""
+		Get parameters in order of PHITS definition
+
+		:return: list of numpy.ndarray with (N, k) shape
+		"""
+		return [self.x, self.y, self.z]
+
+	@property
+	def get_volume(self):
+		"""
+		Get volumes
+
+		:return: numpy.ndarray with volumes
+		"""
+		sides = self.get_bounding_boxes @ [-1, 1]
+		return sides.prod(axis=1)
+
+	@property
+	def get_full_area(self):
+		"""
+		Get full surface areas
+
+		:return: numpy.ndarray with full surface areas
+		"""
+		w, h, length = (self.get_bounding_boxes @ [-1, 1]).T
+		return 2 * (w * h + w * length + h * length)
+
+	@property
+	def get_bounding_boxes(self):
+		"""
+		Get axis-aligned bounding boxes of all items
+
+		:return: numpy.ndarray with (N, 3, 2) shape
+		"""
+		return np.stack([self.x, self.y, self.z], axis=1)
+
+	def mesh(self, segments: int = 24):
+		"""
+		Get triangle mesh of all rectangular solids, vectorized over items
+
+		:param segments: dummy parameter, same as for other surfaces
+		:return: tuple of numpy.ndarray (vertices (V, 3), faces (F, 3))
+		"""
+		zeros = np.zeros(len(self))
+		dx, dy, dz = (np.diff(v, axis=1)[:, 0] for v in (self.x, self.y, self.z))
+		return box_meshes(
+			np.column_stack([self.x[:, 0], self.y[:, 0], self.z[:, 0]]),
+			np.column_stack([dx, zeros, zeros]),
+			np.column_stack([zeros, dy, zeros]),
+			np.column_stack([zeros, zeros, dz]))
+
+	def inside(self, points, index):
+		"""
+		Check pairs of points and items: is point inside item
+
+		:param points: array-like of points with (M, 3) shape
+		:param index: array with (M,) shape of item indices
+		:return: numpy.ndarray (bool) with (M,) shape
+		"""
+		p = as_points(points)
+		boxes = self.get_bounding_boxes[index]
+		return np.all((p >= boxes[:, :, 0]) & (p <= boxes[:, :, 1]), axis=1)
+
+
+class SurfaceLookup(dict):
+
+	def __init__(self, surfaces: list):
+		"""
+		Dictionary {sn: surface} for surfaces list, items of surface arrays are
+		created on first access
+
+		:param surfaces: list of surfaces and surface arrays
+		"""
+		dict.__init__(self)
+		self.arrays = []
+		for s in surfaces:
+			if isinstance(s, SurfaceArray):
+				self.arrays.append(s)
+			else:
+				self[s.sn] = s
+
+	def find_array(self, sn: int):
+		"""
+		Find surface array with surface number
+
+		:param sn: surface number
+		:return: SurfaceArray object or None
+		"""
+		for a in self.arrays:
+			if a.sn <= sn < a.sn + len(a):
+				return a
+		return None
+
+	def __contains__(self, sn):
+		return dict.__contains__(self, sn) or self.find_array(sn) is not None
+
+	def __missing__(self, sn):
+		a = self.find_array(sn)
+		if a is None:
+			raise KeyError(sn)
+		self[sn] = a[sn - a.sn]
+		return self[sn]
+
+
+def surface_items(surfaces: list):
+	"""
+	Iterate over surfaces with surface arrays replaced by their items
+
+	:param surfaces: list of surfaces and surface arrays
+	:return: generator of surfaces
+	"""
+	for s in surfaces:
+		if isinstance(s, SurfaceArray):
+			yield from s
+		else:
+			yield s
+
+
+@functools.lru_cache()
+def phits_template(groups: tuple):
+	"""
+	Get template of PHITS surface definition for groups of parameters, fields:
+	sn, trn, symbol, parameters, name, description and transform comment
+
+	:param groups: numbers of parameters in groups
+	:return: string for str.format and number of parameters
+	"""
+	template = \
+		"    {} {}  {}  " + \
+		"  ".join(" ".join(["{}"] * n) for n in groups) + \
+		" $ name: '{}' {}{}"
+	return template, int(np.sum(groups))
+
+
+def trn_comment(trn: str):
+	"""
+	Get comment for surface with transform
+
+	:param trn: transform number
+	:return: string
+	"""
+	return f" with tr{trn}" if trn != "" else ""
+
+
+def phits_definitions(groups: tuple, sn, trn, symbols, text, names, descriptions):
+	"""
+	Assemble PHITS definitions of surfaces of one type from columns of fields,
+	one template is used for all surfaces
+
+	:param groups: numbers of parameters in groups
+	:param sn: iterable of surface numbers
+	:param trn: iterable of transform numbers
+	:param symbols: iterable of symbols
+	:param text: list with formatted parameters of all surfaces (row by row)
+	:param names: iterable of names
+	:param descriptions: iterable of descriptions for comments
+	:return: list of strings with PHITS surface definitions
+	"""
+	template, k = phits_template(groups)
+	columns = [text[c::k] for c in range(k)]
+	trn_a, trn_b = itertools.tee(trn)
+	return list(itertools.starmap(
+		template.format,
+		zip(sn, trn_a, symbols, *columns, names, descriptions,
+			map(trn_comment, trn_b))))
+
+
+def phits_print_surfaces(surfaces: list, precision: int = None):
+	"""
+	Get PHITS surface definitions of many surfaces at once: parameters of all
+	surfaces of one type are formatted in one batch with the same template
+
+	:param surfaces: list of surfaces and surface arrays
+	:param precision: number of significant digits for parameters, None to
+		format parameters with str() (same as phits_print of surfaces)
+	:return: list of strings with PHITS surface definitions (lines of all
+		items for surface arrays)
+	"""
+	lines = [""] * len(surfaces)
+	by_type = {}
+	for i, s in enumerate(surfaces):
+		by_type.setdefault(type(s), []).append(i)
+
+	for kind, index in by_type.items():
+		if issubclass(kind, SurfaceArray):
+			for i in index:
+				lines[i] = "\n".join(surfaces[i].phits_lines(precision))
+			continue
+		batch = [surfaces[i] for i in index]
+		symbols, values, descriptions = zip(
+			*[s.phits_fields() for s in batch])
+		text = format_numbers(
+			list(itertools.chain.from_iterable(values)), precision)
+		sn, trn, names = zip(
+			*map(operator.attrgetter("sn", "trn", "name"), batch))
+		for i, txt in zip(index, phits_definitions(
+				kind.phits_groups, sn, trn, symbols, text, names, descriptions)):
+			lines[i] = txt
+	return lines
+
+
 class HEX:
 	# TODO: Hexagonal prism
 	pass
@@ -0,0 +1,161 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import time
+import traceback
+
+from .geometry import Geometry
+from .export import phits_export
+
+
+def parameter_grid(grid: dict):
+	"""
+	Make all combinations of parameters values (Cartesian product), the last
+	parameter changes fastest
+
+	:param grid: dictionary {parameter name: list of values}
+	:return: list of dictionaries {parameter name: value}
+	"""
+	names = list(grid)
+	return [
+		dict(zip(names, values))
+		for values in itertools.product(*(grid[n] for n in names))]
+
+
+class VariantResult:
+
+	def __init__(self, index: int, params: dict, inp_name: str):
+		"""
+		Result of one variant of sweep
+
+		:param index: index of variant
+		:param params: parameters of variant
+		:param inp_name: name of exported input file (without _FitsGeo.inp)
+		"""
+		self.index = index
+		self.params = params
+		self.inp_name = inp_name
+		self.time = 0.0  # Build and export time in seconds
+		self.error = None  # Traceback of exception for failed variant
+
+	@property
+	def ok(self):
+		"""
+		Get variant state
+
+		:return: True if variant was built and exported without errors
+		"""
+		return self.error is None
+
+
+class SweepReport:
+
+	def __init__(self, results: list, time_total: float):
+		"""
+		Results of sweep: timing and failures of all variants
+
+		:param results: list of VariantResult objects in order of variants
+		:param time_total: wall time of sweep in seconds
+		"""
+		self.results = results
+		self.time_total = time_total
+
+	@property
+	def failed(self):
+		"""
+		Get failed variants
+
+		:return: list of VariantResult objects
+		"""
+		return [r for r in self.results if not r.ok]
+
+	def print_report(self, errors=True):
+		"""
+		Print report with timing of variants and failures
+
+		:param errors: if True print tracebacks of failed variants
+		:return: string with report
+		"""
+		times = [r.time for r in self.results]
+		text = \
+			f"Sweep: {len(self.results)} variants, " + \
+			f"{len(self.failed)} failed, {self.time_total:.3f} s total\n"
+		if times:
+			text += \
+				f"Variant time: min {min(times):.3f} s, " + \
+				f"mean {sum(times) / len(times):.3f} s, max {max(times):.3f} s\n"
+		for r in self.failed:
+			text += f"Variant {r.index} '{r.inp_name}' {r.params} failed\n"
+			if errors:
+				text += r.error
+		print(text, end="")
+		return text
+
+
+def run_variant(build, index: int, params: dict, inp_name: str, export: dict):
+	"""
+	Build variant in its own Geometry and export it to input file, runs in
+	worker process
+
+	:param build: function building model from parameters as keyword arguments
+	:param index: index of variant
+	:param params: parameters of variant
+	:param inp_name: name for input file export
+	:param export: additional parameters for phits_export
+	:return: VariantResult object
+	"""
+	result = VariantResult(index, params, inp_name)
+	start = time.perf_counter()
+	try:
+		with Geometry(inp_name) as geometry:
+			build(**params)
+		phits_export(
+			to_file=True, inp_name=inp_name, verbose=False,
+			geometry=geometry, **export)
+	except Exception:
+		result.error = traceback.format_exc()
+	result.time = time.perf_counter() - start
+	return result
+
+
+def sweep(
+		build, grid, inp_name="variant_{index}", processes=1, chunksize=1,
+		**export):
+	"""
+	Run parameter sweep: build and export model for every variant of
+	parameters, every variant gets its own Geometry (numbers of objects start
+	from the beginning) and writes its own {inp_name}_FitsGeo.inp file
+
+	:param build: function building model from parameters given as keyword
+		arguments, must be defined on module level for processes > 1
+	:param grid: dictionary {parameter name: list of values} for all
+		combinations of values or list of dictionaries with parameters
+	:param inp_name: name for input files, formatted with index of variant
+		and parameters, e.g. "column_r{r}_h{h}" ({index} is always index of
+		variant, also for parameter named "index")
+	:param processes: number of worker processes for process pool
+		(1 to run in current process)
+	:param chunksize: number of variants sent to worker process at once
+	:param export: additional parameters for phits_export (export_surfaces,
+		export_materials, export_cells, add_comment)
+	:return: SweepReport object
+	"""
+	variants = parameter_grid(grid) if isinstance(grid, dict) else list(grid)
+	names = [
+		inp_name.format_map({**p, "index": i}) for i, p in enumerate(variants)]
+	args = (
+		[build] * len(variants), range(len(variants)), variants, names,
+		[export] * len(variants))
+
+	start = time.perf_counter()
+	if processes == 1:
+		results = list(map(run_variant, *args))
+	else:
+		with ProcessPoolExecutor(max_workers=processes) as pool:
+			results = list(pool.map(run_variant, *args, chunksize=chunksize))
+	return SweepReport(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
@@ -0,0 +1,199 @@
+import numpy as np
+
+from .cell import top_level_cells
+from .surface import SurfaceLookup
+from .region import SenseCache, compile_cell, cell_bounding_box, \
+	boxes_union
+from .geometry import current_geometry
+
+# Maximum number of sample points in one slab (voxels times samples)
+CHUNK_SIZE = 1000000
+
+
+def voxel_bounds(boxes, cells: list):
+	"""
+	Find bounds of voxel grid: bounding box of cells except outer void
+
+	:param boxes: numpy.ndarray with bounding boxes of cells
+	:param cells: list of cells
+	:return: numpy.ndarray [[x_min, x_max], [y_min, y_max], [z_min, z_max]]
+	"""
+	bounds = boxes_union(
+		[b for b, c in zip(boxes, cells) if c.material.matn >= 0] or
+		np.empty((0, 3, 2)))
+	if not np.all(np.isfinite(bounds)):
+		raise ValueError("Voxel bounds can't be found for unbounded cells!")
+	return bounds
+
+
+def sample_coordinates(limits, n: int, samples: int):
+	"""
+	Get coordinates of sample points along axis: centers of samples equal
+	parts of every voxel
+
+	:param limits: (min, max) limits of grid along axis
+	:param n: number of voxels along axis
+	:param samples: number of samples in voxel along axis
+	:return: numpy.ndarray with n * samples increasing coordinates
+	"""
+	count = n * samples
+	return limits[0] + (limits[1] - limits[0]) * (np.arange(count) + 0.5) / count
+
+
+def open_array(file_name: str, dtype, shape: tuple):
+	"""
+	Create array filled with zeros in memory or as .npy file mapped to memory
+
+	:param file_name: name of .npy file or None for array in memory
+	:param dtype: data type of array
+	:param shape: shape of array
+	:return: numpy.ndarray or numpy.memmap
+	"""
+	if file_name is None:
+		return np.zeros(shape, dtype=dtype)
+	return np.lib.format.open_memmap(file_name, mode="w+", dtype=dtype, shape=shape)
+
+
+def reduce_samples(values, samples: int):
+	"""
+	Group values of sample points by voxels
+
+	:param values: numpy.ndarray with values of sample points of slab,
+		(nx * samples, ny * samples, nz * samples) shape
+	:param samples: number of samples in voxel along axis
+	:return: numpy.ndarray with (nx, ny, nz, samples ** 3) shape
+	"""
+	nx, ny, nz = (n // samples for n in values.shape)
+	return values.reshape(nx, samples, ny, samples, nz, samples).transpose(
+		0, 2, 4, 1, 3, 5).reshape(nx, ny, nz, -1)
+
+
+def voxelize(
+		bounds=None, shape=100, samples: int = 1, fractions=False,
+		file_name: str = None, chunk_size=CHUNK_SIZE,
+		cells: list = None, surfaces: list = None, geometry=None):
+	"""
+	Voxelize model: find material number and density of every voxel of
+	regular 3D grid (voxel phantom). Grid is computed in slabs along x with
+	at most chunk_size sample points, in every slab cells are evaluated
+	only for unresolved points inside their bounding boxes, smaller cells
+	first (like in BVH). With sub-voxel sampling voxel gets the most
+	frequent material of its samples and mean density of samples (density
+	weighted by volume fractions of materials)
+
+	:param bounds: [[x_min, x_max], [y_min, y_max], [z_min, z_max]] of grid,
+		by default bounding box of cells except outer void
+	:param shape: number of voxels (nx, ny, nz) or one number for all axes
+	:param samples: number of samples in voxel along every axis
+		(samples ** 3 points for voxel)
+	:param fractions: if True also return volume fraction of voxel material
+	:param file_name: prefix of .npy files (file_name_matn.npy,
+		file_name_density.npy, file_name_fraction.npy) for arrays mapped to
+		memory, None to keep arrays in memory
+	:param chunk_size: maximum number of sample points in one slab
+	:param cells: list of cells (cells of the real world by default)
+	:param surfaces: list of surfaces (surfaces of geometry by default)
+	:param geometry: Geometry object (current geometry by default)
+	:return: tuple of numpy.ndarray with (nx, ny, nz) shape: material
+		numbers (uint16, 0 for void, outer void and voxels outside of all
+		cells), densities (float32, g/cm^3) and fractions (float32, only if
+		fractions is True)
+	"""
+	geometry = current_geometry(geometry)
+	if cells is None:
+		cells = top_level_cells(geometry.cells)
+	if surfaces is None:
+		surfaces = geometry.surfaces
+	cells = list(cells)
+	surfaces = SurfaceLookup(surfaces)
+	lookup = {c.cn: c for c in geometry.cells}  # For #cn complements
+	lookup.update({c.cn: c for c in cells})
+	if samples < 1:
+		raise ValueError("Number of samples must be positive!")
+
+	boxes = np.array(
+		[cell_bounding_box(c, surfaces) for c in cells]).reshape(-1, 3, 2)
+	if bounds is None:
+		bounds = voxel_bounds(boxes, cells)
+	bounds = np.asarray(bounds, dtype=float).reshape(3, 2)
+	shape = tuple(int(n) for n in np.broadcast_to(shape, 3))
+	nx, ny, nz = shape
+	x, y, z = (
+		sample_coordinates(limits, n, samples) for limits, n in zip(bounds, shape))
+
+	# Material numbers and densities of cells, the last one for no cell
+	matn = np.array(
+		[max(c.material.matn, 0) for c in cells] + [0], dtype=np.uint16)
+	density = np.array(
+		[c.material.density if c.material.matn > 0 else 0 for c in cells] + [0],
+		dtype=np.float32)
+
+	with np.errstate(invalid="ignore"):  # inf - inf for unbounded cells
+		volumes = np.nan_to_num(
+			np.prod(boxes[:, :, 1] - boxes[:, :, 0], axis=1), nan=np.inf)
+	order = np.argsort(volumes, kind="stable")
+	# Ranges of sample indexes [x0, x1, y0, y1, z0, z1] inside cell boxes
+	ranges = np.column_stack([
+		np.searchsorted(c, boxes[:, axis, side], side=("left", "right")[side])
+		for axis, c in enumerate((x, y, z)) for side in (0, 1)])[order]
+	nonempty = np.all(ranges[:, ::2] < ranges[:, 1::2], axis=1)
+	order, ranges = order[nonempty], ranges[nonempty]
+
+	names = ["matn", "density", "fraction"][:3 if fractions else 2]
+	result = [
+		open_array(
+			None if file_name is None else f"{file_name}_{name}.npy",
+			dtype, shape)
+		for name, dtype in zip(names, (np.uint16, np.float32, np.float32))]
+
+	step = max(1, chunk_size // (ny * nz * samples ** 3))  # Voxel layers
+	for start in range(0, nx, step):
+		stop = min(start + step, nx)
+		s0, s1 = start * samples, stop * samples
+		labels = np.full((s1 - s0, len(y), len(z)), -1, dtype=np.int32)
+		active = (ranges[:, 0] < s1) & (ranges[:, 1] > s0)
+		for i, (x0, x1, y0, y1, z0, z1) in zip(
+				order[active], ranges[active].tolist()):
+			x0, x1 = max(x0, s0), min(x1, s1)
+			block = labels[x0 - s0:x1 - s0, y0:y1, z0:z1]
+			ii, jj, kk = np.nonzero(block < 0)
+			if not len(ii):
+				continue
+			points = np.column_stack([x[x0 + ii], y[y0 + jj], z[z0 + kk]])
+			cache = SenseCache(points, surfaces, lookup)
+			mask = compile_cell(cells[i])(cache)
+			block[ii[mask], jj[mask], kk[mask]] = i
+
+		if samples == 1:
+			result[0][start:stop] = matn[labels]
+			result[1][start:stop] = density[labels]
+			if fractions:
+				result[2][start:stop] = 1
+			continue
+		# Most frequent material is found only for voxels with mixed samples
+		slab = reduce_samples(matn[labels], samples)
+		voxels = slab[:, :, :, 0].copy()
+		mixed = np.nonzero(np.any(slab != voxels[:, :, :, None], axis=3))
+		mixed_samples = slab[mixed]
+		values = np.unique(mixed_samples)
+		counts = np.stack(
+			[np.count_nonzero(mixed_samples == v, axis=1) for v in values] or
+			[np.zeros(0, dtype=int)])
+		voxels[mixed] = values[counts.argmax(axis=0)]
+		result[0][start:stop] = voxels
+		result[1][start:stop] = reduce_samples(density[labels], samples).mean(axis=3)
+		if fractions:
+			fraction = np.ones(voxels.shape, dtype=np.float32)
+			fraction[mixed] = counts.max(axis=0, initial=0) / samples ** 3
+			result[2][start:stop] = fraction
+
+	for array in result:
+		if isinstance(array, np.memmap):
+			array.flush()
+	return tuple(result)
+
+
+if __name__ == "__main__":
+	print(
+		"--- Welcome to FitsGeo! ---\n" +
+		"This is a module for FitsGeo!\nImport FitsGeo to use.")
@@ -0,0 +1,4 @@
+import os
+
+# Tests don't draw anything, vpython is not imported in headless mode
+os.environ.setdefault("FITSGEO_HEADLESS", "1")
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+
+
+def test_overlaps_of_three_cells():
+	with fg.Geometry("Analysis test"):
+		a, b, c = fg.SPH([0, 0, 0], 2), fg.SPH([1, 0, 0], 2), fg.SPH([0, 1, 0], 2)
+		world = fg.RPP([-5, 5], [-5, 5], [-5, 5])
+		cells = [fg.Cell([-a]), fg.Cell([-b]), fg.Cell([-c])]
+		fg.Cell([-world, " ", +a, " ", +b, " ", +c], material=fg.MAT_VOID)
+		fg.Cell([+world], material=fg.MAT_OUTER)
+		report = fg.check_geometry(n_points=20000, seed=1)
+
+	cn = [cell.cn for cell in cells]
+	assert report.gaps == 0
+	# Every pair is found, not only pairs with the first cell claiming point
+	assert set(report.overlaps) == {
+		(cn[0], cn[1]), (cn[0], cn[2]), (cn[1], cn[2])}
+	assert all(len(report.overlap_examples[pair]) for pair in report.overlaps)
+
+
+def test_volume_of_sphere():
+	with fg.Geometry("Volume test"):
+		sphere = fg.SPH([1, -2, 0.5], 2)
+		world = fg.RPP([-3, 5], [-6, 2], [-4, 4])
+		water = fg.Cell([-sphere])
+		void = fg.Cell([-world, " ", +sphere], material=fg.MAT_VOID)
+		fg.Cell([+world], material=fg.MAT_OUTER)
+		volumes = fg.compute_volumes(rel_error=0.005, seed=1)
+
+	expected = 4 / 3 * np.pi * 2 ** 3
+	volume, error = volumes[water.cn]
+	assert error / volume <= 0.005
+	assert abs(volume - expected) <= 4 * error
+	volume, error = volumes[void.cn]
+	assert abs(volume - (8 ** 3 - expected)) <= 4 * error
+	assert water.volume == volumes[water.cn][0]
+
+
+def test_filled_cell_warns():
+	with fg.Geometry("Filled cell test"):
+		box, world = fg.RPP([0, 1], [0, 1], [0, 1]), fg.SPH([0, 0, 0], 5)
+		fg.Cell([-box], u=1)
+		container = fg.Cell([-world], material=fg.MAT_VOID, fill=1)
+		fg.Cell([+world], material=fg.MAT_OUTER)
+		with pytest.warns(UserWarning, match=rf"\[{container.cn}\]"):
+			volumes = fg.compute_volumes(rel_error=0.1, seed=1)
+		with pytest.warns(UserWarning, match="filled with universes"):
+			fg.BVH()
+	assert list(volumes) == [container.cn]
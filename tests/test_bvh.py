@@ -0,0 +1,23 @@
+import numpy as np
+
+import fitsgeo as fg
+from fitsgeo.bvh import brute_force_query
+
+
+def test_query_matches_brute_force():
+	rng = np.random.default_rng(0)
+	with fg.Geometry("BVH test") as geometry:
+		outer = fg.Cell([+fg.SPH([0, 0, 0], 9)], material=fg.MAT_OUTER)
+		# Overlapping cells: large boxes are created first, so smaller cells
+		# created later must not win in BVH leaves
+		for center in rng.uniform(-5, 5, (40, 3)).tolist():
+			size = rng.uniform(0.5, 3)
+			box = fg.RPP(*([c - size, c + size] for c in center))
+			fg.Cell([-box])
+		cells = geometry.cells
+		points = rng.uniform(-10, 10, (20000, 3))
+		expected = brute_force_query(points, cells)
+		for leaf_size in (1, 4, 16):
+			bvh = fg.BVH(cells, leaf_size=leaf_size)
+			assert np.array_equal(bvh.query(points), expected)
+	assert (expected == outer.cn).any() and (expected == -1).any()
@@ -0,0 +1,59 @@
+import io
+import threading
+
+import fitsgeo as fg
+
+
+def build(barrier):
+	"""
+	Spheres in cells, threads wait for each other between objects, so objects
+	of all geometries are created at the same time
+	"""
+	for r in range(1, 6):
+		barrier.wait()
+		sphere = fg.SPH([0, 0, 0], r)
+		barrier.wait()
+		fg.Cell([-sphere], material=fg.Material([[0, 1, r]], f"H{r}"))
+
+
+def test_threads_are_isolated():
+	n_threads = 4
+	barrier = threading.Barrier(n_threads)
+	geometries = [None] * n_threads
+	default = len(fg.created_surfaces), len(fg.created_cells)
+
+	def run(i):
+		with fg.Geometry(f"Thread {i}") as geometry:
+			build(barrier)
+		geometries[i] = geometry
+
+	threads = [
+		threading.Thread(target=run, args=(i,)) for i in range(n_threads)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+
+	texts = []
+	for geometry in geometries:
+		assert [s.sn for s in geometry.surfaces] == [1, 2, 3, 4, 5]
+		assert [c.cn for c in geometry.cells] == [100, 101, 102, 103, 104]
+		assert [m.matn for m in geometry.materials[3:]] == [2, 3, 4, 5, 6]
+		stream = io.StringIO()
+		fg.phits_write(stream, geometry=geometry)
+		texts.append(stream.getvalue())
+	assert texts.count(texts[0]) == n_threads
+	# Nothing is added to default geometry
+	assert (len(fg.created_surfaces), len(fg.created_cells)) == default
+
+
+def test_nested_geometries():
+	with fg.Geometry("Outer") as outer:
+		fg.SPH()
+		with fg.Geometry("Inner") as inner:
+			assert fg.current_geometry() is inner
+			fg.SPH()
+		assert fg.current_geometry() is outer
+		fg.SPH()
+	assert [s.sn for s in outer.surfaces] == [1, 2]
+	assert [s.sn for s in inner.surfaces] == [1]
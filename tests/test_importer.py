@@ -0,0 +1,129 @@
+import io
+
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+
+
+def build():
+	"""
+	Water sphere and iron box in void world box, outer void outside of it
+	"""
+	iron = fg.Material.database("MAT_FE", color="red")
+	sphere = fg.SPH([0, 0, 0], 2, name="Sphere")
+	box = fg.BOX([3, 3, 3], [1, 0, 0], [0, 1, 0], [0, 0, 1], name="Box")
+	world = fg.RPP([-5, 5], [-5, 5], [-5, 5], name="World")
+	fg.Cell([-sphere], name="Water")
+	fg.Cell([-box], name="Iron", material=iron)
+	fg.Cell([-world, " ", +sphere, " ", +box], name="Void", material=fg.MAT_VOID)
+	fg.Cell([+world], name="Outer", material=fg.MAT_OUTER)
+
+
+def write(geometry):
+	stream = io.StringIO()
+	fg.phits_write(stream, geometry=geometry)
+	return stream.getvalue()
+
+
+def test_round_trip():
+	with fg.Geometry("Original") as original:
+		build()
+	text = write(original)
+
+	with fg.Geometry("Imported") as imported:
+		surfaces, cells, materials = fg.phits_read(io.StringIO(text))
+	assert write(imported) == text
+	assert [s.sn for s in surfaces] == [s.sn for s in original.surfaces]
+	assert [c.cn for c in cells] == [c.cn for c in original.cells]
+	assert [c.name for c in cells] == [c.name for c in original.cells]
+	assert [(m.matn, m.name, m.density) for m in materials] == [
+		(m.matn, m.name, m.density) for m in original.materials if m.matn > 0]
+
+
+def test_counters_follow_imported_numbers():
+	text = "[ Surface ]\n  3 SPH 0 0 0 1\n[ Cell ]\n  105 0 -3\n" + \
+		"[ Material ]\n  mat[2] H 2 O 1\n"
+	with fg.Geometry("Import") as geometry:
+		fg.phits_read(io.StringIO(text))
+		spheres = [fg.SPH() for _ in range(3)]
+		cell = fg.Cell([-spheres[0]])
+		material = fg.Material.database("MAT_FE")
+	assert [s.sn for s in spheres] == [4, 5, 6]
+	assert cell.cn == 106
+	assert material.matn == 3
+	assert len({m.matn for m in geometry.materials}) == len(geometry.materials)
+
+
+@pytest.mark.parametrize("text", [
+	"[ Surface ]\n  1 SPH 0 0 0 1\n  1 SPH 0 0 0 2\n",
+	"[ Surface ]\n  1 SPH 0 0 0 1\n[ Cell ]\n  100 0 -1\n  100 0 1\n",
+	"[ Material ]\n  mat[2] H 2 O 1\n  mat[2] Fe 1\n"])
+def test_duplicate_numbers(text):
+	with fg.Geometry("Import"):
+		with pytest.raises(ValueError):
+			fg.phits_read(io.StringIO(text))
+
+
+def test_numbers_used_in_geometry():
+	with fg.Geometry("Import"):
+		sphere = fg.SPH()
+		fg.Material.database("MAT_FE")  # mat[2]
+		with pytest.raises(ValueError):
+			fg.phits_read(io.StringIO("[ Surface ]\n  1 SPH 0 0 0 1\n"), clear=False)
+		with pytest.raises(ValueError):
+			fg.phits_read(io.StringIO("[ Material ]\n  mat[2] Fe 1\n"), clear=False)
+
+
+def test_clear_keeps_predefined_materials():
+	with fg.Geometry("Import") as geometry:
+		build()
+		fg.phits_read(io.StringIO("[ Surface ]\n  7 SPH 0 0 0 1\n"))
+		cell = fg.Cell([-geometry.surfaces[0]])
+		text = write(geometry)
+	assert cell.cn == 100 and cell.material is fg.MAT_WATER
+	assert "mat[1]" in text
+
+
+def test_material_with_number_of_water():
+	text = "[ Material ]\n  mat[1] Fe 1\n[ Cell ]\n  100 1 -7.8 -1\n" + \
+		"[ Surface ]\n  1 SPH 0 0 0 1\n"
+	with fg.Geometry("Import") as geometry:
+		surfaces, cells, materials = fg.phits_read(io.StringIO(text))
+		water = fg.Cell([+surfaces[0]])  # MAT_WATER by default
+		exported = write(geometry)
+	iron = cells[0].material
+	assert iron is materials[0] and iron.matn == 2 and iron.density == 7.8
+	assert water.material is fg.MAT_WATER and fg.MAT_WATER.matn == 1
+	assert "mat[1] H 2.0 O 1.0" in exported and "mat[2] Fe 1" in exported
+	assert "100 2  -7.8" in exported
+
+
+def test_lattice_round_trip():
+	fill = np.arange(2 * 3 * 4).reshape(2, 3, 4) % 2 + 2  # Universes 2 and 3
+	with fg.Geometry("Lattice") as original:
+		element = fg.RPP([0, 1], [0, 1], [0, 1])
+		world = fg.SPH([0, 0, 0], 10)
+		fg.Cell([-element], material=fg.MAT_VOID, u=2)
+		fg.Cell([-element], u=3)
+		fg.Cell(
+			[-element], material=fg.MAT_VOID, u=1, lat=1,
+			fill=fill, fill_start=(-1, 0, 2))
+		fg.Cell([-world], material=fg.MAT_VOID, fill=1)
+		fg.Cell([+world], material=fg.MAT_OUTER)
+	text = write(original)
+	# Universe numbers are written with index i changing fastest
+	lines = text.splitlines()
+	start = lines.index(
+		next(line for line in lines if "FILL=-1:0 0:2 2:5" in line))
+	numbers = " ".join(lines[start + 1:start + 3]).split()
+	assert numbers == [
+		str(fill[i, j, k]) for k in range(4) for j in range(3) for i in range(2)]
+
+	with fg.Geometry("Imported") as imported:
+		_, cells, _ = fg.phits_read(io.StringIO(text))
+	assert write(imported) == text
+	lattice = cells[2]
+	assert (lattice.u, lattice.lat, lattice.fill_start) == (1, 1, (-1, 0, 2))
+	assert np.array_equal(lattice.fill, fill)
+	assert cells[3].fill == 1
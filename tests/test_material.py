@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import pytest
+
+import fitsgeo as fg
+from fitsgeo.material import load_databases, phits_print_materials
+
+
+def test_import_does_not_load_databases(tmp_path):
+	code = "import fitsgeo.material as m; assert m.DATABASES is None"
+	env = {"FITSGEO_HEADLESS": "1", "XDG_CACHE_HOME": str(tmp_path)}
+	subprocess.run([sys.executable, "-c", code], check=True, env=env)
+	assert not (tmp_path / "fitsgeo").exists()
+
+
+def test_database_many_matches_database():
+	names = ["MAT_WATER", "MAT_FE", "MAT_MUSCLE_SKELETAL_ICRP"]
+	with fg.Geometry("Materials"):
+		many = fg.Material.database_many(
+			names, gas=[False, False, True], color="red")
+		single = [
+			fg.Material.database(n, gas=n == names[2], color="red")
+			for n in names]
+	fields = ("elements", "name", "ratio_type", "density", "gas", "color")
+	for a, b in zip(many, single):
+		assert [getattr(a, f) for f in fields] == [getattr(b, f) for f in fields]
+	assert [m.matn for m in many + single] == [2, 3, 4, 5, 6, 7]
+	# Water of database is defined as predefined water
+	assert [getattr(many[0], f) for f in fields[:4]] == [
+		getattr(fg.MAT_WATER, f) for f in fields[:4]]
+
+
+def test_name_index_matches_database_rows():
+	databases = load_databases()
+	materials, index = databases["materials"], databases["index"]
+	assert len(index) == len(materials["Name"])
+	for row in (0, len(index) // 2, len(index) - 1):
+		elements, density, _ = index[materials["Name"][row]]
+		assert density == materials["Density(g/cm^3)"][row]
+		assert len(elements) == materials["N"][row]
+		formula = materials["Formula (Z Q)"][row].split()
+		assert elements[0] == (0, int(formula[0]), float(formula[1]))
+
+
+def test_missing_names():
+	with pytest.raises(NameError, match="'No_1', 'No_2'"):
+		fg.Material.database_many(["MAT_FE", "No_1", "No_2"])
+	with pytest.raises(ValueError):
+		fg.Material.database_many(["MAT_FE", "MAT_WATER"], gas=[True])
+
+
+def test_phits_print_symbols():
+	with fg.Geometry("Materials"):
+		fuel = fg.Material(
+			[[235, 92, 0.05], [238, 92, 0.95]], "Fuel", "mass", 10.5, gas=False)
+		air = fg.Material([[0, 7, 4], [0, 8, 1]], "Air", gas=True)
+		muscle = fg.Material.database("MAT_MUSCLE_SKELETAL_ICRP")
+	assert fuel.phits_print() == \
+		"    mat[2] 235U -0.05 238U -0.95  GAS=0 $ name: 'Fuel'"
+	assert air.phits_print() == "    mat[3] N 4 O 1  GAS=1 $ name: 'Air'"
+	# Batch of materials is printed as materials one by one
+	materials = [fg.MAT_OUTER, fg.MAT_VOID, fuel, air, muscle]
+	assert phits_print_materials(materials) == \
+		["", ""] + [m.phits_print() for m in materials[2:]]
+	# Symbols are taken from periodic table by atomic number
+	ptable = load_databases()["ptable"]
+	symbols = dict(zip(ptable["atomic_number"], ptable["symbol"]))
+	expected = " ".join(
+		f"{symbols[z]} -{q}" for _, z, q in muscle.elements)
+	assert f"] {expected}  GAS=0" in muscle.phits_print()
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+
+# Surfaces with analytic volumes, polyhedra are meshed exactly
+SURFACES = [
+	(lambda: fg.SPH([1, -2, 0.5], 2), 4 / 3 * np.pi * 8, 0.01),
+	(lambda: fg.BOX([0, 0, 0], [0.6, 0.8, 0], [-1.6, 1.2, 0], [0, 0, 3]), 6, 0),
+	(lambda: fg.RPP([0, 1], [-1, 2], [3, 5]), 6, 0),
+	(lambda: fg.RCC([0, 0, 0], [1, 2, 2], 1), np.pi * 3, 0.01),
+	(lambda: fg.TRC([0, 0, 0], [2, 1, -2], 1, 0.5), np.pi * 3 * 1.75 / 3, 0.01),
+	(lambda: fg.T([0, 0, 0], 2, 0.5, 0.3, rot="y"), 2 * np.pi ** 2 * 0.3, 0.01),
+	(
+		lambda: fg.REC([0, 0, 0], [1, 2, 2], [2, -1, 0], [0.4, 0.8, -1]),
+		np.pi * 3 * np.sqrt(5) * np.sqrt(1.8), 0.01),
+	(lambda: fg.WED([0, 0, 0], [2, 0, 0], [0, 1, 0], [0, 0, 3]), 3, 0)]
+
+
+def signed_volume(vertices, faces):
+	"""
+	Get volume enclosed by mesh, positive if faces are oriented outward
+	"""
+	v = vertices[faces]
+	return np.sum(np.linalg.det(v)) / 6
+
+
+@pytest.mark.parametrize("make, volume, rel", SURFACES)
+def test_mesh_volume(make, volume, rel):
+	with fg.Geometry("Mesh"):
+		surface = make()
+	vertices, faces = surface.mesh(segments=64)
+	assert signed_volume(vertices, faces) == pytest.approx(
+		volume, rel=rel, abs=1e-9)
+	# Closed mesh: every edge is used once in each direction
+	edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+	forward = {tuple(e) for e in edges.tolist()}
+	assert len(forward) == len(edges)
+	assert forward == {(b, a) for a, b in forward}
+
+
+def test_meshes_of_many_surfaces():
+	with fg.Geometry("Mesh"):
+		spheres = [fg.SPH([i, 0, 0], 0.1 * (i + 1)) for i in range(5)]
+	vertices, faces = fg.SPH.meshes(spheres, segments=32)
+	single = [s.mesh(segments=32) for s in spheres]
+	assert len(vertices) == sum(len(v) for v, _ in single)
+	assert signed_volume(vertices, faces) == pytest.approx(
+		sum(signed_volume(v, f) for v, f in single))
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+
+
+class Ball(fg.SPH):
+	"""Subclass of surface class uses ray function of the base class"""
+
+
+def test_intersect_subclass():
+	with fg.Geometry("Ray test"):
+		ball = Ball([0, 0, 0], 2)
+		t = fg.intersect(ball, [[0, 0, -10]], [[0, 0, 1]])
+		distance, sn = fg.cast([[0, 0, -10]], [[0, 0, 1]])
+	assert np.allclose(t, 8)
+	assert np.allclose(distance, 8) and sn[0] == ball.sn
+
+
+def model():
+	"""Water sphere in void world box, outer void outside of the box"""
+	sphere = fg.SPH([0, 0, 0], 2)
+	world = fg.RPP([-5, 5], [-5, 5], [-5, 5])
+	water = fg.Cell([-sphere], material=fg.MAT_WATER)
+	void = fg.Cell([-world, " ", +sphere], material=fg.MAT_VOID)
+	fg.Cell([+world], material=fg.MAT_OUTER)
+	return water, void
+
+
+def test_trace_from_outer_void():
+	with fg.Geometry("Trace test"):
+		water, void = model()
+		segments, areal_density = fg.trace([[0, 0, -30]], [[0, 0, 1]])
+	assert [cell for cell, _, _ in segments[0]] == [void, water, void]
+	assert [length for _, _, length in segments[0]] == pytest.approx([3, 4, 3])
+	assert np.allclose(areal_density, 4)
+
+
+def test_trace_without_outer_void():
+	with fg.Geometry("Trace test"):
+		sphere = fg.SPH([0, 0, 0], 2)
+		water = fg.Cell([-sphere], material=fg.MAT_WATER)
+		segments, areal_density = fg.trace([[0, 0, -10]], [[0, 0, 1]])
+	# Segments outside of all cells are kept, ray stops after last crossing
+	assert [cell for cell, _, _ in segments[0]] == [None, water]
+	assert np.isfinite(areal_density).all()
+	assert np.allclose(areal_density, 4)
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+from fitsgeo.region import parse_cell_def, SenseCache
+
+
+@pytest.fixture
+def model():
+	"""
+	Three overlapping spheres A, B, C and random points around them
+	"""
+	with fg.Geometry("Region test") as geometry:
+		spheres = [
+			fg.SPH([0, 0, 0], 2), fg.SPH([1, 0, 0], 2), fg.SPH([0, 1, 0], 2)]
+		points = np.random.default_rng(0).uniform(-4, 4, (5000, 3))
+		inside = [s.sense(points) < 0 for s in spheres]
+		yield geometry, spheres, points, inside
+
+
+def evaluate(text: str, geometry, points):
+	tree = parse_cell_def(text)
+	return tree.compile()(SenseCache(points, geometry.surfaces, geometry.cells))
+
+
+def numbered(text: str, spheres: list):
+	"""
+	Replace A, B, C placeholders with surface numbers of spheres
+	"""
+	for name, s in zip("ABC", spheres):
+		text = text.replace(name, str(s.sn))
+	return text
+
+
+@pytest.mark.parametrize("text, expected", [
+	("-A", lambda a, b, c: a),
+	("A", lambda a, b, c: ~a),
+	("+A", lambda a, b, c: ~a),
+	("-A -B", lambda a, b, c: a & b),
+	("-A:-B", lambda a, b, c: a | b),
+	# Blank (AND) binds tighter than : (OR)
+	("-A -B:-C", lambda a, b, c: (a & b) | c),
+	("-A:-B -C", lambda a, b, c: a | (b & c)),
+	("-A (-B:-C)", lambda a, b, c: a & (b | c)),
+	("(-A:-B)(-C)", lambda a, b, c: (a | b) & c),
+	("((-A))", lambda a, b, c: a),
+	# Complement binds tighter than both
+	("#(-A -B) -C", lambda a, b, c: ~(a & b) & c),
+	("#(-A:-B):-C", lambda a, b, c: ~(a | b) | c),
+	("#-A -B", lambda a, b, c: ~a & b),
+	("##(-A)", lambda a, b, c: a),
+	("-A #(-B) #(-C)", lambda a, b, c: a & ~b & ~c),
+])
+def test_precedence(model, text, expected):
+	geometry, spheres, points, inside = model
+	mask = evaluate(numbered(text, spheres), geometry, points)
+	assert np.array_equal(mask, expected(*inside))
+
+
+def test_cell_complement(model):
+	geometry, spheres, points, (a, b, c) = model
+	cell = fg.Cell([-spheres[0], " ", -spheres[1]])
+	mask = evaluate(f"-{spheres[2].sn} #{cell.cn}", geometry, points)
+	assert np.array_equal(mask, c & ~(a & b))
+	# #n is a cell, #(n) is a complement of surface region
+	mask = evaluate(f"#({spheres[0].sn})", geometry, points)
+	assert np.array_equal(mask, a)
+
+
+def test_cell_def_of_cell(model):
+	geometry, spheres, points, (a, b, c) = model
+	cell = fg.Cell([-spheres[0], " ", +spheres[1], ":", -spheres[2]])
+	assert np.array_equal(fg.cells_mask(points, [cell])[0], (a & ~b) | c)
+
+
+@pytest.mark.parametrize("text", ["(-1 -2", "-1 -2)", "-1 :", ": -1", "#", "-1 x"])
+def test_incorrect_cell_def(text):
+	with pytest.raises(ValueError):
+		parse_cell_def(text)
+
+
+def test_unknown_numbers(model):
+	geometry, spheres, points, inside = model
+	with pytest.raises(ValueError):
+		evaluate("-999", geometry, points)
+	with pytest.raises(ValueError):
+		evaluate("#999", geometry, points)
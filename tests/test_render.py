@@ -0,0 +1,62 @@
+import struct
+import zlib
+
+import numpy as np
+
+import fitsgeo as fg
+
+
+def read_png(file_name):
+	"""
+	Read RGB image written by write_png, CRC of every chunk is checked
+
+	:return: tuple (list of chunk types, numpy.ndarray with (height, width, 3))
+	"""
+	with open(file_name, "rb") as f:
+		data = f.read()
+	assert data[:8] == b"\x89PNG\r\n\x1a\n"
+	kinds, chunks, position = [], {}, 8
+	while position < len(data):
+		length, = struct.unpack(">I", data[position:position + 4])
+		kind = data[position + 4:position + 8]
+		body = data[position + 8:position + 8 + length]
+		crc, = struct.unpack(
+			">I", data[position + 8 + length:position + 12 + length])
+		assert crc == zlib.crc32(kind + body) & 0xffffffff
+		kinds.append(kind)
+		chunks[kind] = chunks.get(kind, b"") + body
+		position += 12 + length
+	width, height, depth, color, *_ = struct.unpack(">IIBBBBB", chunks[b"IHDR"])
+	assert (depth, color) == (8, 2)  # 8 bit RGB
+	raw = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8)
+	raw = raw.reshape(height, width * 3 + 1)
+	assert not raw[:, 0].any()  # Filter type 0
+	return kinds, raw[:, 1:].reshape(height, width, 3)
+
+
+def test_write_png(tmp_path):
+	image = np.random.default_rng(0).integers(
+		0, 256, (37, 23, 3), dtype=np.uint8)
+	fg.write_png(tmp_path / "image.png", image, rows=10)
+	kinds, read = read_png(tmp_path / "image.png")
+	assert kinds[0] == b"IHDR" and kinds[-1] == b"IEND"
+	assert np.array_equal(read, image)
+
+
+def test_slice_png(tmp_path):
+	with fg.Geometry("Slice"):
+		sphere = fg.SPH([0, 0, 0], 1)
+		world = fg.RPP([-2, 2], [-2, 2], [-1, 1])
+		fg.Cell([-sphere], material=fg.Material([[0, 1, 1]], color="red"))
+		fg.Cell([-world, " ", +sphere], material=fg.MAT_VOID)
+		fg.Cell([+world], material=fg.MAT_OUTER)
+		image = fg.slice_png(
+			str(tmp_path / "slice.png"), plane="xy", pixels=(80, 40),
+			boundaries=False)
+	_, read = read_png(tmp_path / "slice.png")
+	assert read.shape == image.shape == (40, 80, 3)
+	assert np.array_equal(read, image)
+	# Slice of world box: sphere in center, void around it
+	red = np.round(np.array(fg.as_rgb(fg.ANGEL_COLORS["red"])) * 255)
+	assert np.array_equal(image[20, 40], red)
+	assert not np.array_equal(image[20, 2], red)
@@ -0,0 +1,30 @@
+import numpy as np
+
+import fitsgeo as fg
+from fitsgeo.scene import surface_boxes, screen_sizes, lod_segments
+from fitsgeo.surface import DRAW_SEGMENTS
+
+
+def test_surface_boxes_of_arrays():
+	with fg.Geometry("Scene") as geometry:
+		sphere = fg.SPH([0, 0, 0], 5)
+		array = fg.SPHArray([[1, 0, 0], [0, 2, 0], [0, 0, 3]], [0.5, 1, 1.5])
+		plane = fg.P(vert="z", d=1)
+	items, boxes = surface_boxes(geometry.surfaces)
+	# Arrays are replaced by their items
+	assert items == [sphere, (array, 0), (array, 1), (array, 2), plane]
+	assert boxes.shape == (5, 3, 2)
+	for i in range(3):
+		assert np.allclose(boxes[i + 1], array[i].bounding_box)
+	assert np.array_equal(boxes[0], sphere.bounding_box)
+	assert np.all(np.isinf(boxes[4]))
+
+	sizes = screen_sizes(boxes, 600)
+	# Sphere of model size takes the whole canvas height
+	assert np.allclose(sizes[:4], [600, 60, 120, 180])
+	assert np.isinf(sizes[4])
+
+
+def test_lod_segments():
+	assert [lod_segments(s) for s in (0, 19.9, 20, 99, 100, np.inf)] == [
+		8, 8, 16, 16, DRAW_SEGMENTS, DRAW_SEGMENTS]
@@ -0,0 +1,131 @@
+import io
+
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+from fitsgeo.surface import prototype_key
+
+
+def build():
+	sphere = fg.SPH([1, 2.0, -0.0], 2)
+	sphere.y0 = 3
+	fg.RCC([0, 0, 0], [0, 2, 0], 1)
+	fg.RCC([0.0, 0, 0], [0, 2.0, 0], 1)
+	box = fg.BOX()
+	box.a = [2, 0, 0]
+	fg.RPP([0, 1], [0, 1], [0, 1])
+	fg.T([0, 0, 0], rot="z")
+	fg.P(vert="x")
+	stream = io.StringIO()
+	fg.phits_write(stream)
+	return stream.getvalue()
+
+
+def test_compact_geometry():
+	with fg.Geometry("Lists"):
+		text = build()
+	with fg.Geometry("Compact", compact=True) as geometry:
+		assert build() == text
+		h = [s.h for s in geometry.surfaces if isinstance(s, fg.RCC)]
+	assert isinstance(h[0], tuple)
+	assert h[0] == h[1] and h[0] is not h[1]  # 0 and 0.0 are printed differently
+
+
+def test_failed_init_leaves_no_surface():
+	with fg.Geometry("Compact", compact=True) as geometry:
+		with pytest.raises(TypeError):
+			fg.SPH(xyz0=1.0)  # Vector can't be converted to tuple
+		with pytest.raises(TypeError):
+			fg.RCC(h=None, r=1.0, xyz0=0)
+		assert geometry.surfaces == []
+		assert fg.SPH().sn == 1
+
+
+# Surfaces with rotated or inclined vectors, bounding boxes are analytic
+BOUNDED_SURFACES = [
+	lambda: fg.SPH([1, -2, 0.5], 2),
+	lambda: fg.BOX([0, 0, 0], [0.6, 0.8, 0], [-0.8, 0.6, 0], [0, 0, 1]),
+	lambda: fg.RPP([0, 1], [-1, 2], [3, 4]),
+	lambda: fg.RCC([0, 0, 0], [1, 2, 2], 1),
+	lambda: fg.TRC([0, 0, 0], [2, 1, -2], 1, 0.5),
+	lambda: fg.T([0, 0, 0], 2, 0.5, 0.3, rot="x"),
+	lambda: fg.T([1, 0, 0], 2, 0.5, 0.3, rot="y"),
+	lambda: fg.T([0, 0, 0], 2, 0.3, 0.5, rot="z"),
+	lambda: fg.REC([0, 0, 0], [1, 2, 2], [2, -1, 0], [0.2, 0.4, -0.5]),
+	lambda: fg.WED([0, 0, 0], [1, 1, 0], [-1, 1, 0], [0, 0, 2])]
+
+
+@pytest.mark.parametrize("make", BOUNDED_SURFACES)
+def test_bounding_box(make):
+	with fg.Geometry("Bounding box"):
+		surface = make()
+	box = surface.bounding_box
+	size = box[:, 1] - box[:, 0]
+	points = np.random.default_rng(0).uniform(
+		box[:, 0] - 0.2 * size, box[:, 1] + 0.2 * size, (200000, 3))
+	inside = points[surface.sense(points) < 0]
+	# All inside points are in box and box is tight around them
+	assert np.all(inside.min(axis=0) >= box[:, 0])
+	assert np.all(inside.max(axis=0) <= box[:, 1])
+	assert np.all(inside.min(axis=0) - box[:, 0] < 0.03 * size)
+	assert np.all(box[:, 1] - inside.max(axis=0) < 0.03 * size)
+
+
+def test_bounding_box_of_cell():
+	with fg.Geometry("Bounding box"):
+		sphere = fg.SPH([0, 0, 0], 2)
+		plane = fg.P(vert="x", d=1)
+		cell = fg.Cell([-sphere, " ", +plane])
+		box = cell.bounding_box
+		assert np.allclose(box, [[1, 2], [-2, 2], [-2, 2]])
+		assert np.all(np.isinf(fg.Cell([+sphere]).bounding_box))
+
+
+def test_surface_arrays_export_as_single_surfaces():
+	rng = np.random.default_rng(0)
+	centers = rng.uniform(-10, 10, (30, 3)).round(3)
+	radii = rng.uniform(0.1, 1, 30).round(4)
+	h = rng.uniform(-1, 1, (30, 3))
+	x = np.sort(rng.uniform(-5, 5, (30, 2)), axis=1)
+
+	with fg.Geometry("Arrays", compact=True) as arrays:
+		items = [
+			fg.SPHArray(centers, radii, name="Pebble"),
+			fg.RCCArray(centers, h, 0.5, trn="1"),
+			fg.RPPArray(x, [0.0, 1.0], x[::-1])]
+		for array in items:
+			fg.Cell([-array[0], ":", -array[-1]])
+	with fg.Geometry("Surfaces") as surfaces:
+		for xyz0, r in zip(centers.tolist(), radii.tolist()):
+			fg.SPH(xyz0, r, name="Pebble")
+		for xyz0, vector in zip(centers.tolist(), h.tolist()):
+			fg.RCC(xyz0, vector, 0.5, trn="1")
+		for x_i, z_i in zip(x.tolist(), x[::-1].tolist()):
+			fg.RPP(x_i, [0.0, 1.0], z_i)
+		items = surfaces.surfaces
+		for i in range(0, 90, 30):
+			fg.Cell([-items[i], ":", -items[i + 29]])
+
+	texts = []
+	for geometry in (arrays, surfaces):
+		stream = io.StringIO()
+		fg.phits_write(stream, geometry=geometry)
+		texts.append(stream.getvalue())
+	assert texts[0] == texts[1]
+
+
+def test_prototype_key():
+	with fg.Geometry("Draw"):
+		cones = [
+			fg.TRC([0, 0, 0], [0, 2, 0], 1, 0.5),
+			fg.TRC([5, 0, 0], [0, 0, 2.000001], 1.0000001, 0.5),
+			fg.TRC([0, 0, 0], [0, 2, 0], 1.01, 0.5)]
+		tori = [
+			fg.T([0, 0, 0], 2, 0.1, 0.3, rot="y"),
+			fg.T([0, 0, 0], 2, 0.3, 0.1, rot="x")]
+	keys = [prototype_key(s, 16) for s in cones + tori]
+	# Shape is rounded, position and direction are not part of key
+	assert keys[0] == keys[1] != keys[2]
+	assert keys[0] == ("TRC", 1.0, 0.5, 2.0, 16)
+	assert keys[3][2:] == keys[4][2:] == (2.0, 0.3, 0.1, 16)
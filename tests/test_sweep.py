@@ -0,0 +1,42 @@
+import fitsgeo as fg
+
+
+def build(index, r):
+	"""
+	Water sphere in void world box, index is a parameter of model
+	"""
+	sphere = fg.SPH([0, 0, 0], r + index, name="Sphere")
+	world = fg.RPP([-9, 9], [-9, 9], [-9, 9], name="World")
+	fg.Cell([-sphere], name="Water")
+	fg.Cell([-world, " ", +sphere], name="Void", material=fg.MAT_VOID)
+	fg.Cell([+world], name="Outer", material=fg.MAT_OUTER)
+
+
+def fail(index, r):
+	raise ValueError("Broken variant!")
+
+
+def test_sweep_writes_files(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	report = fg.sweep(
+		build, {"index": [0, 1], "r": [2, 3]}, inp_name="sphere_{index}_r{r}")
+	assert not report.failed
+	names = [r.inp_name for r in report.results]
+	# {index} is index of variant, not parameter "index"
+	assert names == ["sphere_0_r2", "sphere_1_r3", "sphere_2_r2", "sphere_3_r3"]
+	assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+		f"{n}_FitsGeo.inp" for n in names)
+	for result in report.results:
+		text = (tmp_path / f"{result.inp_name}_FitsGeo.inp").read_text()
+		# Every variant starts numbering from the beginning
+		r = result.params["r"] + result.params["index"]
+		assert text.count("SPH") == 1
+		assert f"1 SPH 0 0 0 {r} $" in " ".join(text.split())
+
+
+def test_sweep_reports_failed_variants(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	report = fg.sweep(fail, [{"index": 0, "r": 1}])
+	assert len(report.failed) == 1
+	assert "Broken variant!" in report.failed[0].error
+	assert not list(tmp_path.iterdir())
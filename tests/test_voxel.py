@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import fitsgeo as fg
+
+
+@pytest.fixture
+def model():
+	"""
+	Iron slab x < 0.75 and water slab x > 0.75 in void, voxels are 1 cm
+	"""
+	with fg.Geometry("Voxel test") as geometry:
+		iron = fg.Material([[0, 26, 1]], "Fe", density=7.874)
+		slab_iron = fg.RPP([0, 0.75], [0, 1], [0, 2])
+		slab_water = fg.RPP([0.75, 2], [0, 1], [0, 1])
+		world = fg.RPP([-1, 3], [-1, 2], [-1, 3])
+		fg.Cell([-slab_iron], material=iron)
+		fg.Cell([-slab_water])
+		fg.Cell(
+			[-world, " ", +slab_iron, " ", +slab_water], material=fg.MAT_VOID)
+		fg.Cell([+world], material=fg.MAT_OUTER)
+	return geometry, iron
+
+
+def test_material_fractions(model):
+	geometry, iron = model
+	matn, density, fraction = fg.voxelize(
+		[[0, 2], [0, 1], [0, 2]], (2, 1, 2), samples=4, fractions=True,
+		geometry=geometry)
+	# Voxels [0, 0, k] have 3/4 of iron samples and water (k = 0) or void
+	# (k = 1) samples, voxels [1, 0, k] are only water and only void
+	assert matn[:, 0].tolist() == [[iron.matn] * 2, [1, 0]]
+	assert fraction[:, 0].tolist() == [[0.75, 0.75], [1, 1]]
+	assert np.allclose(
+		density[:, 0], [[(3 * 7.874 + 1) / 4, 3 * 7.874 / 4], [1, 0]])
+
+
+def test_memory_mapped_arrays(model, tmp_path):
+	geometry, _ = model
+	parameters = dict(
+		bounds=[[0, 2], [0, 1], [0, 2]], shape=(8, 3, 5), samples=2,
+		fractions=True, geometry=geometry)
+	arrays = fg.voxelize(**parameters)
+	# Slabs of two voxel layers with arrays mapped to files
+	mapped = fg.voxelize(
+		file_name=str(tmp_path / "phantom"), chunk_size=2 * 3 * 5 * 8,
+		**parameters)
+	for name, array, mapped_array in zip(
+			("matn", "density", "fraction"), arrays, mapped):
+		assert isinstance(mapped_array, np.memmap)
+		loaded = np.load(tmp_path / f"phantom_{name}.npy")
+		assert loaded.dtype == array.dtype
+		assert np.array_equal(loaded, array)
+		assert np.array_equal(mapped_array, array)